@@ -0,0 +1,188 @@
+"""
+Benchmark: ingestão com embeddings por nó x em lote, sequencial x em pipeline.
+
+Sobe um servidor de embeddings falso (mesma API do Ollama, com latência
+fixa por requisição) e indexa PDFs sintéticos em um Qdrant em memória,
+reportando documentos por segundo e chamadas de embedding por documento.
+O modo "por nó" usa lotes de 1 texto e um arquivo por vez, como a
+ingestão original; o modo "pipeline" usa a concorrência padrão por estágio.
+Os dois últimos modos usam o cache de embeddings: a primeira execução
+o preenche e a reindexação seguinte não deveria chamar o servidor.
+
+Uso (a partir da pasta backend/):
+    python benchmarks/bench_ingestion.py --docs 20 --batch-size 32 --latency-ms 15
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_client import QdrantClient
+from services.embeddings import TIPO_CURRICULO, VECTOR_SIZE
+from services.indexer import DocumentIndexer
+
+SAMPLE_SENTENCES = [
+    "Possui graduacao em Matematica pela Universidade Federal de Pernambuco.",
+    "Tem experiencia na area de Probabilidade e Estatistica, com enfase em inferencia bayesiana.",
+    "Atua principalmente nos temas de processos estocasticos e modelos de regressao.",
+    "Coordenou projetos de pesquisa financiados pelo CNPq e pela FACEPE.",
+    "Orientou dissertacoes de mestrado e teses de doutorado no programa de pos-graduacao.",
+    "Publicou artigos em periodicos internacionais sobre aprendizado de maquina.",
+    "Foi chefe de departamento e membro do conselho departamental do centro.",
+    "Ministra disciplinas de calculo, algebra linear e analise numerica na graduacao.",
+]
+
+
+class FakeEmbeddingServer(ThreadingHTTPServer):
+    """Servidor com /api/embed e /api/embeddings que conta as requisições"""
+
+    def __init__(self, latency_s):
+        super().__init__(("127.0.0.1", 0), FakeEmbeddingHandler)
+        self.latency_s = latency_s
+        self.requests = 0
+        self.texts = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.texts = 0
+
+
+class FakeEmbeddingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    @staticmethod
+    def vector(text):
+        # Vetor determinístico derivado do hash do texto
+        seed = hashlib.sha256(text.encode("utf-8")).digest()
+        return [(seed[i % len(seed)] - 128) / 128 for i in range(VECTOR_SIZE)]
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/api/embed":
+            texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            payload = {"embeddings": [self.vector(text) for text in texts]}
+        elif self.path == "/api/embeddings":
+            texts = [body["prompt"]]
+            payload = {"embedding": self.vector(body["prompt"])}
+        else:
+            self.send_error(404)
+            return
+
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.texts += len(texts)
+        time.sleep(self.server.latency_s)
+
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def write_sample_pdf(path, lines):
+    """PDF mínimo de uma página com uma linha de texto por item (apenas ASCII)"""
+    escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+    stream = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({line}) Tj T*" for line in escaped) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+    ]
+    output = "%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{obj}\nendobj\n"
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n"
+    with open(path, "w", encoding="latin-1") as f:
+        f.write(output)
+
+
+def create_corpus(directory, documents, sentences):
+    department = os.path.join(directory, "DMAT")
+    os.makedirs(department, exist_ok=True)
+    for index in range(documents):
+        lines = ["Curriculo Lattes", f"Professor Exemplo {index}"]
+        lines += [SAMPLE_SENTENCES[(index + i) % len(SAMPLE_SENTENCES)] for i in range(sentences)]
+        write_sample_pdf(os.path.join(department, f"{index:016d}.pdf"), lines)
+
+
+SEQUENTIAL = {"parse": 1, "split": 1, "embed": 1, "upsert": 1}
+
+
+def run_mode(label, corpus_dir, server, batch_size, documents, stage_workers=None, cache_path=None):
+    server.reset()
+    with tempfile.TemporaryDirectory() as state_dir:
+        indexer = DocumentIndexer(
+            qdrant_client=QdrantClient(":memory:"),
+            collection_name="bench",
+            embed_model="fake-embed",
+            sources=[(corpus_dir, TIPO_CURRICULO)],
+            manifest_path=os.path.join(state_dir, "manifest.json"),
+            embed_batch_size=batch_size,
+            stage_workers=stage_workers,
+            embed_cache_path=cache_path
+        )
+        start = time.perf_counter()
+        summary = indexer.run()
+        elapsed = time.perf_counter() - start
+
+    print(f"   {label:<24} {documents / elapsed:7.2f} docs/s | "
+          f"{server.requests / documents:7.1f} chamadas/doc | "
+          f"{server.texts / documents:7.1f} textos/doc | {summary['points']} vetores | "
+          f"{len(summary['failed'])} falha(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestão com embeddings por nó x em lote")
+    parser.add_argument("--docs", type=int, default=20, help="Quantidade de PDFs sintéticos")
+    parser.add_argument("--sentences", type=int, default=40, help="Frases por PDF")
+    parser.add_argument("--batch-size", type=int, default=32, help="Textos por requisição no modo em lote")
+    parser.add_argument("--latency-ms", type=float, default=15, help="Latência do servidor falso por requisição")
+    args = parser.parse_args()
+
+    server = FakeEmbeddingServer(args.latency_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OLLAMA_BASE_URL"] = server.url
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        create_corpus(corpus_dir, args.docs, args.sentences)
+        print(f"📚 {args.docs} PDFs x {args.sentences} frases | latência {args.latency_ms:.0f}ms por requisição")
+        run_mode("por nó, sequencial", corpus_dir, server, 1, args.docs, SEQUENTIAL)
+        run_mode(f"lote {args.batch_size}, sequencial", corpus_dir, server, args.batch_size, args.docs, SEQUENTIAL)
+        run_mode(f"lote {args.batch_size}, pipeline", corpus_dir, server, args.batch_size, args.docs)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = os.path.join(cache_dir, "embeddings.sqlite3")
+            run_mode("cache frio", corpus_dir, server, args.batch_size, args.docs, cache_path=cache_path)
+            run_mode("reindexação, cache", corpus_dir, server, args.batch_size, args.docs, cache_path=cache_path)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: embeddings de consulta pelo Ollama (HTTP) x no processo.
+
+Vetoriza as mesmas consultas com os dois backends de EMBED_BACKEND,
+reportando latências p50/p95 por consulta e a similaridade de cosseno
+entre os vetores de cada consulta (próxima de 1.0 = compatíveis com a
+coleção indexada pelo Ollama).
+
+Requer o Ollama em execução (OLLAMA_BASE_URL) com o modelo já baixado.
+
+Uso (a partir da pasta backend/):
+    python benchmarks/bench_query_embeddings.py --model all-minilm:l6-v2 --repeat 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_ollama import OllamaEmbeddings
+from services.local_embedding import LocalQueryEmbeddings
+
+SAMPLE_QUERIES = [
+    "professores que pesquisam aprendizado de máquina",
+    "quem trabalha com teoria dos números no departamento de matemática",
+    "artigos sobre inferência bayesiana",
+    "formação acadêmica do professor de física experimental",
+    "projetos de pesquisa financiados pelo CNPq",
+    "áreas de atuação do departamento de estatística",
+    "pesquisas em química computacional e modelagem molecular",
+    "orientações de doutorado em ciência da computação",
+]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, int(round(len(ordered) * fraction)) - 1)]
+
+
+def run_backend(label, embeddings, repeat):
+    """Vetoriza cada consulta `repeat` vezes; retorna os vetores da primeira rodada"""
+    vectors = [embeddings.embed_query(query) for query in SAMPLE_QUERIES]  # Aquecimento
+    latencies = []
+    for _ in range(repeat):
+        for query in SAMPLE_QUERIES:
+            start = time.perf_counter()
+            embeddings.embed_query(query)
+            latencies.append(time.perf_counter() - start)
+    print(f"   {label:<8} p50 {statistics.median(latencies) * 1000:7.2f}ms | "
+          f"p95 {percentile(latencies, 0.95) * 1000:7.2f}ms | dimensão {len(vectors[0])}")
+    return vectors
+
+
+def cosine(a, b):
+    a, b = np.asarray(a), np.asarray(b)
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embeddings de consulta: Ollama x no processo")
+    parser.add_argument("--model", default="all-minilm:l6-v2", help="Modelo de embeddings do Ollama")
+    parser.add_argument("--repeat", type=int, default=20, help="Rodadas sobre as consultas de exemplo")
+    args = parser.parse_args()
+
+    base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    print(f"🧭 {len(SAMPLE_QUERIES)} consultas x {args.repeat} rodadas | modelo {args.model}")
+    ollama_vectors = run_backend("ollama", OllamaEmbeddings(model=args.model, base_url=base_url), args.repeat)
+    local_vectors = run_backend("local", LocalQueryEmbeddings(args.model), args.repeat)
+
+    similarities = [cosine(a, b) for a, b in zip(ollama_vectors, local_vectors)]
+    print(f"   Similaridade de cosseno ollama x local: mínima {min(similarities):.4f} | "
+          f"média {statistics.mean(similarities):.4f}")
+
+
+if __name__ == "__main__":
+    main()
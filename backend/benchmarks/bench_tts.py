@@ -0,0 +1,63 @@
+"""
+Benchmark de latência dos motores de TTS.
+
+Sintetiza um conjunto fixo de frases em português com cada motor informado
+e reporta latência média, p95 e máxima. Útil para comparar o gTTS (rede)
+com motores locais em uma máquina somente com CPU.
+
+Uso (a partir da pasta backend/):
+    python benchmarks/bench_tts.py --engines stub piper --piper-model models/pt_BR-faber-medium.onnx
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.tts_service import TTSService
+
+SAMPLE_SENTENCES = [
+    "Olá! Seja bem-vindo ao Centro de Ciências Exatas e da Natureza da UFPE.",
+    "O CCEN reúne os departamentos de Matemática, Física, Química, Estatística e Ciência da Computação.",
+    "A professora pesquisa sistemas dinâmicos e suas aplicações em biologia.",
+    "Posso te ajudar a encontrar informações sobre outros professores?",
+    "Sim.",
+]
+
+
+async def run_engine(engine, repeat, options):
+    service = TTSService(engine=engine, **options)
+    latencies = []
+    total_bytes = 0
+    for _ in range(repeat):
+        for sentence in SAMPLE_SENTENCES:
+            start = time.perf_counter()
+            audio_bytes = await service.synthesize(sentence)
+            latencies.append(time.perf_counter() - start)
+            total_bytes += len(audio_bytes)
+
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"🔊 {engine} ({service.audio_format})")
+    print(f"   Sínteses: {len(latencies)} | bytes gerados: {total_bytes}")
+    print(f"   Latência média: {statistics.mean(latencies) * 1000:.0f}ms | "
+          f"p95: {p95 * 1000:.0f}ms | máx: {latencies[-1] * 1000:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos motores de TTS")
+    parser.add_argument("--engines", nargs="+", default=["stub"], help="Motores a comparar (gtts, piper, stub)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições do conjunto de frases")
+    parser.add_argument("--piper-model", default=None, help="Caminho do modelo de voz do Piper")
+    args = parser.parse_args()
+
+    for engine in args.engines:
+        options = {"model_path": args.piper_model} if engine == "piper" else {}
+        asyncio.run(run_engine(engine, args.repeat, options))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Micro-benchmark: síntese via arquivo temporário x síntese em memória.
+
+Compara o caminho antigo do gTTS (save() em NamedTemporaryFile, leitura e
+unlink) com o caminho atual (write_to_fp() em BytesIO). Por padrão usa um
+sintetizador falso com a mesma interface do gTTS, para isolar o custo de
+E/S sem depender da rede; com --gtts usa o gTTS real.
+
+Uso (a partir da pasta backend/):
+    python benchmarks/bench_tts_memory.py --iterations 500
+    python benchmarks/bench_tts_memory.py --gtts --iterations 10
+"""
+import argparse
+import hashlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+SAMPLE_TEXT = "O CCEN reúne os departamentos de Matemática, Física, Química, Estatística e Ciência da Computação."
+
+
+class FakeGTTS:
+    """Imita a interface do gTTS, gerando ~40 KB de bytes determinísticos em blocos."""
+
+    CHUNK_SIZE = 4096
+    CHUNKS = 10
+
+    def __init__(self, text, lang="pt-br", slow=False):
+        self.seed = hashlib.sha256(text.encode("utf-8")).digest()
+
+    def write_to_fp(self, fp):
+        for index in range(self.CHUNKS):
+            fp.write((self.seed + bytes([index])) * (self.CHUNK_SIZE // 33))
+
+    def save(self, savefile):
+        # Mesmo comportamento do gTTS.save: abre o arquivo e delega para write_to_fp
+        with open(str(savefile), "wb") as f:
+            self.write_to_fp(f)
+
+
+def synthesize_with_tempfile(tts_class, text):
+    tts_obj = tts_class(text=text, lang="pt-br", slow=False)
+    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as temp_audio_file:
+        temp_audio_path = temp_audio_file.name
+    tts_obj.save(temp_audio_path)
+    with open(temp_audio_path, "rb") as audio_file:
+        audio_bytes = audio_file.read()
+    os.unlink(temp_audio_path)
+    return audio_bytes
+
+
+def synthesize_in_memory(tts_class, text):
+    tts_obj = tts_class(text=text, lang="pt-br", slow=False)
+    buffer = io.BytesIO()
+    tts_obj.write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+def measure(label, fn, tts_class, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        audio_bytes = fn(tts_class, SAMPLE_TEXT)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+    print(f"   {label:<22} média {statistics.mean(timings) * 1e6:9.1f}µs | "
+          f"p95 {p95 * 1e6:9.1f}µs | {len(audio_bytes)} bytes")
+    return statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arquivo temporário x memória na síntese de voz")
+    parser.add_argument("--iterations", type=int, default=500, help="Sínteses por caminho")
+    parser.add_argument("--gtts", action="store_true", help="Usar o gTTS real (requer internet)")
+    args = parser.parse_args()
+
+    if args.gtts:
+        from gtts import gTTS
+        tts_class = gTTS
+    else:
+        tts_class = FakeGTTS
+
+    print(f"🔊 Sintetizador: {tts_class.__name__} | iterações: {args.iterations}")
+    tempfile_time = measure("arquivo temporário", synthesize_with_tempfile, tts_class, args.iterations)
+    memory_time = measure("BytesIO (em memória)", synthesize_in_memory, tts_class, args.iterations)
+    print(f"   Ganho: {tempfile_time / memory_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: motores do Whisper (openai-whisper x faster-whisper quantizado).
+
+Cada motor roda em um subprocesso próprio, para que a memória medida seja
+apenas a dele. Para cada um são reportados o tempo de carga, o fator de
+tempo real (RTF = tempo de inferência / duração do áudio; abaixo de 1 é
+mais rápido que o tempo real) e o pico de memória residente (RSS).
+
+Motores são informados como `backend[:compute_type]`, por exemplo
+`openai-whisper`, `faster-whisper:int8` ou `faster-whisper:float32`.
+
+Uso (a partir da pasta backend/):
+    python benchmarks/bench_whisper_backends.py --audio amostra.wav --model small
+    python benchmarks/bench_whisper_backends.py --backends faster-whisper:int8 faster-whisper:int8_float32 --device cpu
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.whisper_backends import SAMPLE_RATE, create_whisper_backend
+
+
+def load_audio(path):
+    """Decodifica o arquivo em float32 mono 16 kHz (mesmo formato do servidor)"""
+    output = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", path,
+         "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+        check=True, capture_output=True
+    ).stdout
+    return np.frombuffer(output, dtype=np.float32)
+
+
+def peak_rss_mb():
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_worker(args):
+    """Executa um único motor e imprime o resultado em JSON (modo subprocesso)"""
+    backend, _, compute_type = args.worker.partition(":")
+    if args.audio:
+        audio = load_audio(args.audio)
+    else:
+        audio = np.random.default_rng(0).normal(0, 0.01, 10 * SAMPLE_RATE).astype(np.float32)
+    baseline_mb = peak_rss_mb()
+
+    start = time.perf_counter()
+    engine = create_whisper_backend(backend, args.model, device=args.device, compute_type=compute_type or "int8")
+    load_time = time.perf_counter() - start
+
+    # Primeira execução fora da medição (aquecimento)
+    text = engine.transcribe(audio)
+
+    timings = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        engine.transcribe(audio)
+        timings.append(time.perf_counter() - start)
+
+    duration = len(audio) / SAMPLE_RATE
+    print(json.dumps({
+        "engine": args.worker,
+        "audio_s": round(duration, 2),
+        "load_s": round(load_time, 2),
+        "rtf": round(statistics.median(timings) / duration, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "model_rss_mb": round(peak_rss_mb() - baseline_mb, 1),
+        "text": text.strip()[:60],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RTF e memória dos motores do Whisper")
+    parser.add_argument("--audio", default=None, help="Arquivo de áudio (padrão: 10 s de ruído)")
+    parser.add_argument("--model", default="base", help="Modelo Whisper")
+    parser.add_argument("--backends", nargs="+", default=["openai-whisper", "faster-whisper:int8"],
+                        help="Motores no formato backend[:compute_type]")
+    parser.add_argument("--device", default="cpu", help="cpu, cuda ou auto")
+    parser.add_argument("--iterations", type=int, default=3, help="Transcrições medidas por motor")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    print(f"🎤 Modelo {args.model} | dispositivo {args.device} | {args.iterations} iterações")
+    for spec in args.backends:
+        command = [sys.executable, os.path.abspath(__file__), "--worker", spec,
+                   "--model", args.model, "--device", args.device, "--iterations", str(args.iterations)]
+        if args.audio:
+            command += ["--audio", args.audio]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"   {spec:<26} falhou: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode}")
+            continue
+        row = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"   {spec:<26} carga {row['load_s']:6.2f}s | RTF {row['rtf']:6.3f} | "
+              f"pico RSS {row['peak_rss_mb']:7.1f} MB (modelo {row['model_rss_mb']:7.1f} MB) | {row['text']!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: transcrição por requisição x micro-lotes do Whisper.
+
+Carrega o modelo uma vez e dispara N transcrições simultâneas do mesmo
+áudio nos dois modos do TranscriptionService (janela de lote desativada e
+ativada), reportando vazão e latências p50/p95.
+
+Uso (a partir da pasta backend/):
+    python benchmarks/bench_whisper_batching.py --audio amostra.wav -n 8 --model small
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.transcription_service import TranscriptionService, SAMPLE_RATE
+
+
+def load_audio(path):
+    """Decodifica o arquivo em float32 mono 16 kHz (mesmo formato do servidor)"""
+    output = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", path,
+         "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+        check=True, capture_output=True
+    ).stdout
+    return np.frombuffer(output, dtype=np.float32)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, int(round(len(ordered) * fraction)) - 1)]
+
+
+async def run_mode(service, audio, concurrency, rounds):
+    latencies = []
+
+    async def one():
+        start = time.perf_counter()
+        await service.transcribe_samples(audio)
+        latencies.append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(one() for _ in range(concurrency)))
+    wall_time = time.perf_counter() - wall_start
+    return wall_time, latencies
+
+
+def report(label, wall_time, latencies):
+    print(f"   {label:<14} vazão {len(latencies) / wall_time:6.2f} req/s | "
+          f"p50 {statistics.median(latencies):6.2f}s | p95 {percentile(latencies, 0.95):6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de micro-lotes do Whisper")
+    parser.add_argument("--audio", default=None, help="Arquivo de áudio de até 30 s (padrão: 5 s de ruído)")
+    parser.add_argument("--model", default="base", help="Modelo Whisper")
+    parser.add_argument("-n", "--concurrency", type=int, default=8, help="Requisições simultâneas")
+    parser.add_argument("--rounds", type=int, default=3, help="Rodadas de requisições simultâneas")
+    parser.add_argument("--window-ms", type=int, default=50, help="Janela de lote")
+    parser.add_argument("--max-batch", type=int, default=8, help="Tamanho máximo do lote")
+    args = parser.parse_args()
+
+    if args.audio:
+        audio = load_audio(args.audio)
+    else:
+        audio = np.random.default_rng(0).normal(0, 0.01, 5 * SAMPLE_RATE).astype(np.float32)
+
+    service = TranscriptionService(
+        model_name=args.model,
+        workers=1,
+        max_queue=args.concurrency,
+        batch_window_ms=args.window_ms,
+        max_batch_size=args.max_batch
+    )
+
+    print(f"🎤 Modelo {args.model} | áudio {len(audio) / SAMPLE_RATE:.1f}s | "
+          f"{args.concurrency} simultâneas x {args.rounds} rodadas")
+
+    # Mesmo serviço (mesmo modelo carregado), alternando apenas a janela de lote
+    saved_window = service.batch_window
+    service.batch_window = 0
+    report("por requisição", *asyncio.run(run_mode(service, audio, args.concurrency, args.rounds)))
+
+    service.batch_window = saved_window
+    report("micro-lotes", *asyncio.run(run_mode(service, audio, args.concurrency, args.rounds)))
+    print(f"   Lotes: {service.get_stats()['batches']} | tamanho médio: {service.get_stats()['avg_batch_size']}")
+
+
+if __name__ == "__main__":
+    main()
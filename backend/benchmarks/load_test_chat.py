@@ -0,0 +1,96 @@
+"""
+Teste de carga para a rota /chat/.
+
+Dispara N requisições simultâneas (cada uma com seu próprio session_id) e,
+em paralelo, consulta /health periodicamente. Se o agente estiver rodando
+fora do event loop, as requisições se sobrepõem (tempo total bem menor que
+a soma das latências) e o /health continua respondendo rápido durante a carga.
+
+Uso:
+    python benchmarks/load_test_chat.py --url http://localhost:8000 -n 4
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+async def send_chat(client, url, message, index):
+    session_id = f"load-test-{uuid.uuid4()}"
+    start = time.perf_counter()
+    response = await client.post(f"{url}/chat/", json={"message": message, "session_id": session_id})
+    end = time.perf_counter()
+    response.raise_for_status()
+    return {"index": index, "start": start, "end": end, "latency": end - start}
+
+
+async def poll_health(client, url, stop_event, interval):
+    latencies = []
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get(f"{url}/health")
+            latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            latencies.append(float("inf"))
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def run(url, concurrency, message, timeout, health_interval):
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        stop_event = asyncio.Event()
+        health_task = asyncio.create_task(poll_health(client, url, stop_event, health_interval))
+
+        wall_start = time.perf_counter()
+        results = await asyncio.gather(*(send_chat(client, url, message, i) for i in range(concurrency)))
+        wall_time = time.perf_counter() - wall_start
+
+        stop_event.set()
+        health_latencies = await health_task
+
+    latencies = [r["latency"] for r in results]
+    serial_time = sum(latencies)
+
+    # Maior número de requisições em andamento ao mesmo tempo
+    events = sorted([(r["start"], 1) for r in results] + [(r["end"], -1) for r in results])
+    in_flight = max_in_flight = 0
+    for _, delta in events:
+        in_flight += delta
+        max_in_flight = max(max_in_flight, in_flight)
+
+    print(f"📊 Requisições simultâneas: {concurrency}")
+    print(f"   Tempo total (parede):      {wall_time:.2f}s")
+    print(f"   Soma das latências:        {serial_time:.2f}s")
+    print(f"   Latência média / máxima:   {statistics.mean(latencies):.2f}s / {max(latencies):.2f}s")
+    print(f"   Fator de sobreposição:     {serial_time / wall_time:.2f}x")
+    print(f"   Máximo em andamento:       {max_in_flight}")
+    if health_latencies:
+        print(f"   /health durante a carga:   {len(health_latencies)} chamadas, "
+              f"máx {max(health_latencies) * 1000:.0f}ms")
+
+    return serial_time / wall_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da rota /chat/")
+    parser.add_argument("--url", default="http://localhost:8000", help="URL base do servidor")
+    parser.add_argument("-n", "--concurrency", type=int, default=4, help="Número de requisições simultâneas")
+    parser.add_argument("--message", default="Quais departamentos existem no CCEN?", help="Mensagem enviada")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Timeout por requisição (s)")
+    parser.add_argument("--health-interval", type=float, default=0.5, help="Intervalo entre chamadas a /health (s)")
+    parser.add_argument("--min-overlap", type=float, default=None,
+                        help="Falha (código 1) se o fator de sobreposição ficar abaixo deste valor")
+    args = parser.parse_args()
+
+    overlap = asyncio.run(run(args.url, args.concurrency, args.message, args.timeout, args.health_interval))
+    if args.min_overlap is not None and overlap < args.min_overlap:
+        print(f"❌ Sobreposição {overlap:.2f}x abaixo do mínimo {args.min_overlap:.2f}x")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
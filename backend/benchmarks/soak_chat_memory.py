@@ -0,0 +1,155 @@
+"""
+Teste de longa duração: memória das conversas do agente com e sem limite.
+
+Simula muitos visitantes conversando com o agente ReAct (modelo falso que
+sempre chama uma ferramenta de busca com contexto grande antes de
+responder) e acompanha, ao longo da execução, a memória residente (RSS),
+o tamanho serializado guardado pelo checkpointer e o tamanho do prompt
+enviado ao modelo no último turno.
+
+Modos (cada um em um subprocesso próprio):
+    memorysaver - MemorySaver sem limite e histórico completo (comportamento original)
+    bounded     - BoundedMemorySaver + janela de histórico (CHAT_HISTORY_MAX_TOKENS)
+
+Com limite, RSS, bytes guardados e prompt devem ficar estáveis depois que
+o número de sessões passa de --max-sessions.
+
+Uso (a partir da pasta backend/):
+    python benchmarks/soak_chat_memory.py --sessions 2000 --turns 6
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.prebuilt import create_react_agent
+from services.conversation_memory import BoundedMemorySaver, make_history_trimmer
+
+# Contexto devolvido pela ferramenta, do tamanho de uma busca real (10 trechos)
+RETRIEVED_CONTEXT = "\n".join(
+    f"Professor: Exemplo {index}\nDepartamento: DMAT\nInformação: " + "pesquisa em probabilidade e estatística " * 12
+    for index in range(10)
+)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Modelo falso: chama a ferramenta após cada pergunta e responde após o resultado"""
+
+    last_prompt_messages: int = 0
+    last_prompt_tokens: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.last_prompt_messages = len(messages)
+        self.last_prompt_tokens = count_tokens_approximately(messages)
+        if isinstance(messages[-1], ToolMessage):
+            message = AIMessage(content="Resposta baseada nos trechos encontrados. " * 5)
+        else:
+            message = AIMessage(content="", tool_calls=[{
+                "name": "search", "args": {"query": messages[-1].content}, "id": f"call-{time.perf_counter_ns()}"
+            }])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@tool
+def search(query: str) -> str:
+    """Busca semântica falsa"""
+    return RETRIEVED_CONTEXT
+
+
+def rss_mb():
+    """Memória residente atual (Linux)"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def saved_bytes(memory):
+    """Tamanho serializado de tudo que o checkpointer guarda"""
+    size = sum(len(checkpoint[1]) + len(metadata[1])
+               for namespaces in memory.storage.values()
+               for saved in namespaces.values()
+               for checkpoint, metadata, _ in saved.values())
+    size += sum(len(blob[1]) for blob in memory.blobs.values())
+    size += sum(len(value[1]) for writes in memory.writes.values() for _, _, value, _ in writes.values())
+    return size
+
+
+def run_worker(args):
+    """Executa um modo e imprime uma linha JSON por amostra (modo subprocesso)"""
+    model = ScriptedChatModel()
+    if args.worker == "bounded":
+        memory = BoundedMemorySaver(max_sessions=args.max_sessions, idle_ttl_seconds=3600)
+        pre_model_hook = make_history_trimmer(args.history_tokens)
+    else:
+        memory = MemorySaver()
+        pre_model_hook = None
+    agent = create_react_agent(model, [search], checkpointer=memory, prompt="Assistente do CCEN.",
+                               pre_model_hook=pre_model_hook)
+
+    sample_every = max(1, args.sessions // args.samples)
+    start = time.perf_counter()
+    for session in range(1, args.sessions + 1):
+        config = {"configurable": {"thread_id": f"visitante-{session}"}}
+        for turn in range(args.turns):
+            agent.invoke({"messages": [HumanMessage(content=f"Pergunta {turn} sobre estatística")]}, config)
+        if session % sample_every == 0:
+            print(json.dumps({
+                "sessions": session,
+                "rss_mb": round(rss_mb(), 1),
+                "saved_mb": round(saved_bytes(memory) / (1024 * 1024), 2),
+                "prompt_messages": model.last_prompt_messages,
+                "prompt_tokens": model.last_prompt_tokens,
+                "elapsed_s": round(time.perf_counter() - start, 1),
+            }), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória das conversas do agente ao longo do tempo")
+    parser.add_argument("--sessions", type=int, default=1000, help="Visitantes simulados")
+    parser.add_argument("--turns", type=int, default=6, help="Perguntas por visitante")
+    parser.add_argument("--max-sessions", type=int, default=200, help="Limite de sessões do modo bounded")
+    parser.add_argument("--history-tokens", type=int, default=2000, help="Janela de histórico do modo bounded")
+    parser.add_argument("--samples", type=int, default=5, help="Amostras ao longo da execução")
+    parser.add_argument("--modes", nargs="+", default=["memorysaver", "bounded"], help="Modos a executar")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    print(f"🧠 {args.sessions} visitantes x {args.turns} perguntas")
+    for mode in args.modes:
+        print(f"   {mode}")
+        command = [sys.executable, os.path.abspath(__file__), "--worker", mode,
+                   "--sessions", str(args.sessions), "--turns", str(args.turns),
+                   "--max-sessions", str(args.max_sessions), "--history-tokens", str(args.history_tokens),
+                   "--samples", str(args.samples)]
+        with subprocess.Popen(command, stdout=subprocess.PIPE, text=True) as process:
+            for line in process.stdout:
+                row = json.loads(line)
+                print(f"      {row['sessions']:>6} sessões | RSS {row['rss_mb']:7.1f} MB | "
+                      f"guardado {row['saved_mb']:7.2f} MB | prompt {row['prompt_messages']:>3} mensagens "
+                      f"(~{row['prompt_tokens']} tokens) | {row['elapsed_s']:6.1f}s")
+        if process.returncode != 0:
+            print(f"      falhou (código {process.returncode})")
+
+
+if __name__ == "__main__":
+    main()
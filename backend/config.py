@@ -9,17 +9,75 @@ SERVER_HOST = os.getenv("SERVER_HOST")
 SERVER_PORT = os.getenv("SERVER_PORT")
 
 # Configurações do Whisper
-WHISPER_MODEL = "medium"  # ou "tiny", "small", "medium", "large"
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "medium")  # ou "tiny", "small", "medium", "large"
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "openai-whisper")  # ou "faster-whisper" (CTranslate2)
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "auto")              # "cpu", "cuda" ou "auto"
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")  # Quantização do faster-whisper
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", "1"))      # Threads dedicadas à inferência (>1 só no faster-whisper)
+WHISPER_MAX_QUEUE = int(os.getenv("WHISPER_MAX_QUEUE", "4"))  # Transcrições em espera antes de responder 503 (ampliada até workers + fila >= WHISPER_MAX_BATCH_SIZE)
+WHISPER_BATCH_WINDOW_MS = int(os.getenv("WHISPER_BATCH_WINDOW_MS", "50"))  # Janela de micro-lote (0 desativa)
+WHISPER_MAX_BATCH_SIZE = int(os.getenv("WHISPER_MAX_BATCH_SIZE", "8"))     # Máximo de áudios por lote
+
+# Configurações da transcrição em fluxo (WebSocket)
+VAD_AGGRESSIVENESS = 2          # 0 (menos) a 3 (mais agressivo), usado pelo webrtcvad
+VAD_MIN_SILENCE_MS = 600        # Silêncio que encerra um segmento de fala
+STREAM_PARTIAL_INTERVAL_S = 1.0 # Fala nova mínima entre transcrições parciais
+
+# Configurações do TTS
+TTS_ENGINE = os.getenv("TTS_ENGINE", "gtts")  # "gtts" (online), "piper" (offline, local) ou "stub" (testes)
+TTS_LANGUAGE = "pt-br"
+TTS_TIMEOUT_SECONDS = float(os.getenv("TTS_TIMEOUT_SECONDS", "30"))  # Tempo máximo por síntese
+PIPER_MODEL_PATH = os.getenv("PIPER_MODEL_PATH", "models/pt_BR-faber-medium.onnx")
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # Limite do cache de áudio em memória
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR") or None  # Camada em disco do cache de áudio (None desativa)
+AUDIO_CACHE_DISK_MAX_BYTES = int(os.getenv("AUDIO_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))  # Limite da camada em disco
+
+# Configurações do TTS em fluxo (síntese frase a frase)
+TTS_PIPELINE_MIN_CHARS = 40     # Tamanho mínimo de cada trecho sintetizado
+TTS_PIPELINE_MAX_PARALLEL = 2   # Sínteses simultâneas por resposta
 
 # Configurações do Chat
 USE_LOCAL_MODEL = True  # Alternar entre modelo local e OpenAI
 MODEL_NAME = os.getenv("MODEL_NAME")
+CHAT_MAX_CONCURRENCY = int(os.getenv("CHAT_MAX_CONCURRENCY", "4"))  # Execuções simultâneas do agente
 EMBED_MODEL = "all-minilm:l6-v2"
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "ollama")  # Embeddings de consulta: "ollama" (HTTP) ou "local" (sentence-transformers)
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "1024"))      # Vetores de consulta em cache (0 desativa)
+QUERY_EMBED_CACHE_TTL_S = float(os.getenv("QUERY_EMBED_CACHE_TTL_S", "3600"))  # Validade de cada vetor de consulta
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))             # Respostas em cache entre sessões (0 desativa)
+ANSWER_CACHE_TTL_S = float(os.getenv("ANSWER_CACHE_TTL_S", "3600"))        # Validade de cada resposta em cache
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))  # Similaridade mínima para reaproveitar
+CHAT_MEMORY_MAX_SESSIONS = int(os.getenv("CHAT_MEMORY_MAX_SESSIONS", "500"))          # Conversas mantidas em memória
+CHAT_MEMORY_MAX_BYTES = int(os.getenv("CHAT_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))  # Limite total da memória das conversas
+CHAT_MEMORY_IDLE_TTL_S = float(os.getenv("CHAT_MEMORY_IDLE_TTL_S", "1800"))           # Conversa ociosa descartada após
+CHAT_HISTORY_MAX_TOKENS = int(os.getenv("CHAT_HISTORY_MAX_TOKENS", "2000"))           # Histórico por turno (0 = completo)
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")  # Conversas e respostas pendentes: "memory" ou "sqlite" (persistente, multi-worker)
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "sessions.sqlite3")  # Arquivo do SESSION_STORE=sqlite
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))  # Limite das respostas pendentes
+RESPONSE_CACHE_MAX_PER_SESSION = int(os.getenv("RESPONSE_CACHE_MAX_PER_SESSION", "20"))      # Respostas pendentes por sessão
+# Respostas recuperadas em outro worker (ou após um restart) apontam para /audio/{id}:
+# com SESSION_STORE=sqlite o cache de áudio precisa da camada em disco compartilhada,
+# limitada por AUDIO_CACHE_DISK_MAX_BYTES
+if SESSION_STORE == "sqlite" and AUDIO_CACHE_DIR is None:
+    AUDIO_CACHE_DIR = "audio_cache"
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))  # Textos por requisição de embeddings na ingestão
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 USE_LOCAL_COLLECTION = True
 COLLECTION_NAME = "ccen-docentes"
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 DOCS = "ccen-docentes"
+ARTICLES_DIR = "articles"
+
+# Indexação incremental (index_documents.py)
+INDEX_MANIFEST_PATH = os.getenv("INDEX_MANIFEST_PATH", "index_manifest.json")  # Arquivos já indexados
+INGEST_PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", "2"))    # Threads lendo PDFs
+INGEST_PARSE_PROCESSES = int(os.getenv("INGEST_PARSE_PROCESSES", "0"))  # Processos para a leitura (0 desativa)
+INGEST_SPLIT_WORKERS = int(os.getenv("INGEST_SPLIT_WORKERS", "2"))    # Threads da divisão semântica
+INGEST_EMBED_WORKERS = int(os.getenv("INGEST_EMBED_WORKERS", "2"))    # Threads de vetorização
+INGEST_UPSERT_WORKERS = int(os.getenv("INGEST_UPSERT_WORKERS", "1"))  # Threads de escrita no Qdrant
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "4"))          # Arquivos em espera entre estágios
+INGEST_UPSERT_BATCH_SIZE = int(os.getenv("INGEST_UPSERT_BATCH_SIZE", "64"))  # Pontos por upsert no Qdrant
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "embedding_cache.sqlite3") or None  # Cache de embeddings ("" desativa)
 
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL")
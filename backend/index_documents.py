@@ -0,0 +1,95 @@
+"""
+Indexador incremental da base de conhecimento (currículos e artigos em PDF).
+
+Roda fora do servidor: processa apenas PDFs novos ou alterados desde a
+última execução (manifesto local com caminho, tamanho, data de modificação
+e hash do conteúdo) e remove do Qdrant os vetores de arquivos apagados.
+
+Uso (a partir da pasta backend/):
+    python index_documents.py                 # uma passada
+    python index_documents.py --dry-run       # apenas mostra o que mudou
+    python index_documents.py --full          # reindexa tudo
+    python index_documents.py --interval 3600 # repete a cada hora
+
+Para agendar com cron (a cada noite, às 3h):
+    0 3 * * * cd /app && python index_documents.py >> logs/indexer.log 2>&1
+"""
+import argparse
+import sys
+import time
+from qdrant_client import QdrantClient
+from config import (
+    USE_LOCAL_COLLECTION,
+    COLLECTION_NAME,
+    QDRANT_URL,
+    QDRANT_API_KEY,
+    EMBED_MODEL,
+    EMBED_BATCH_SIZE,
+    DOCS,
+    ARTICLES_DIR,
+    INDEX_MANIFEST_PATH,
+    INGEST_PARSE_WORKERS,
+    INGEST_PARSE_PROCESSES,
+    INGEST_SPLIT_WORKERS,
+    INGEST_EMBED_WORKERS,
+    INGEST_UPSERT_WORKERS,
+    INGEST_QUEUE_SIZE,
+    EMBED_CACHE_PATH,
+    INGEST_UPSERT_BATCH_SIZE
+)
+from services.embeddings import TIPO_CURRICULO, TIPO_ARTIGO
+from services.indexer import DocumentIndexer
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+
+def create_qdrant_client():
+    if USE_LOCAL_COLLECTION:
+        return QdrantClient(url=QDRANT_URL or "http://localhost:6333")
+    return QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexação incremental dos PDFs no Qdrant")
+    parser.add_argument("--dry-run", action="store_true", help="Mostra o que seria indexado/removido, sem alterar nada")
+    parser.add_argument("--full", action="store_true", help="Reindexa todos os arquivos, ignorando o manifesto")
+    parser.add_argument("--interval", type=int, default=0, help="Repete a cada N segundos (0 = uma passada)")
+    parser.add_argument("--manifest", default=INDEX_MANIFEST_PATH, help="Caminho do manifesto")
+    args = parser.parse_args()
+
+    indexer = DocumentIndexer(
+        qdrant_client=create_qdrant_client(),
+        collection_name=COLLECTION_NAME,
+        embed_model=EMBED_MODEL,
+        sources=[(DOCS, TIPO_CURRICULO), (ARTICLES_DIR, TIPO_ARTIGO)],
+        manifest_path=args.manifest,
+        embed_batch_size=EMBED_BATCH_SIZE,
+        stage_workers={
+            "parse": INGEST_PARSE_WORKERS,
+            "split": INGEST_SPLIT_WORKERS,
+            "embed": INGEST_EMBED_WORKERS,
+            "upsert": INGEST_UPSERT_WORKERS,
+        },
+        queue_size=INGEST_QUEUE_SIZE,
+        parse_processes=INGEST_PARSE_PROCESSES,
+        embed_cache_path=EMBED_CACHE_PATH,
+        upsert_batch_size=INGEST_UPSERT_BATCH_SIZE
+    )
+
+    while True:
+        summary = indexer.run(dry_run=args.dry_run, full=args.full)
+        if not args.interval:
+            break
+        # --full vale só para a primeira passada
+        args.full = False
+        logger.info(f"Próxima indexação em {args.interval}s")
+        time.sleep(args.interval)
+
+    # Código de saída diferente de zero se algum arquivo falhou (útil em jobs agendados)
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
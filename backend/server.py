@@ -1,91 +1,280 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
 from config import (
     SERVER_HOST, 
     SERVER_PORT, 
     WHISPER_MODEL, 
+    WHISPER_BACKEND,
+    WHISPER_DEVICE,
+    WHISPER_COMPUTE_TYPE,
+    WHISPER_WORKERS,
+    WHISPER_MAX_QUEUE,
+    WHISPER_BATCH_WINDOW_MS,
+    WHISPER_MAX_BATCH_SIZE,
+    VAD_AGGRESSIVENESS,
+    VAD_MIN_SILENCE_MS,
+    STREAM_PARTIAL_INTERVAL_S,
     OPENAI_API_KEY,
     USE_LOCAL_MODEL,
     EMBED_MODEL,
+    EMBED_BACKEND,
     MODEL_NAME,
+    CHAT_MAX_CONCURRENCY,
+    QUERY_EMBED_CACHE_SIZE,
+    QUERY_EMBED_CACHE_TTL_S,
+    ANSWER_CACHE_SIZE,
+    ANSWER_CACHE_TTL_S,
+    ANSWER_CACHE_THRESHOLD,
+    CHAT_MEMORY_MAX_SESSIONS,
+    CHAT_MEMORY_MAX_BYTES,
+    CHAT_MEMORY_IDLE_TTL_S,
+    CHAT_HISTORY_MAX_TOKENS,
+    SESSION_STORE,
+    SESSION_STORE_PATH,
+    RESPONSE_CACHE_MAX_BYTES,
+    RESPONSE_CACHE_MAX_PER_SESSION,
+    TTS_ENGINE,
+    TTS_LANGUAGE,
+    TTS_TIMEOUT_SECONDS,
+    PIPER_MODEL_PATH,
+    AUDIO_CACHE_MAX_BYTES,
+    AUDIO_CACHE_DIR,
+    AUDIO_CACHE_DISK_MAX_BYTES,
+    TTS_PIPELINE_MIN_CHARS,
+    TTS_PIPELINE_MAX_PARALLEL,
     USE_LOCAL_COLLECTION,
     COLLECTION_NAME,
     QDRANT_URL,
-    QDRANT_API_KEY,
-    DOCS
+    QDRANT_API_KEY
 )
 import os
-import base64
+import asyncio
+import json
 import io
-import tempfile
 import re
 import hashlib
-import time
-from collections import defaultdict
-from services.transcription_service import TranscriptionService
+from contextlib import asynccontextmanager
+from services.transcription_service import TranscriptionService, TranscriptionQueueFullError
+from services.streaming_transcription import StreamingTranscriptionSession
 from services.chat_service import ChatService
+from services.tts_service import TTSService
+from services.audio_cache import AudioCache
+from services.query_embedding_cache import QueryEmbeddingCache
+from services.answer_cache import SemanticAnswerCache
+from services.conversation_memory import BoundedMemorySaver
+from services.response_store import create_response_store
+from services.startup import ServiceRegistry, ServiceNotReadyError, startup_phase
 from utils.logger import setup_logger
-
-from gtts import gTTS
+from utils.singleflight import SingleFlight
+from utils.text_stream import ThinkTagFilter, SentenceSplitter
 
 # Configurar logger
 logger = setup_logger(__name__)
 
-# Cache de respostas para recuperação em caso de queda de conexão
-# Estrutura: {session_id: {message_hash: {response_data, timestamp}}}
-response_cache = defaultdict(dict)
+# Respostas recentes por sessão, para recuperação em caso de queda de conexão
+# (em memória ou em SQLite compartilhado entre workers, ver SESSION_STORE)
 CACHE_EXPIRY_SECONDS = 300  # 5 minutos
+response_store = create_response_store(
+    SESSION_STORE,
+    SESSION_STORE_PATH,
+    ttl_seconds=CACHE_EXPIRY_SECONDS,
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+    max_entries_per_session=RESPONSE_CACHE_MAX_PER_SESSION
+)
 
-def generate_message_hash(message: str, use_tts: bool = False) -> str:
+def generate_message_hash(message: str, use_tts: bool = False, streamed: bool = False) -> str:
     """Gera hash único para a mensagem"""
     content = f"{message}_{use_tts}"
+    # Respostas em fluxo têm formato próprio no cache
+    if streamed:
+        content += "_stream"
     return hashlib.md5(content.encode()).hexdigest()
 
-def cache_response(session_id: str, message_hash: str, response_data: dict):
+# As operações do armazenamento rodam em threads: no backend SQLite elas fazem I/O
+# (e podem esperar o lock de escrita de outro worker) e não devem bloquear o event loop
+async def cache_response(session_id: str, message_hash: str, response_data: dict):
     """Armazena resposta no cache"""
-    response_cache[session_id][message_hash] = {
-        'data': response_data,
-        'timestamp': time.time()
-    }
+    await asyncio.to_thread(response_store.put, session_id, message_hash, response_data)
     logger.info(f"Resposta cacheada para session {session_id}, hash {message_hash}")
 
-def get_cached_response(session_id: str, message_hash: str) -> dict:
+async def get_cached_response(session_id: str, message_hash: str) -> dict:
     """Recupera resposta do cache se ainda válida"""
-    if session_id in response_cache and message_hash in response_cache[session_id]:
-        cached = response_cache[session_id][message_hash]
-        if time.time() - cached['timestamp'] < CACHE_EXPIRY_SECONDS:
-            logger.info(f"Resposta recuperada do cache para session {session_id}, hash {message_hash}")
-            return cached['data']
+    cached = await asyncio.to_thread(response_store.get, session_id, message_hash)
+    if cached is not None:
+        logger.info(f"Resposta recuperada do cache para session {session_id}, hash {message_hash}")
+    return cached
+
+async def cleanup_expired_cache():
+    """Remove entradas expiradas do cache (incremental: só as que já venceram)"""
+    await asyncio.to_thread(response_store.cleanup)
+
+# Gerações em andamento por "session_id:message_hash": um reenvio da mesma mensagem
+# (ex.: reconexão do frontend) aguarda a geração original em vez de iniciar outra,
+# já que a resposta só entra no cache quando a primeira termina
+chat_flights = SingleFlight()
+
+def flight_key(session_id: str, message_hash: str) -> str:
+    return f"{session_id}:{message_hash}"
+
+# Tarefas em segundo plano (referências fortes para não serem coletadas antes de terminar)
+background_tasks = set()
+
+def run_in_background(coro):
+    """Agenda uma corrotina que continua rodando mesmo se o cliente desconectar"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+# Cabeçalhos para respostas Server-Sent Events (evitam buffering em proxies)
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def format_sse_event(event: str, data: dict) -> str:
+    """Formata um evento no padrão Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def drain_events(events: asyncio.Queue):
+    """Repassa os eventos da fila ao cliente até o marcador de fim (None)"""
+    while True:
+        event = await events.get()
+        if event is None:
+            break
+        yield event
+
+# Fábricas dos serviços: executadas em paralelo, em threads, na inicialização do servidor
+def create_transcription_service():
+    return TranscriptionService(
+        model_name=WHISPER_MODEL,
+        backend=WHISPER_BACKEND,
+        device=WHISPER_DEVICE,
+        compute_type=WHISPER_COMPUTE_TYPE,
+        workers=WHISPER_WORKERS,
+        max_queue=WHISPER_MAX_QUEUE,
+        batch_window_ms=WHISPER_BATCH_WINDOW_MS,
+        max_batch_size=WHISPER_MAX_BATCH_SIZE
+    )
+
+def create_tts_service():
+    # Configurar o serviço de síntese de voz (motor definido em config.TTS_ENGINE)
+    tts_options = {"model_path": PIPER_MODEL_PATH} if TTS_ENGINE == "piper" else {}
+    return TTSService(
+        engine=TTS_ENGINE,
+        language=TTS_LANGUAGE,
+        timeout=TTS_TIMEOUT_SECONDS,
+        cache=AudioCache(
+            max_bytes=AUDIO_CACHE_MAX_BYTES,
+            disk_dir=AUDIO_CACHE_DIR,
+            disk_max_bytes=AUDIO_CACHE_DISK_MAX_BYTES
+        ),
+        **tts_options
+    )
+
+def create_chat_service():
+    # Respostas reaproveitadas entre sessões para perguntas equivalentes
+    answer_cache = None
+    if ANSWER_CACHE_SIZE > 0:
+        answer_cache = SemanticAnswerCache(
+            max_entries=ANSWER_CACHE_SIZE,
+            ttl_seconds=ANSWER_CACHE_TTL_S,
+            threshold=ANSWER_CACHE_THRESHOLD
+        )
+
+    if SESSION_STORE == "sqlite":
+        # Conversas persistentes, compartilhadas entre workers
+        from services.sqlite_memory import PrunedSqliteSaver
+        memory = PrunedSqliteSaver(
+            SESSION_STORE_PATH,
+            max_sessions=CHAT_MEMORY_MAX_SESSIONS,
+            max_bytes=CHAT_MEMORY_MAX_BYTES,
+            idle_ttl_seconds=CHAT_MEMORY_IDLE_TTL_S
+        )
+    else:
+        # Memória das conversas limitada: sessões ociosas ou além dos limites são descartadas
+        memory = BoundedMemorySaver(
+            max_sessions=CHAT_MEMORY_MAX_SESSIONS,
+            max_bytes=CHAT_MEMORY_MAX_BYTES,
+            idle_ttl_seconds=CHAT_MEMORY_IDLE_TTL_S
+        )
+
+    # Inicializar o serviço de chat (inclui o aquecimento do agente)
+    with startup_phase("chat: modelo e agente"):
+        if USE_LOCAL_MODEL:
+            logger.info(f"Usando modelo local: {MODEL_NAME}")
+            chat_service = ChatService(
+                use_local_model=True,
+                model_name=MODEL_NAME,
+                max_concurrency=CHAT_MAX_CONCURRENCY,
+                answer_cache=answer_cache,
+                memory=memory,
+                history_max_tokens=CHAT_HISTORY_MAX_TOKENS,
+            )
         else:
-            # Remove entrada expirada
-            del response_cache[session_id][message_hash]
-            if not response_cache[session_id]:
-                del response_cache[session_id]
-    return None
-
-def cleanup_expired_cache():
-    """Remove entradas expiradas do cache"""
-    current_time = time.time()
-    sessions_to_remove = []
-    
-    for session_id, messages in response_cache.items():
-        messages_to_remove = []
-        for message_hash, cached in messages.items():
-            if current_time - cached['timestamp'] >= CACHE_EXPIRY_SECONDS:
-                messages_to_remove.append(message_hash)
-        
-        for message_hash in messages_to_remove:
-            del messages[message_hash]
-        
-        if not messages:
-            sessions_to_remove.append(session_id)
-    
-    for session_id in sessions_to_remove:
-        del response_cache[session_id]
+            logger.info(f"Usando modelo OpenAI: {MODEL_NAME}")
+            chat_service = ChatService(
+                use_local_model=False,
+                model_name=MODEL_NAME,
+                api_key=OPENAI_API_KEY,
+                max_concurrency=CHAT_MAX_CONCURRENCY,
+                answer_cache=answer_cache,
+                memory=memory,
+                history_max_tokens=CHAT_HISTORY_MAX_TOKENS,
+            )
+
+    # Vetores de consulta compartilhados entre as ferramentas, turnos e sessões
+    query_cache = None
+    if QUERY_EMBED_CACHE_SIZE > 0:
+        query_cache = QueryEmbeddingCache(max_entries=QUERY_EMBED_CACHE_SIZE, ttl_seconds=QUERY_EMBED_CACHE_TTL_S)
+
+    # Configurar a coleção apenas se necessário
+    with startup_phase("chat: coleção"):
+        if USE_LOCAL_COLLECTION:
+            chat_service.set_collection(
+                use_local_collection=True,
+                collection_name=COLLECTION_NAME,
+                embed_model=EMBED_MODEL,
+                embed_backend=EMBED_BACKEND,
+                qdrant_url=QDRANT_URL,
+                query_cache=query_cache
+            )
+        else:
+            chat_service.set_collection(
+                use_local_collection=False,
+                collection_name=COLLECTION_NAME,
+                embed_model=EMBED_MODEL,
+                embed_backend=EMBED_BACKEND,
+                qdrant_url=QDRANT_URL,
+                qdrant_api_key=QDRANT_API_KEY,
+                query_cache=query_cache
+            )
+    return chat_service
+
+services = ServiceRegistry()
+services.register("transcription", create_transcription_service)
+services.register("chat", create_chat_service)
+services.register("tts", create_tts_service)
+
+def require_service(name: str):
+    """Retorna o serviço pronto ou responde 503 enquanto ele ainda carrega"""
+    try:
+        return services.get(name)
+    except ServiceNotReadyError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Os modelos carregam em segundo plano: a porta abre imediatamente
+    services.start()
+    yield
+    await services.shutdown()
 
 # Criar aplicação FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Configurar CORS
 app.add_middleware(
@@ -96,45 +285,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Inicializar serviços
-transcription_service = TranscriptionService(model_name=WHISPER_MODEL)
-
-# Configurar gTTS (Google Text-to-Speech)
-logger.info("Configurando Google Text-to-Speech (gTTS) - Suporte nativo ao pt-br")
-
-# Inicializar o serviço de chat
-if USE_LOCAL_MODEL:
-    logger.info(f"Usando modelo local: {MODEL_NAME}")
-    chat_service = ChatService(
-        use_local_model=True,
-        model_name=MODEL_NAME,
-    )
-else:
-    logger.info(f"Usando modelo OpenAI: {MODEL_NAME}")
-    chat_service = ChatService(
-        use_local_model=False,
-        model_name=MODEL_NAME,
-        api_key=OPENAI_API_KEY
-    )
-
-# Configurar a coleção apenas se necessário
-if USE_LOCAL_COLLECTION:
-    chat_service.set_collection(
-        use_local_collection=True,
-        collection_name=COLLECTION_NAME,
-        embed_model=EMBED_MODEL,
-        qdrant_url=QDRANT_URL,
-        docs=DOCS
-    )
-else:
-    chat_service.set_collection(
-        use_local_collection=False,
-        collection_name=COLLECTION_NAME,
-        embed_model=EMBED_MODEL,
-        qdrant_url=QDRANT_URL,
-        qdrant_api_key=QDRANT_API_KEY
-    )
-
 # Função para limpar comandos de controle das mensagens do usuário
 def clean_user_message(message: str) -> str:
     """Remove comandos de controle como /think, /nothink, /no_think da mensagem do usuário"""
@@ -154,6 +304,17 @@ def clean_response_text(text: str) -> str:
     cleaned_text = cleaned_text.strip()
     return cleaned_text
 
+# Função para limpar texto que será sintetizado em voz
+def clean_text_for_tts(text: str) -> str:
+    """Remove tags <think>, asteriscos e espaços extras do texto a ser falado"""
+    # Remover tags <think>...</think> e todo o conteúdo entre elas
+    cleaned_text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL | re.IGNORECASE)
+    # Remover asteriscos
+    cleaned_text = re.sub(r'\*', '', cleaned_text)
+    # Limpar espaços extras
+    cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
+    return cleaned_text
+
 # Modelo para requisições de chat
 class ChatRequest(BaseModel):
     message: str
@@ -162,13 +323,83 @@ class ChatRequest(BaseModel):
 # Rota para transcrição de áudio
 @app.post("/transcribe/")
 async def transcribe_audio(audio: UploadFile = File(...)):
+    transcription_service = require_service("transcription")
     try:
         text = await transcription_service.transcribe_audio(audio)
         return {"text": text}
+    except TranscriptionQueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Erro na rota de transcrição: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Rota para transcrição incremental via WebSocket
+@app.websocket("/ws/transcribe")
+async def transcribe_stream(websocket: WebSocket, format: str = "webm"):
+    """
+    Recebe o áudio em pedaços binários enquanto é gravado e devolve o texto
+    incrementalmente. O cliente envia o texto "end" ao terminar de gravar.
+
+    Mensagens enviadas:
+        {"type": "partial", "segment": n, "text": ...}  Transcrição provisória do segmento em andamento
+        {"type": "final", "segment": n, "text": ...}    Segmento de fala concluído
+        {"type": "done", "text": ...}                   Texto completo, após "end"
+        {"type": "error", "segment": n, "detail": ...}  Falha ao transcrever um segmento (a sessão continua)
+        {"type": "error", "detail": ...}                Falha da sessão
+    """
+    await websocket.accept()
+    try:
+        transcription_service = services.get("transcription")
+    except ServiceNotReadyError as e:
+        # 1013: tente novamente mais tarde
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1013)
+        return
+
+    try:
+        session = StreamingTranscriptionSession(
+            transcription_service,
+            send=websocket.send_json,
+            input_format=format,
+            vad_aggressiveness=VAD_AGGRESSIVENESS,
+            min_silence_ms=VAD_MIN_SILENCE_MS,
+            partial_interval_s=STREAM_PARTIAL_INTERVAL_S
+        )
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1003)
+        return
+
+    await session.start()
+    logger.info(f"Sessão de transcrição em fluxo iniciada (formato: {format})")
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                await session.feed(message["bytes"])
+            elif message.get("text", "").strip().lower() == "end":
+                text = await session.finish()
+                logger.info(f"Transcrição em fluxo concluída: {text[:100]}")
+                await websocket.close()
+                break
+    except WebSocketDisconnect:
+        logger.info("Cliente desconectou da transcrição em fluxo")
+    except Exception as e:
+        logger.error(f"Erro na transcrição em fluxo: {str(e)}")
+        try:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        await session.close()
+
 # Rota para chat
 @app.post("/chat/")
 async def chat(request: ChatRequest):
@@ -182,30 +413,112 @@ async def chat(request: ChatRequest):
         message_hash = generate_message_hash(cleaned_message, False)
         
         # Verificar se já existe resposta cacheada
-        cached_response = get_cached_response(request.session_id, message_hash)
+        cached_response = await get_cached_response(request.session_id, message_hash)
         if cached_response:
             logger.info(f"Retornando resposta cacheada para: {cleaned_message[:50]}...")
             return cached_response
-        
-        # Processar nova mensagem
-        response = await chat_service.get_response(cleaned_message, request.session_id)
-        
-        # Limpar tags <think> da resposta antes de retornar ao frontend
-        cleaned_response = clean_response_text(response)
-        logger.info(f"Resposta limpa para frontend: {cleaned_response[:100]}...")
-        
+
+        # Só a geração depende do serviço: respostas cacheadas saem mesmo durante a inicialização
+        chat_service = require_service("chat")
+
+        async def generate():
+            # Processar nova mensagem
+            response = await chat_service.get_response(cleaned_message, request.session_id)
+
+            # Limpar tags <think> da resposta antes de retornar ao frontend
+            cleaned_response = clean_response_text(response)
+            logger.info(f"Resposta limpa para frontend: {cleaned_response[:100]}...")
+
+            response_data = {"response": cleaned_response}
+
+            # Cachear resposta para possível recuperação
+            await cache_response(request.session_id, message_hash, response_data)
+
+            # Limpar cache expirado periodicamente
+            await cleanup_expired_cache()
+
+            return response_data
+
+        # Mensagem idêntica já em geração na sessão: aguardar o mesmo resultado
+        return await chat_flights.do(flight_key(request.session_id, message_hash), generate)
+    except HTTPException:
+        # 503 de serviço ainda em inicialização
+        raise
+    except Exception as e:
+        logger.error(f"Erro na rota de chat: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Rota para chat em fluxo (Server-Sent Events)
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Versão em fluxo de /chat/: repassa os tokens do agente à medida que são gerados.
+
+    Eventos emitidos:
+        token: {"text": trecho visível da resposta}
+        done:  {"response": resposta completa limpa, "message_hash": hash}
+        error: {"detail": mensagem de erro}
+    """
+    cleaned_message = clean_user_message(request.message)
+    logger.info(f"Mensagem original (stream): {request.message}")
+    logger.info(f"Mensagem limpa (stream): {cleaned_message}")
+
+    message_hash = generate_message_hash(cleaned_message, False)
+
+    cached_response = await get_cached_response(request.session_id, message_hash)
+    if cached_response:
+        logger.info(f"Retornando resposta cacheada em fluxo para: {cleaned_message[:50]}...")
+        events = asyncio.Queue()
+        events.put_nowait(format_sse_event("done", {**cached_response, "message_hash": message_hash}))
+        events.put_nowait(None)
+        return StreamingResponse(drain_events(events), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    chat_service = require_service("chat")
+    events = asyncio.Queue()
+
+    async def produce():
+        think_filter = ThinkTagFilter()
+        visible_parts = []
+        async for token in chat_service.stream_response(cleaned_message, request.session_id):
+            visible = think_filter.feed(token)
+            if visible:
+                visible_parts.append(visible)
+                await events.put(format_sse_event("token", {"text": visible}))
+
+        visible = think_filter.flush()
+        if visible:
+            visible_parts.append(visible)
+            await events.put(format_sse_event("token", {"text": visible}))
+
+        cleaned_response = clean_response_text("".join(visible_parts))
+        logger.info(f"Resposta em fluxo concluída: {cleaned_response[:100]}...")
+
         response_data = {"response": cleaned_response}
-        
+
         # Cachear resposta para possível recuperação
-        cache_response(request.session_id, message_hash, response_data)
-        
+        await cache_response(request.session_id, message_hash, response_data)
+
         # Limpar cache expirado periodicamente
-        cleanup_expired_cache()
-        
+        await cleanup_expired_cache()
+
         return response_data
-    except Exception as e:
-        logger.error(f"Erro na rota de chat: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+
+    async def respond():
+        try:
+            # Mensagem idêntica já em geração na sessão: aguardar o mesmo resultado
+            # (como no cache, quem apenas aguardou recebe só o evento done)
+            response_data = await chat_flights.do(flight_key(request.session_id, message_hash), produce)
+            await events.put(format_sse_event("done", {**response_data, "message_hash": message_hash}))
+        except Exception as e:
+            logger.error(f"Erro na rota de chat em fluxo: {str(e)}")
+            await events.put(format_sse_event("error", {"detail": str(e)}))
+        finally:
+            await events.put(None)
+
+    # A geração roda em tarefa própria: se o cliente cair, a resposta ainda é concluída e cacheada
+    run_in_background(respond())
+
+    return StreamingResponse(drain_events(events), media_type="text/event-stream", headers=SSE_HEADERS)
     
 @app.post("/chat_with_tts/")
 async def chat_with_tts(request: ChatRequest):
@@ -219,71 +532,281 @@ async def chat_with_tts(request: ChatRequest):
         message_hash = generate_message_hash(cleaned_message, True)
         
         # Verificar se já existe resposta cacheada
-        cached_response = get_cached_response(request.session_id, message_hash)
+        cached_response = await get_cached_response(request.session_id, message_hash)
         if cached_response:
             logger.info(f"Retornando resposta TTS cacheada para: {cleaned_message[:50]}...")
             return cached_response
+
+        # Só a geração depende dos serviços: respostas cacheadas saem mesmo durante a inicialização
+        chat_service = require_service("chat")
+        tts_service = require_service("tts")
+
+        async def generate():
+            # 2. Obter a resposta de texto do chat service
+            text_response = await chat_service.get_response(cleaned_message, request.session_id)
+            logger.info(f"Resposta de texto gerada: {text_response[:100]}...")
+
+            # 3. Limpar texto de resposta para o frontend (remover tags <think>)
+            cleaned_response = clean_response_text(text_response)
+            logger.info(f"Resposta limpa para frontend: {cleaned_response[:100]}...")
+
+            # 4. Limpar texto para TTS (remover tags <think> e asteriscos)
+            cleaned_text_for_tts = clean_text_for_tts(text_response)
+            logger.info(f"Texto limpo para TTS: {cleaned_text_for_tts[:100]}...")
+
+            # 5. Gerar áudio com o motor de TTS configurado (fica no cache global de áudio)
+            logger.info(f"Gerando áudio com {tts_service.engine} ({tts_service.language})...")
+            # O áudio fica disponível enquanto a resposta puder ser recuperada
+            audio = await tts_service.synthesize_for_response(cleaned_text_for_tts, CACHE_EXPIRY_SECONDS)
+
+            logger.info(f"Áudio gerado com sucesso. Id: {audio['audio_id']}")
+
+            # 6. Criar a resposta JSON com texto limpo; o áudio é servido em /audio/{id}
+            response_data = {"text": cleaned_response, **audio}
+
+            # Cachear resposta para possível recuperação
+            await cache_response(request.session_id, message_hash, response_data)
+
+            # Limpar cache expirado periodicamente
+            await cleanup_expired_cache()
+
+            return response_data
+
+        # Mensagem idêntica já em geração na sessão: aguardar o mesmo resultado
+        response_data = await chat_flights.do(flight_key(request.session_id, message_hash), generate)
+
+        logger.info("Chat com TTS processado com sucesso")
+        return response_data
         
-        # 2. Obter a resposta de texto do chat service
-        text_response = await chat_service.get_response(cleaned_message, request.session_id)
-        logger.info(f"Resposta de texto gerada: {text_response[:100]}...")
-        
-        # 3. Limpar texto de resposta para o frontend (remover tags <think>)
-        cleaned_response = clean_response_text(text_response)
-        logger.info(f"Resposta limpa para frontend: {cleaned_response[:100]}...")
-        
-        # 4. Limpar texto para TTS (remover tags <think> e asteriscos)
-        cleaned_text_for_tts = re.sub(r'<think>.*?</think>', '', text_response, flags=re.DOTALL | re.IGNORECASE)
-        # Remover asteriscos
-        cleaned_text_for_tts = re.sub(r'\*', '', cleaned_text_for_tts)
-        # Limpar espaços extras
-        cleaned_text_for_tts = re.sub(r'\s+', ' ', cleaned_text_for_tts).strip()
-        logger.info(f"Texto limpo para TTS: {cleaned_text_for_tts[:100]}...")
-        
-        # 5. Gerar áudio usando gTTS
-        logger.info("Gerando áudio com gTTS (pt-br)...")
-        
-        # Criar objeto gTTS para português brasileiro
-        tts_obj = gTTS(text=cleaned_text_for_tts, lang='pt-br', slow=False)
-        
-        # Usar um arquivo temporário para o áudio
-        with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as temp_audio_file:
-            temp_audio_path = temp_audio_file.name
-        
-        # Salvar o áudio no arquivo temporário
-        tts_obj.save(temp_audio_path)
-        
-        # 6. Ler os bytes do áudio do arquivo temporário
-        with open(temp_audio_path, "rb") as audio_file:
-            audio_bytes = audio_file.read()
-        
-        # Limpar o arquivo temporário
-        os.unlink(temp_audio_path)
-        
-        logger.info(f"Áudio gerado com sucesso. Tamanho: {len(audio_bytes)} bytes")
-        
-        # 7. Codificar o áudio em Base64
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        
-        # 8. Criar a resposta JSON com texto limpo
+    except HTTPException:
+        # 503 de serviço ainda em inicialização
+        raise
+    except Exception as e:
+        logger.error(f"Erro na rota de chat com TTS: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/chat_with_tts/stream")
+async def chat_with_tts_stream(request: ChatRequest):
+    """
+    Versão em fluxo de /chat_with_tts/: a resposta é dividida em frases e cada
+    frase é sintetizada enquanto o modelo ainda gera as seguintes, de modo que
+    a reprodução pode começar logo após a primeira frase.
+
+    Eventos emitidos:
+        token: {"text": trecho visível da resposta}
+        audio: {"index": ordem do trecho, "text": frase, "audio_id": id, "audio_url": "/audio/{id}" (ou data URL), "audio_format": formato}
+        done:  {"text": resposta completa limpa, "audio_chunks": total de trechos, "message_hash": hash}
+        error: {"detail": mensagem de erro}
+    """
+    cleaned_message = clean_user_message(request.message)
+    logger.info(f"Mensagem original (TTS stream): {request.message}")
+    logger.info(f"Mensagem limpa (TTS stream): {cleaned_message}")
+
+    message_hash = generate_message_hash(cleaned_message, True, streamed=True)
+    events = asyncio.Queue()
+
+    def replay_response(response_data: dict):
+        # Entrega de uma vez uma resposta já concluída: texto, trechos de áudio e fim
+        events.put_nowait(format_sse_event("token", {"text": response_data["text"]}))
+        for chunk in response_data["audio_chunks"]:
+            events.put_nowait(format_sse_event("audio", chunk))
+
+    cached_response = await get_cached_response(request.session_id, message_hash)
+    if cached_response:
+        logger.info(f"Retornando resposta TTS cacheada em fluxo para: {cleaned_message[:50]}...")
+        replay_response(cached_response)
+        events.put_nowait(format_sse_event("done", {
+            "text": cached_response["text"],
+            "audio_chunks": len(cached_response["audio_chunks"]),
+            "message_hash": message_hash
+        }))
+        events.put_nowait(None)
+        return StreamingResponse(drain_events(events), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    chat_service = require_service("chat")
+    tts_service = require_service("tts")
+
+    # Sínteses em andamento, na ordem das frases; o limite evita sobrecarregar o motor de TTS
+    synthesis_tasks = asyncio.Queue()
+    synthesis_slots = asyncio.Semaphore(TTS_PIPELINE_MAX_PARALLEL)
+    # Todas as sínteses criadas, inclusive as já retiradas da fila pelo emissor
+    synthesis_started = []
+
+    async def synthesize_sentence(sentence: str) -> dict:
+        async with synthesis_slots:
+            return await tts_service.synthesize_for_response(sentence, CACHE_EXPIRY_SECONDS)
+
+    async def emit_audio(audio_chunks: list):
+        # Aguarda as sínteses na ordem de criação para entregar o áudio ordenado
+        while True:
+            item = await synthesis_tasks.get()
+            if item is None:
+                break
+            sentence, task = item
+            chunk = {"index": len(audio_chunks), "text": sentence, **await task}
+            audio_chunks.append(chunk)
+            await events.put(format_sse_event("audio", chunk))
+
+    def schedule_sentences(sentences: list):
+        for sentence in sentences:
+            text_for_tts = clean_text_for_tts(sentence)
+            if text_for_tts:
+                task = asyncio.create_task(synthesize_sentence(text_for_tts))
+                synthesis_started.append(task)
+                synthesis_tasks.put_nowait((sentence, task))
+
+    # Se esta requisição executa a geração (e não apenas aguarda uma idêntica em andamento)
+    generating = False
+
+    async def produce():
+        nonlocal generating
+        generating = True
+        think_filter = ThinkTagFilter()
+        splitter = SentenceSplitter(min_chars=TTS_PIPELINE_MIN_CHARS)
+        visible_parts = []
+        audio_chunks = []
+        audio_emitter = asyncio.create_task(emit_audio(audio_chunks))
+        try:
+            async for token in chat_service.stream_response(cleaned_message, request.session_id):
+                visible = think_filter.feed(token)
+                if visible:
+                    visible_parts.append(visible)
+                    await events.put(format_sse_event("token", {"text": visible}))
+                    schedule_sentences(splitter.feed(visible))
+
+            visible = think_filter.flush()
+            if visible:
+                visible_parts.append(visible)
+                await events.put(format_sse_event("token", {"text": visible}))
+                schedule_sentences(splitter.feed(visible))
+            schedule_sentences(splitter.flush())
+
+            # Aguardar a entrega de todos os trechos de áudio
+            synthesis_tasks.put_nowait(None)
+            await audio_emitter
+        finally:
+            # Em caso de erro, nenhuma síntese fica órfã: as pendentes são canceladas e
+            # todas (com o emissor) aguardadas, o que também consome suas exceções
+            for task in [audio_emitter, *synthesis_started]:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(audio_emitter, *synthesis_started, return_exceptions=True)
+
+        cleaned_response = clean_response_text("".join(visible_parts))
+        logger.info(f"Resposta TTS em fluxo concluída ({len(audio_chunks)} trechos de áudio)")
+
         response_data = {
             "text": cleaned_response,
-            "audio": audio_base64,
-            "audio_format": "mp3"
+            "audio_chunks": audio_chunks
         }
-        
+
         # Cachear resposta para possível recuperação
-        cache_response(request.session_id, message_hash, response_data)
-        
+        await cache_response(request.session_id, message_hash, response_data)
+
         # Limpar cache expirado periodicamente
-        cleanup_expired_cache()
-        
-        logger.info("Chat com TTS processado com sucesso")
+        await cleanup_expired_cache()
+
         return response_data
-        
-    except Exception as e:
-        logger.error(f"Erro na rota de chat com TTS: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+
+    async def respond():
+        try:
+            # Mensagem idêntica já em geração na sessão: aguardar o mesmo resultado
+            response_data = await chat_flights.do(flight_key(request.session_id, message_hash), produce)
+            if not generating:
+                replay_response(response_data)
+            await events.put(format_sse_event("done", {
+                "text": response_data["text"],
+                "audio_chunks": len(response_data["audio_chunks"]),
+                "message_hash": message_hash
+            }))
+        except Exception as e:
+            logger.error(f"Erro na rota de chat com TTS em fluxo: {str(e)}")
+            await events.put(format_sse_event("error", {"detail": str(e)}))
+        finally:
+            await events.put(None)
+
+    # A geração roda em tarefa própria: se o cliente cair, a resposta ainda é concluída e cacheada
+    run_in_background(respond())
+
+    return StreamingResponse(drain_events(events), media_type="text/event-stream", headers=SSE_HEADERS)
+
+# Ids de áudio são hashes SHA-256 em hexadecimal (ver AudioCache.make_key)
+AUDIO_ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+def parse_range_header(range_header: str, total_size: int):
+    """
+    Interpreta um cabeçalho Range com um único intervalo de bytes.
+
+    Returns:
+        tuple | None: (início, fim) inclusivos, ou None se o intervalo não puder ser atendido
+    """
+    unit, _, ranges = range_header.partition("=")
+    # Unidades desconhecidas e múltiplos intervalos: servir o arquivo inteiro
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return (0, total_size - 1)
+
+    start_text, _, end_text = ranges.strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else total_size - 1
+        else:
+            # Sufixo: últimos N bytes
+            suffix_length = int(end_text)
+            if suffix_length <= 0:
+                return None
+            start = max(0, total_size - suffix_length)
+            end = total_size - 1
+    except ValueError:
+        return None
+
+    end = min(end, total_size - 1)
+    if start > end or start >= total_size:
+        return None
+    return (start, end)
+
+# Rota para servir o áudio sintetizado (binário, com suporte a Range e ETag)
+@app.get("/audio/{audio_id}")
+async def get_audio(audio_id: str, request: Request):
+    if not AUDIO_ID_PATTERN.match(audio_id):
+        raise HTTPException(status_code=404, detail="Áudio não encontrado")
+
+    # O id é o hash do conteúdo: o ETag nunca muda para o mesmo id
+    etag = f'"{audio_id}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable"
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    tts_service = require_service("tts")
+
+    # A camada em disco do cache pode precisar ler o arquivo: não bloquear o event loop
+    audio_bytes = await asyncio.to_thread(tts_service.get_audio, audio_id)
+    if audio_bytes is None:
+        raise HTTPException(status_code=404, detail="Áudio não encontrado ou expirado")
+
+    total_size = len(audio_bytes)
+    range_header = request.headers.get("range")
+    if range_header:
+        byte_range = parse_range_header(range_header, total_size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{total_size}"})
+        start, end = byte_range
+        if (start, end) != (0, total_size - 1):
+            return Response(
+                content=audio_bytes[start:end + 1],
+                status_code=206,
+                media_type=tts_service.media_type,
+                headers={**headers, "Content-Range": f"bytes {start}-{end}/{total_size}"}
+            )
+
+    # Os bytes do cache vão direto para a resposta, sem cópia ou codificação
+    return Response(content=audio_bytes, media_type=tts_service.media_type, headers=headers)
 
 # Endpoint de health check para verificar status do servidor
 @app.get("/health")
@@ -291,15 +814,33 @@ async def health_check():
     """
     Endpoint simples para verificar se o servidor está funcionando.
     Usado pelo sistema de conectividade do frontend.
+
+    O servidor responde mesmo durante a carga dos modelos: "services" traz o
+    estado de inicialização de cada serviço (pending, loading, ready, failed).
     """
+    service_status = services.get_status()
+    if services.all_ready:
+        status, message = "healthy", "Servidor está funcionando normalmente"
+    elif any(state["status"] == "failed" for state in service_status.values()):
+        status, message = "degraded", "Um ou mais serviços falharam na inicialização"
+    else:
+        status, message = "starting", "Serviços ainda em inicialização"
+
+    metrics = {}
+    if services.is_ready("transcription"):
+        metrics["transcription"] = services.get("transcription").get_stats()
+    if services.is_ready("chat"):
+        metrics["chat"] = services.get("chat").get_stats()
+    metrics["responses"] = await asyncio.to_thread(response_store.get_stats)
+    metrics["in_flight"] = chat_flights.get_stats()
+    if services.is_ready("tts"):
+        metrics["tts"] = services.get("tts").get_stats()
+
     return {
-        "status": "healthy",
-        "message": "Servidor está funcionando normalmente",
-        "services": {
-            "transcription": "ok",
-            "chat": "ok",
-            "tts": "ok"
-        }
+        "status": status,
+        "message": message,
+        "services": service_status,
+        "metrics": metrics
     }
 
 # Rota para recuperar respostas pendentes
@@ -307,19 +848,8 @@ async def health_check():
 async def get_pending_responses(session_id: str):
     """Retorna todas as respostas pendentes para uma sessão"""
     try:
-        cleanup_expired_cache()  # Limpar cache expirado
-        
-        pending_responses = []
-        if session_id in response_cache:
-            for message_hash, cached in response_cache[session_id].items():
-                # Verificar se não expirou
-                if time.time() - cached['timestamp'] < CACHE_EXPIRY_SECONDS:
-                    pending_responses.append({
-                        'message_hash': message_hash,
-                        'response': cached['data'],
-                        'timestamp': cached['timestamp']
-                    })
-        
+        pending_responses = await asyncio.to_thread(response_store.pending, session_id)
+
         logger.info(f"Retornando {len(pending_responses)} respostas pendentes para session {session_id}")
         return {"pending_responses": pending_responses}
         
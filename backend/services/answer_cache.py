@@ -0,0 +1,172 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+from services.query_embedding_cache import normalize_query
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Marcadores de perguntas que dependem da conversa ("e ela?", "fale mais sobre isso"...):
+# a resposta certa muda conforme o que foi dito antes, então não entram no cache
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(ele|ela|eles|elas|dele|dela|deles|delas|nele|nela|"
+    r"isso|isto|disso|disto|nisso|esse|essa|esses|essas|desse|dessa|nesse|nessa|"
+    r"este|esta|deste|desta|aquele|aquela|daquele|daquela|"
+    r"anterior|acima|mencionad[oa]s?|citad[oa]s?|outr[oa]s?|também|"
+    r"mais sobre|mais detalhes|explique melhor|continue|continua)\b"
+)
+
+# Mensagens que começam com "e" ("e o departamento de física?") retomam a pergunta anterior
+FOLLOW_UP_PREFIX = re.compile(r"^(e|mas|então)\s")
+
+
+def is_follow_up(message: str) -> bool:
+    """Indica se a mensagem parece depender do contexto da conversa"""
+    text = normalize_query(message)
+    return bool(FOLLOW_UP_PREFIX.match(text) or FOLLOW_UP_PATTERN.search(text))
+
+
+# Palavras com inicial maiúscula que não são nomes: início de frase comum em perguntas
+COMMON_CAPITALIZED = {
+    "a", "as", "o", "os", "um", "uma", "quem", "qual", "quais", "que", "quê", "como", "onde",
+    "quando", "quanto", "quantos", "quantas", "por", "porque", "me", "eu", "você", "vocês",
+    "existe", "existem", "há", "tem", "têm", "liste", "lista", "fale", "diga", "mostre",
+    "gostaria", "preciso", "poderia", "pode", "sabe", "olá", "oi", "bom", "boa", "professor",
+    "professora", "prof", "departamento", "dr", "dra",
+}
+
+NAME_TOKEN = re.compile(r"\b[^\W\d_][\w'-]*|\d+")
+
+
+def named_entities(message: str) -> frozenset:
+    """
+    Nomes próprios, siglas e números da mensagem (professores, departamentos, anos...).
+
+    Perguntas que diferem só por esses termos ficam muito próximas no espaço
+    vetorial ("quem é o professor João Silva?" x "quem é o professor João
+    Souza?"), mas têm respostas diferentes.
+    """
+    entities = set()
+    for token in NAME_TOKEN.findall(message):
+        if token.isdigit() or (token[0].isupper() and token.lower() not in COMMON_CAPITALIZED):
+            entities.add(token.lower())
+    return frozenset(entities)
+
+
+class SemanticAnswerCache:
+    """
+    Cache de respostas completas do chat, compartilhado entre sessões.
+
+    Visitantes fazem as mesmas perguntas com palavras diferentes: a mensagem
+    é vetorizada e, se uma pergunta anterior tiver similaridade de cosseno
+    acima de `threshold`, a resposta dela é reaproveitada sem executar o
+    agente. Mensagens idênticas (após normalização) nem são vetorizadas.
+    Uma pergunta só é considerada semelhante se citar os mesmos nomes
+    próprios, siglas e números (`named_entities`): a resposta sobre um
+    professor nunca é servida para uma pergunta sobre outro.
+    LRU limitado em número de entradas, com expiração por tempo.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=3600, threshold=0.92):
+        """
+        Args:
+            max_entries (int): Número máximo de respostas guardadas
+            ttl_seconds (float): Validade de cada resposta, em segundos (0 = sem expiração)
+            threshold (float): Similaridade de cosseno mínima para reaproveitar uma resposta
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        # {mensagem normalizada: (vetor normalizado, resposta, instante, nomes citados)}
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Métricas
+        self.hits = 0
+        self.exact_hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def _is_expired(self, stored_at: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - stored_at >= self.ttl_seconds
+
+    def _purge_expired(self, now: float):
+        for key in [key for key, (_, _, stored_at, _) in self.entries.items() if self._is_expired(stored_at, now)]:
+            del self.entries[key]
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def should_skip(self, message: str) -> bool:
+        """Perguntas dependentes da conversa não são consultadas nem gravadas"""
+        if is_follow_up(message):
+            with self.lock:
+                self.skipped += 1
+            return True
+        return False
+
+    def get_exact(self, message: str):
+        """Resposta de uma mensagem idêntica (após normalização), sem vetorizar"""
+        key = normalize_query(message)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or self._is_expired(entry[2], time.monotonic()):
+                return None
+            self.entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry[1]
+
+    def get_similar(self, message: str, vector):
+        """
+        Returns:
+            tuple | None: (resposta, similaridade) da pergunta mais parecida acima do limiar,
+                entre as que citam os mesmos nomes que `message`
+        """
+        query = self._unit(vector)
+        entities = named_entities(message)
+        with self.lock:
+            self._purge_expired(time.monotonic())
+            keys = [key for key, entry in self.entries.items() if entry[3] == entities]
+            if not keys:
+                self.misses += 1
+                return None
+            matrix = np.stack([self.entries[key][0] for key in keys])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(keys[best])
+            self.hits += 1
+            return self.entries[keys[best]][1], float(scores[best])
+
+    def put(self, message: str, vector, answer: str):
+        key = normalize_query(message)
+        with self.lock:
+            self.entries[key] = (self._unit(vector), answer, time.monotonic(), named_entities(message))
+            self.entries.move_to_end(key)
+            # Despejar as menos usadas recentemente
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        """Retorna as métricas do cache"""
+        with self.lock:
+            hits = self.hits + self.exact_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "exact_hits": self.exact_hits,
+                "misses": self.misses,
+                "skipped_follow_ups": self.skipped,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            }
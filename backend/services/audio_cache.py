@@ -0,0 +1,250 @@
+import hashlib
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+
+def normalize_tts_text(text: str) -> str:
+    """Normaliza o texto para que variações irrelevantes gerem a mesma chave"""
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+class AudioCache:
+    """
+    Cache global de áudio sintetizado, endereçado pelo conteúdo.
+
+    A chave é um hash do texto normalizado, do idioma e do motor de TTS, de
+    modo que respostas repetidas (de qualquer sessão) reaproveitam o áudio.
+    A camada em memória é um LRU limitado em bytes; opcionalmente, os áudios
+    também são gravados em disco e recarregados após um restart ou despejo.
+    A camada em disco também é limitada: acima de `disk_max_bytes`, os
+    arquivos usados há mais tempo (pelo mtime, renovado a cada leitura) são
+    apagados.
+
+    Áudios cujo id já foi entregue ao cliente podem ser fixados (`pin`) por
+    um prazo: ficam fora do LRU, em um espaço próprio limitado a
+    `max_pinned_bytes`, para que a URL continue válida enquanto a resposta
+    puder ser recuperada.
+    """
+
+    # Após uma limpeza do disco, o total fica abaixo desta fração do limite
+    # (evita varrer o diretório a cada gravação perto do limite)
+    DISK_LOW_WATER = 0.9
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None, disk_max_bytes=512 * 1024 * 1024,
+                 max_pinned_bytes=None):
+        """
+        Args:
+            max_bytes (int): Tamanho máximo da camada em memória, em bytes
+            disk_dir (str): Diretório da camada em disco (None desativa)
+            disk_max_bytes (int): Tamanho máximo da camada em disco, em bytes
+            max_pinned_bytes (int): Tamanho máximo dos áudios fixados (padrão: max_bytes)
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_bytes = 0
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+        # {key: (áudio, expira_em)}, em ordem de expiração (todos fixados com o mesmo prazo)
+        self.pinned = OrderedDict()
+        self.pinned_bytes = 0
+        self.max_pinned_bytes = max_bytes if max_pinned_bytes is None else max_pinned_bytes
+        self.lock = threading.Lock()
+
+        # Métricas
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evicted = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self.disk_bytes = sum(size for _, size, _ in self._disk_files())
+            logger.info(f"Cache de áudio em disco: {disk_dir} ({self.disk_bytes} de {disk_max_bytes} bytes)")
+
+    @staticmethod
+    def make_key(text: str, language: str, engine: str) -> str:
+        """Gera a chave do áudio a partir do texto normalizado, idioma e motor"""
+        content = f"{engine}\0{language}\0{normalize_tts_text(text)}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key)
+
+    def _disk_files(self):
+        """(caminho, bytes, mtime) de cada áudio gravado em disco"""
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _evict_disk(self):
+        """
+        Apaga os arquivos usados há mais tempo até o total ficar abaixo do limite.
+
+        O total é recalculado a partir do diretório: outros workers podem ter
+        gravado ou apagado arquivos no mesmo diretório.
+        """
+        files = sorted(self._disk_files(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        target = self.disk_max_bytes * self.DISK_LOW_WATER
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.disk_evicted += 1
+        self.disk_bytes = total
+
+    def _expire_pins(self, now):
+        while self.pinned:
+            key, (audio_bytes, expires_at) = next(iter(self.pinned.items()))
+            if expires_at > now:
+                break
+            del self.pinned[key]
+            self.pinned_bytes -= len(audio_bytes)
+
+    def pin(self, key: str, audio_bytes: bytes, ttl_seconds: float) -> bool:
+        """
+        Garante que o áudio continue disponível por `ttl_seconds`, mesmo se despejado do LRU.
+
+        Returns:
+            bool: False se não couber no espaço dos fixados (o id não deve ser entregue)
+        """
+        now = time.monotonic()
+        with self.lock:
+            self._expire_pins(now)
+            previous = self.pinned.pop(key, None)
+            if previous is not None:
+                self.pinned_bytes -= len(previous[0])
+            if self.pinned_bytes + len(audio_bytes) > self.max_pinned_bytes:
+                return False
+            self.pinned[key] = (audio_bytes, now + ttl_seconds)
+            self.pinned_bytes += len(audio_bytes)
+            return True
+
+    def _store_in_memory(self, key: str, audio_bytes: bytes):
+        # Áudios maiores que o limite total não cabem na memória
+        if len(audio_bytes) > self.max_bytes:
+            return
+        if key in self.entries:
+            self.current_bytes -= len(self.entries.pop(key))
+        self.entries[key] = audio_bytes
+        self.current_bytes += len(audio_bytes)
+
+        # Despejar os menos usados recentemente até caber no limite
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.current_bytes -= len(evicted)
+
+    def get(self, key: str, record_stats=True):
+        """
+        Recupera o áudio do cache.
+
+        Args:
+            key (str): Chave do áudio
+            record_stats (bool): Se False, a consulta não entra nas métricas de acerto
+                (usado ao servir o áudio já entregue ao cliente)
+
+        Returns:
+            bytes | None: Áudio armazenado ou None se não estiver no cache
+        """
+        with self.lock:
+            audio_bytes = self.entries.get(key)
+            if audio_bytes is not None:
+                self.entries.move_to_end(key)
+                if record_stats:
+                    self.hits += 1
+                return audio_bytes
+
+            self._expire_pins(time.monotonic())
+            pinned = self.pinned.get(key)
+            if pinned is not None:
+                if record_stats:
+                    self.hits += 1
+                return pinned[0]
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, "rb") as audio_file:
+                    audio_bytes = audio_file.read()
+                # O mtime marca o último uso: os menos usados saem primeiro da camada em disco
+                os.utime(path)
+            except FileNotFoundError:
+                audio_bytes = None
+            if audio_bytes is not None:
+                with self.lock:
+                    if record_stats:
+                        self.disk_hits += 1
+                    self._store_in_memory(key, audio_bytes)
+                return audio_bytes
+
+        if record_stats:
+            with self.lock:
+                self.misses += 1
+        return None
+
+    def put(self, key: str, audio_bytes: bytes):
+        """Armazena o áudio na memória e, se configurado, em disco"""
+        with self.lock:
+            self._store_in_memory(key, audio_bytes)
+
+        if self.disk_dir:
+            if len(audio_bytes) > self.disk_max_bytes:
+                return
+            path = self._disk_path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                try:
+                    previous_size = os.path.getsize(path)
+                except FileNotFoundError:
+                    previous_size = 0
+                # Gravar em arquivo temporário e renomear para não expor áudio incompleto
+                temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, "wb") as audio_file:
+                    audio_file.write(audio_bytes)
+                os.replace(temp_path, path)
+            except OSError as e:
+                logger.warning(f"Falha ao gravar áudio em disco ({key}): {str(e)}")
+                return
+
+            with self.lock:
+                self.disk_bytes += len(audio_bytes) - previous_size
+                if self.disk_bytes > self.disk_max_bytes:
+                    self._evict_disk()
+
+    def get_stats(self) -> dict:
+        """Retorna as métricas do cache"""
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "pinned": len(self.pinned),
+                "pinned_bytes": self.pinned_bytes,
+                "disk_bytes": self.disk_bytes if self.disk_dir else None,
+                "disk_max_bytes": self.disk_max_bytes if self.disk_dir else None,
+                "disk_evicted": self.disk_evicted,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            }
@@ -1,15 +1,17 @@
+import asyncio
 import openai
+from concurrent.futures import ThreadPoolExecutor
 from langchain_ollama import OllamaEmbeddings, OllamaLLM, ChatOllama
 from utils.logger import setup_logger
 from qdrant_client import QdrantClient, models
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from services.embeddings import create_collection
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_community.chat_message_histories import ChatMessageHistory
 
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk
 from langgraph.checkpoint.memory import MemorySaver
+from services.conversation_memory import make_history_trimmer
 from langchain_core.tools import tool, StructuredTool
 from langgraph.prebuilt import create_react_agent
 from pydantic.v1 import BaseModel, Field as PydanticV1Field
@@ -32,7 +34,8 @@ class SearchArticle(BaseModel):
     professor_name: str = PydanticV1Field(default="", description="Nome do professor para filtrar artigos apenas deste docente. Deixe vazio para buscar artigos de todos os professores do CCEN.")
 
 class ChatService:
-    def __init__(self, use_local_model=False, model_name=None, api_key=None):
+    def __init__(self, use_local_model=False, model_name=None, api_key=None, max_concurrency=4, answer_cache=None,
+                 memory=None, history_max_tokens=None):
         """
         Inicializa o serviço de chat.
         
@@ -40,11 +43,22 @@ class ChatService:
             use_local_model (bool): Se True, usa modelo local (Ollama), caso contrário usa OpenAI
             model_name (str): Nome do modelo a ser usado
             api_key (str): Chave da API OpenAI (necessária apenas se use_local_model=False)
+            max_concurrency (int): Número máximo de execuções simultâneas do agente
+            answer_cache (SemanticAnswerCache): Cache de respostas entre sessões (opcional)
+            memory (BaseCheckpointSaver): Memória das conversas (padrão: MemorySaver sem limite)
+            history_max_tokens (int): Tokens de histórico mantidos por sessão (None = histórico completo)
         """
         self.use_local_model = use_local_model
         self.model_name = model_name
         self.api_key = api_key
-        self.memory = MemorySaver()
+        self.memory = memory if memory is not None else MemorySaver()
+        self.answer_cache = answer_cache
+        self.embeddings = None
+
+        # Pool limitado de threads para executar o agente fora do event loop.
+        # Requisições além do limite aguardam na fila do executor sem bloquear o servidor.
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="chat-agent")
 
         
         if use_local_model:
@@ -108,19 +122,38 @@ class ChatService:
                 Responde sempre em PORTUGUÊS BRASILEIRO.
                                                  """
         
-        self.agent_executor = create_react_agent(self.llm, self.tools, checkpointer=self.memory, prompt=self.prompt)
+        # Janela de histórico: o prompt de cada turno não cresce com a conversa
+        pre_model_hook = make_history_trimmer(history_max_tokens) if history_max_tokens else None
+        self.agent_executor = create_react_agent(self.llm, self.tools, checkpointer=self.memory, prompt=self.prompt,
+                                                 pre_model_hook=pre_model_hook)
         self.agent_executor.invoke({"messages": [HumanMessage(content="Aquecendo agente")]}, {'configurable': {'thread_id': 0}})
         print("Agente aquecido")    
         
 
-    def set_collection(self, use_local_collection=False, collection_name=None, embed_model=None, qdrant_url=None, qdrant_api_key=None, path="./", docs=None):
+    def set_collection(self, use_local_collection=False, collection_name=None, embed_model=None, qdrant_url=None, qdrant_api_key=None, path="./", query_cache=None, embed_backend="ollama"):
+        """
+        Conecta à coleção do Qdrant usada pelas ferramentas de busca.
+        A ingestão dos documentos é feita fora do servidor (index_documents.py).
+
+        Args:
+            query_cache (QueryEmbeddingCache): Cache dos vetores de consulta (opcional)
+            embed_backend (str): "ollama" (HTTP) ou "local" (sentence-transformers no processo)
+        """
         self.use_local_collection = use_local_collection
         self.collection_name = collection_name
         import os
         ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        self.embeddings = OllamaEmbeddings(model=embed_model, base_url=ollama_base_url)
+        if embed_backend == "local":
+            from services.local_embedding import LocalQueryEmbeddings
+            self.embeddings = LocalQueryEmbeddings(embed_model)
+        elif embed_backend == "ollama":
+            self.embeddings = OllamaEmbeddings(model=embed_model, base_url=ollama_base_url)
+        else:
+            raise ValueError(f"Backend de embeddings desconhecido: '{embed_backend}' (use 'ollama' ou 'local')")
+        # Chave do cache de consultas: vetores de backends diferentes não se misturam
+        self.embed_model = f"{embed_backend}:{embed_model}"
+        self.query_cache = query_cache
         self.path = path
-        self.docs = docs
 
         if use_local_collection:
             self.qdrant_client = QdrantClient(url=qdrant_url or "http://localhost:6333")
@@ -132,7 +165,23 @@ class ChatService:
                 url=qdrant_url, 
                 api_key=qdrant_api_key
             )
-        create_collection(embed_model, self.qdrant_client, self.collection_name, self.docs)
+
+    def embed_query(self, query: str) -> list[float]:
+        """Vetor da consulta, compartilhado pelas ferramentas de busca através do cache"""
+        if self.query_cache is None:
+            return self.embeddings.embed_query(query)
+        return self.query_cache.get_or_compute(self.embed_model, query, self.embeddings.embed_query)
+
+    def get_stats(self) -> dict:
+        """Retorna as métricas do serviço de chat"""
+        stats = {"max_concurrency": self.max_concurrency}
+        if self.answer_cache is not None:
+            stats["answer_cache"] = self.answer_cache.get_stats()
+        if hasattr(self.memory, "get_stats"):
+            stats["memory"] = self.memory.get_stats()
+        if getattr(self, "query_cache", None) is not None:
+            stats["query_embedding_cache"] = self.query_cache.get_stats()
+        return stats
 
     def get_teacher_names(self, query: str) -> list[str]:
         """
@@ -151,7 +200,7 @@ class ChatService:
         """
         Search for information about a specific teacher in the CCEN of UFPE.
         """
-        query_vector = self.embeddings.embed_query(query)
+        query_vector = self.embed_query(query)
 
         teacher_filter = models.Filter(
             must=[
@@ -188,7 +237,7 @@ class ChatService:
         # Initialize components
         
         # Get query embedding and search
-        query_vector = self.embeddings.embed_query(query)
+        query_vector = self.embed_query(query)
         results = self.qdrant_client.search(
             collection_name=self.collection_name,
             query_vector=query_vector,
@@ -211,7 +260,7 @@ class ChatService:
         Filters by document type 'artigo' and optionally by professor name.
         """
         try:
-            query_vector = self.embeddings.embed_query(query)
+            query_vector = self.embed_query(query)
             
             # Criar filtros
             filters = [
@@ -287,21 +336,91 @@ OBJETIVO: Tornar a produção científica do CCEN acessível e interessante para
             logger.error(f"Erro ao buscar artigos: {str(e)}")
             return "Erro ao buscar artigos na base de dados."
 
+    def _lookup_answer(self, message, session_id):
+        """
+        Procura uma resposta já dada a uma pergunta equivalente (de qualquer sessão).
+        Chamado apenas para mensagens que não dependem da conversa (ver is_follow_up).
+
+        Returns:
+            tuple: (resposta ou None, vetor da mensagem ou None) - o vetor é reaproveitado ao gravar
+        """
+        if self.embeddings is None:
+            return None, None
+
+        answer = self.answer_cache.get_exact(message)
+        vector = None
+        if answer is None:
+            try:
+                vector = self.embed_query(message)
+            except Exception as e:
+                # Sem o vetor, a mensagem segue para o agente normalmente
+                logger.warning(f"Falha ao vetorizar mensagem para o cache de respostas: {str(e)}")
+                return None, None
+            match = self.answer_cache.get_similar(message, vector)
+            if match is not None:
+                answer, similarity = match
+                logger.info(f"Resposta semelhante reaproveitada (similaridade {similarity:.3f})")
+        if answer is not None:
+            self._remember_exchange(message, answer, session_id)
+        return answer, vector
+
+    def _remember_exchange(self, message, answer, session_id):
+        """Grava a pergunta e a resposta do cache na memória da sessão, para as perguntas seguintes"""
+        try:
+            self.agent_executor.update_state(
+                {'configurable': {'thread_id': session_id}},
+                {"messages": [HumanMessage(content=message), AIMessage(content=answer)]},
+                as_node="agent",
+            )
+        except Exception as e:
+            logger.warning(f"Falha ao registrar resposta do cache na memória da sessão: {str(e)}")
+
+    def _store_answer(self, message, vector, answer):
+        """Grava a resposta gerada pelo agente no cache (perguntas dependentes da conversa já foram filtradas)"""
+        if self.embeddings is None or not answer:
+            return
+        try:
+            if vector is None:
+                vector = self.embed_query(message)
+            self.answer_cache.put(message, vector, answer)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar resposta no cache: {str(e)}")
+
+    def _invoke_agent(self, message, session_id):
+        """
+        Executa o agente de forma síncrona. Deve rodar no pool de threads do serviço.
+        """
+        response = self.agent_executor.invoke({"messages": [HumanMessage(content=message)]}, {'configurable': {'thread_id': session_id}})
+        print(response['messages'][-1].content)
+        return response['messages'][-1].content
+
     async def get_response(self, message, session_id):
         """
         Obtém uma resposta do modelo para a mensagem fornecida.
         
         Args:
             message (str): Mensagem do usuário
+            session_id (str): Identificador da sessão (thread da memória do agente)
             
         Returns:
             str: Resposta do modelo
         """
         try:
             if self.use_local_model:
-                response = self.agent_executor.invoke({"messages": [HumanMessage(content=message)]}, {'configurable': {'thread_id': session_id}})
-                print(response['messages'][-1].content)
-                return response['messages'][-1].content
+                cache_enabled = self.answer_cache is not None and not self.answer_cache.should_skip(message)
+                vector = None
+                if cache_enabled:
+                    # Fora do pool do agente: a consulta ao cache não espera execuções em andamento
+                    answer, vector = await asyncio.to_thread(self._lookup_answer, message, session_id)
+                    if answer is not None:
+                        return answer
+
+                # O agente e as ferramentas são síncronos: executar no pool para não bloquear o event loop
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(self.executor, self._invoke_agent, message, session_id)
+                if cache_enabled:
+                    await asyncio.to_thread(self._store_answer, message, vector, response)
+                return response
             else:
                 response = await openai.ChatCompletion.acreate(
                     model=self.model_name,
@@ -313,3 +432,90 @@ OBJETIVO: Tornar a produção científica do CCEN acessível e interessante para
         except Exception as e:
             logger.error(f"Erro ao obter resposta do modelo: {str(e)}")
             raise
+
+    def _last_answer(self, session_id):
+        """Texto da última mensagem do agente na sessão (a resposta final, como em _invoke_agent)"""
+        state = self.agent_executor.get_state({'configurable': {'thread_id': session_id}})
+        return state.values['messages'][-1].content
+
+    def _stream_agent(self, message, session_id):
+        """
+        Executa o agente de forma síncrona emitindo os tokens da resposta.
+        Deve rodar no pool de threads do serviço.
+        """
+        for chunk, metadata in self.agent_executor.stream(
+            {"messages": [HumanMessage(content=message)]},
+            {'configurable': {'thread_id': session_id}},
+            stream_mode="messages",
+        ):
+            # Repassar apenas o texto gerado pelo LLM (ignora saídas e chamadas de ferramentas)
+            if metadata.get("langgraph_node") != "agent" or not isinstance(chunk, AIMessageChunk):
+                continue
+            if isinstance(chunk.content, str) and chunk.content:
+                yield chunk.content
+
+    async def stream_response(self, message, session_id):
+        """
+        Obtém a resposta do modelo em fluxo, token a token.
+        
+        Args:
+            message (str): Mensagem do usuário
+            session_id (str): Identificador da sessão (thread da memória do agente)
+            
+        Yields:
+            str: Trechos da resposta do modelo, na ordem em que são gerados
+        """
+        try:
+            if self.use_local_model:
+                cache_enabled = self.answer_cache is not None and not self.answer_cache.should_skip(message)
+                vector = None
+                if cache_enabled:
+                    answer, vector = await asyncio.to_thread(self._lookup_answer, message, session_id)
+                    if answer is not None:
+                        # Resposta do cache: entregue de uma vez, sem executar o agente
+                        yield answer
+                        return
+
+                loop = asyncio.get_running_loop()
+                queue = asyncio.Queue()
+                finished = object()
+
+                def produce():
+                    try:
+                        for token in self._stream_agent(message, session_id):
+                            loop.call_soon_threadsafe(queue.put_nowait, token)
+                    except Exception as e:
+                        loop.call_soon_threadsafe(queue.put_nowait, e)
+                    finally:
+                        loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+                # O agente roda no pool; os tokens chegam ao event loop pela fila
+                producer = loop.run_in_executor(self.executor, produce)
+                while True:
+                    item = await queue.get()
+                    if item is finished:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+                await producer
+                if cache_enabled:
+                    # Os tokens incluem texto gerado antes de chamadas de ferramentas: o cache
+                    # guarda só a mensagem final, como em get_response
+                    answer = await asyncio.to_thread(self._last_answer, session_id)
+                    await asyncio.to_thread(self._store_answer, message, vector, answer)
+            else:
+                response = await openai.ChatCompletion.acreate(
+                    model=self.model_name,
+                    messages=[
+                        {"role": "user", "content": message}
+                    ],
+                    stream=True
+                )
+                async for chunk in response:
+                    content = chunk.choices[0].delta.get("content")
+                    if content:
+                        yield content
+        except Exception as e:
+            logger.error(f"Erro ao obter resposta em fluxo do modelo: {str(e)}")
+            raise
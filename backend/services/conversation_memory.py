@@ -0,0 +1,209 @@
+import time
+import threading
+from collections import OrderedDict, defaultdict
+from langchain_core.messages import HumanMessage, RemoveMessage, trim_messages
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+
+def _size(serialized) -> int:
+    """Bytes de um valor serializado pelo serde do LangGraph ((tipo, bytes))"""
+    return len(serialized[1]) if serialized else 0
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    Memória das conversas do agente, limitada.
+
+    O MemorySaver guarda todos os checkpoints de todas as sessões para
+    sempre (um por passo do agente, com as saídas das ferramentas). Este
+    checkpointer mantém só os últimos `keep_checkpoints` de cada sessão e
+    descarta sessões inteiras quando ficam ociosas por mais de
+    `idle_ttl_seconds` ou quando o total passa de `max_sessions` ou
+    `max_bytes` (as menos usadas recentemente saem primeiro).
+    """
+
+    def __init__(self, max_sessions=500, max_bytes=64 * 1024 * 1024, idle_ttl_seconds=1800, keep_checkpoints=2):
+        """
+        Args:
+            max_sessions (int): Número máximo de sessões em memória
+            max_bytes (int): Tamanho máximo (serializado) de todas as sessões, em bytes
+            idle_ttl_seconds (float): Tempo sem mensagens após o qual a sessão é descartada
+            keep_checkpoints (int): Checkpoints mantidos por sessão (o atual e os anteriores)
+        """
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.keep_checkpoints = max(1, keep_checkpoints)
+        self.lock = threading.RLock()
+
+        # {thread_id: instante do último uso}, do menos para o mais recente
+        self.last_used = OrderedDict()
+        # Índices por sessão, para medir e apagar sem percorrer todas as sessões
+        self.blob_keys = defaultdict(set)
+        self.write_keys = defaultdict(set)  # {thread_id: {(thread_id, ns, checkpoint_id)}}
+        self.versions = {}  # {(thread_id, ns, checkpoint_id): channel_versions}
+        self.session_bytes = defaultdict(int)
+        self.total_bytes = 0
+
+        # Métricas
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+        self.pruned_checkpoints = 0
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self.lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+            for channel, version in new_versions.items():
+                self.blob_keys[thread_id].add((thread_id, checkpoint_ns, channel, version))
+            self.versions[(thread_id, checkpoint_ns, checkpoint["id"])] = dict(checkpoint["channel_versions"])
+
+            self._prune_checkpoints(thread_id, checkpoint_ns)
+            self._measure(thread_id)
+            self._touch(thread_id)
+            self._evict(current=thread_id)
+            return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with self.lock:
+            super().put_writes(config, writes, task_id, task_path)
+            thread_id = config["configurable"]["thread_id"]
+            self.write_keys[thread_id].add(
+                (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+            )
+
+    def get_tuple(self, config):
+        with self.lock:
+            return super().get_tuple(config)
+
+    def delete_thread(self, thread_id):
+        with self.lock:
+            self._forget(thread_id)
+
+    def _touch(self, thread_id):
+        self.last_used[thread_id] = time.monotonic()
+        self.last_used.move_to_end(thread_id)
+
+    def _prune_checkpoints(self, thread_id, checkpoint_ns):
+        """Remove checkpoints antigos da sessão e os valores que só eles referenciavam"""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.keep_checkpoints:
+            return
+
+        # Ids de checkpoint crescem com o tempo: os menores são os mais antigos
+        ordered = sorted(checkpoints)
+        for checkpoint_id in ordered[:-self.keep_checkpoints]:
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            self.write_keys[thread_id].discard((thread_id, checkpoint_ns, checkpoint_id))
+            self.versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            self.pruned_checkpoints += 1
+
+        referenced = set()
+        for checkpoint_id in ordered[-self.keep_checkpoints:]:
+            for channel, version in self.versions.get((thread_id, checkpoint_ns, checkpoint_id), {}).items():
+                referenced.add((thread_id, checkpoint_ns, channel, version))
+        keys = self.blob_keys[thread_id]
+        for key in [key for key in keys if key[1] == checkpoint_ns and key not in referenced]:
+            self.blobs.pop(key, None)
+            keys.discard(key)
+
+    def _measure(self, thread_id):
+        """Recalcula o tamanho serializado da sessão"""
+        size = 0
+        for saved in self.storage.get(thread_id, {}).values():
+            for checkpoint, metadata, _ in saved.values():
+                size += _size(checkpoint) + _size(metadata)
+        for key in self.blob_keys.get(thread_id, ()):
+            size += _size(self.blobs.get(key))
+        for key in self.write_keys.get(thread_id, ()):
+            size += sum(_size(value) for _, _, value, _ in self.writes.get(key, {}).values())
+        self.total_bytes += size - self.session_bytes[thread_id]
+        self.session_bytes[thread_id] = size
+
+    def _forget(self, thread_id):
+        super().delete_thread(thread_id)
+        self.total_bytes -= self.session_bytes.pop(thread_id, 0)
+        self.blob_keys.pop(thread_id, None)
+        self.write_keys.pop(thread_id, None)
+        self.last_used.pop(thread_id, None)
+        for key in [key for key in self.versions if key[0] == thread_id]:
+            del self.versions[key]
+
+    def _evict(self, current=None):
+        now = time.monotonic()
+        # Sessões ociosas: as mais antigas ficam no início da ordem
+        while self.last_used:
+            thread_id, used_at = next(iter(self.last_used.items()))
+            if thread_id == current or now - used_at < self.idle_ttl_seconds:
+                break
+            self._forget(thread_id)
+            self.evicted_idle += 1
+
+        # Limites globais: descartar as menos usadas recentemente (nunca a sessão atual)
+        while len(self.last_used) > 1 and (len(self.last_used) > self.max_sessions or self.total_bytes > self.max_bytes):
+            thread_id = next(iter(self.last_used))
+            if thread_id == current:
+                break
+            self._forget(thread_id)
+            self.evicted_capacity += 1
+
+    def evict_idle(self):
+        """Descarta sessões ociosas sem esperar a próxima mensagem (ex.: tarefa periódica)"""
+        with self.lock:
+            self._evict()
+
+    def get_stats(self) -> dict:
+        """Retorna as métricas da memória das conversas"""
+        with self.lock:
+            return {
+                "sessions": len(self.last_used),
+                "max_sessions": self.max_sessions,
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "evicted_idle": self.evicted_idle,
+                "evicted_capacity": self.evicted_capacity,
+                "pruned_checkpoints": self.pruned_checkpoints,
+            }
+
+
+def make_history_trimmer(max_tokens=2000):
+    """
+    Hook executado antes de cada chamada ao LLM (`pre_model_hook` do agente).
+
+    Mantém no estado apenas as mensagens mais recentes que cabem em
+    `max_tokens` (estimativa), começando sempre em uma pergunta do usuário
+    para não separar chamadas de ferramentas de suas respostas. Assim o
+    prompt de cada turno tem tamanho constante e a memória da sessão não
+    cresce. O turno atual é mantido inteiro, mesmo acima do limite.
+    """
+
+    def trim_history(state):
+        messages = state["messages"]
+        trimmed = trim_messages(
+            messages,
+            strategy="last",
+            token_counter=count_tokens_approximately,
+            max_tokens=max_tokens,
+            start_on="human",
+            end_on=("human", "tool"),
+        )
+        human_indexes = [index for index, message in enumerate(messages) if isinstance(message, HumanMessage)]
+        if human_indexes and len(trimmed) < len(messages) - human_indexes[-1]:
+            trimmed = messages[human_indexes[-1]:]
+
+        if len(trimmed) == len(messages):
+            return {"llm_input_messages": messages}
+        # Substituir o histórico salvo pela janela recortada. `llm_input_messages` também
+        # é atualizado: o valor do passo anterior permanece no estado e seria reenviado
+        return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *trimmed], "llm_input_messages": trimmed}
+
+    return trim_history
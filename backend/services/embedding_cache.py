@@ -0,0 +1,102 @@
+import sqlite3
+import hashlib
+import threading
+from array import array
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Limite de parâmetros por consulta no SQLite (versões antigas aceitam no máximo 999)
+_QUERY_CHUNK = 500
+
+
+class EmbeddingCache:
+    """
+    Cache persistente de embeddings em SQLite.
+
+    A chave é (modelo, SHA-256 do texto): o mesmo texto vetorizado por outro
+    modelo não colide. Os vetores são gravados como float32. Compartilhado
+    entre threads (uma conexão protegida por lock, em modo WAL).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " PRIMARY KEY (model, text_hash)"
+                ") WITHOUT ROWID"
+            )
+            self.conn.commit()
+        logger.info(f"Cache de embeddings: {path}")
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: list) -> list:
+        """
+        Busca os vetores dos textos.
+
+        Returns:
+            list: Vetor (list[float]) ou None para cada texto, na mesma ordem
+        """
+        keys = [self.text_key(text) for text in texts]
+        found = {}
+        with self.lock:
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), _QUERY_CHUNK):
+                chunk = unique_keys[start:start + _QUERY_CHUNK]
+                rows = self.conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({','.join('?' * len(chunk))})",
+                    [model, *chunk]
+                ).fetchall()
+                found.update(rows)
+
+            vectors = []
+            for key in keys:
+                blob = found.get(key)
+                vectors.append(array("f", blob).tolist() if blob is not None else None)
+            hits = sum(1 for vector in vectors if vector is not None)
+            self.hits += hits
+            self.misses += len(vectors) - hits
+        return vectors
+
+    def put_many(self, model: str, texts: list, vectors: list):
+        """Grava os vetores dos textos (substitui entradas existentes)"""
+        rows = [
+            (model, self.text_key(text), array("f", vector).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -1,158 +1,185 @@
 from llama_index.readers.file import PDFReader
 from llama_index.core.node_parser import SemanticSplitterNodeParser
-from llama_index.embeddings.ollama import OllamaEmbedding
-from qdrant_client import QdrantClient, models
+from qdrant_client import models
 from qdrant_client.models import Distance, VectorParams, PointStruct
+from services.ollama_embedding import OllamaBatchEmbedding
+from services.embedding_cache import EmbeddingCache
+from utils.logger import setup_logger
 import os
 import uuid
+import hashlib
 
-def create_collection(embed_model, qdrant_client, collection_name, diretorio):
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Dimensão dos vetores do modelo de embeddings (all-minilm:l6-v2)
+VECTOR_SIZE = 384
+
+# Campos com índice de texto completo (buscas por nome, departamento...)
+CAMPOS_INDEXADOS = ["id_lattes", "nome_professor", "departamento", "tipo_de_documento"]
+
+# Namespace dos ids determinísticos dos pontos (ver point_id)
+POINT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "tts-app/qdrant-points")
+
+# Tipos de documento da base de conhecimento
+TIPO_CURRICULO = "curriculo"
+TIPO_ARTIGO = "artigo"
+
+
+def create_embed_model(embed_model: str, batch_size: int = 32, cache_path: str = None):
+    """
+    Cria o modelo de embeddings do Ollama usado na ingestão (requisições em lote).
+
+    O mesmo objeto é usado pelo divisor semântico e pela vetorização dos nós,
+    então ambos compartilham o cache persistente em `cache_path` (se informado).
+    """
     ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-    embed_model = OllamaEmbedding(model_name=embed_model, base_url=ollama_base_url)
-    parser = SemanticSplitterNodeParser.from_defaults(embed_model=embed_model)
+    cache = EmbeddingCache(cache_path) if cache_path else None
+    return OllamaBatchEmbedding(model_name=embed_model, base_url=ollama_base_url,
+                                embed_batch_size=batch_size, cache=cache)
+
+
+def create_parser(embed_model):
+    """Divisor semântico: agrupa frases em nós pelos pontos de quebra de similaridade"""
+    return SemanticSplitterNodeParser.from_defaults(embed_model=embed_model)
 
-    # 3. Cria a coleção se não existir
+
+def ensure_collection(qdrant_client, collection_name: str):
+    """Cria a coleção e os índices de payload, se ainda não existirem"""
     if collection_name not in [c.name for c in qdrant_client.get_collections().collections]:
         qdrant_client.create_collection(
             collection_name=collection_name,
-            vectors_config=VectorParams(size=384, distance=Distance.COSINE)
+            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE)
         )
-        print(f"✅ Coleção '{collection_name}' criada.")
-    else:
-        print(f"⚠️ Coleção '{collection_name}' já existe.")
-
-    from qdrant_client.models import PayloadSchemaType
+        logger.info(f"Coleção '{collection_name}' criada")
 
     # ⚙️ Criação manual de índices em coleção já existente
-    campos_indexados = ["id_lattes", "nome_professor", "departamento", "tipo_de_documento"]
-
-    for campo in campos_indexados:
-        try:
-            qdrant_client.create_payload_index(
-                collection_name=collection_name,
-                field_name=campo,
-                field_schema=models.TextIndexParams(
-                    type="text",
-                    tokenizer=models.TokenizerType.MULTILINGUAL,
-                    min_token_len=2,
-                    max_token_len=15,
-                    lowercase=True,
-                ),
+    for campo in CAMPOS_INDEXADOS:
+        _create_payload_index(qdrant_client, collection_name, campo, models.TextIndexParams(
+            type="text",
+            tokenizer=models.TokenizerType.MULTILINGUAL,
+            min_token_len=2,
+            max_token_len=15,
+            lowercase=True,
+        ))
+
+    # Índice exato do arquivo de origem, usado para remover os vetores de um documento
+    _create_payload_index(qdrant_client, collection_name, "source", models.PayloadSchemaType.KEYWORD)
+
+
+def _create_payload_index(qdrant_client, collection_name, campo, schema):
+    try:
+        qdrant_client.create_payload_index(
+            collection_name=collection_name,
+            field_name=campo,
+            field_schema=schema,
+        )
+        logger.info(f"Índice criado para '{campo}'")
+    except Exception as e:
+        if "already exists" not in str(e).lower():
+            logger.error(f"Erro ao criar índice para '{campo}': {e}")
+
+
+def document_metadata(caminho_pdf: str, diretorio: str, tipo: str, documents: list) -> dict:
+    """
+    Metadados do payload de acordo com o tipo de documento.
+
+    Currículos: o nome do arquivo é o id do Lattes, a pasta logo abaixo de
+    `diretorio` é o departamento e o nome do professor está na segunda linha.
+    Artigos: o nome do arquivo é o nome do professor.
+    """
+    nome_arquivo = os.path.splitext(os.path.basename(caminho_pdf))[0]
+    if tipo == TIPO_CURRICULO:
+        caminho_relativo = os.path.relpath(os.path.dirname(caminho_pdf), diretorio)
+        partes = caminho_relativo.split(os.sep)
+        return {
+            "id_lattes": nome_arquivo,
+            "nome_professor": documents[0].text.strip().split("\n")[1],
+            "departamento": partes[0] if partes else "desconhecido",
+            "tipo_de_documento": TIPO_CURRICULO,
+        }
+    return {
+        "nome_professor": nome_arquivo,
+        "tipo_de_documento": TIPO_ARTIGO,
+    }
+
+
+def read_pdf(caminho_pdf: str) -> list:
+    """Lê o PDF (estágio de CPU; pode rodar em outro processo)"""
+    return PDFReader().load_data(caminho_pdf)
+
+
+def split_documents(parser, documents: list) -> list:
+    """Divide os documentos em nós e retorna os textos"""
+    return [node.text for node in parser.get_nodes_from_documents(documents)]
+
+
+def embed_texts(embed_model, textos: list) -> list:
+    """Converte os textos em vetores, em lotes de `embed_batch_size` textos por requisição"""
+    return embed_model.get_text_embedding_batch(textos) if textos else []
+
+
+def point_id(caminho_pdf: str, chunk_index: int, content_hash: str) -> str:
+    """
+    Id determinístico de um trecho: o mesmo arquivo, posição e conteúdo geram
+    sempre o mesmo id, então reprocessar um arquivo sobrescreve seus pontos
+    em vez de duplicá-los.
+    """
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{caminho_pdf}:{chunk_index}:{content_hash}"))
+
+
+def make_points(caminho_pdf: str, metadata: dict, textos: list, vetores: list) -> list:
+    """Monta os pontos do Qdrant de um arquivo (`source` identifica o arquivo de origem)"""
+    points = []
+    for chunk_index, (texto, vetor) in enumerate(zip(textos, vetores)):
+        content_hash = hashlib.sha256(texto.encode("utf-8")).hexdigest()
+        points.append(PointStruct(
+            id=point_id(caminho_pdf, chunk_index, content_hash),
+            vector=vetor,
+            payload={
+                **metadata,
+                "source": caminho_pdf,
+                "chunk_index": chunk_index,
+                "content_hash": content_hash,
+                "text": texto
+            }
+        ))
+    return points
+
+
+def upsert_points(qdrant_client, collection_name: str, points: list, batch_size: int = 64):
+    """Envia os pontos em lotes limitados (requisições menores e progresso salvo a cada lote)"""
+    for start in range(0, len(points), batch_size):
+        qdrant_client.upsert(
+            collection_name=collection_name,
+            points=points[start:start + batch_size],
+            wait=True
+        )
+
+
+def delete_stale_points(qdrant_client, collection_name: str, source: str, keep_ids: list):
+    """Remove os pontos de um arquivo que não estão em `keep_ids` (trechos de versões anteriores)"""
+    must_not = [models.HasIdCondition(has_id=keep_ids)] if keep_ids else []
+    qdrant_client.delete(
+        collection_name=collection_name,
+        points_selector=models.FilterSelector(
+            filter=models.Filter(
+                must=[models.FieldCondition(key="source", match=models.MatchValue(value=source))],
+                must_not=must_not
             )
-            
-            print(f"🔧 Índice criado para '{campo}'.")
-        except Exception as e:
-            if "already exists" in str(e).lower():
-                print(f"⚠️ Índice para '{campo}' já existe, ignorando.")
-            else:
-                print(f"❌ Erro ao criar índice para '{campo}': {e}")
-
-    # 4. Percorre e processa PDFs
-    for root, dirs, files in os.walk(diretorio):
-        for file in files:
-            if file.lower().endswith(".pdf"):
-                try:
-                    caminho_pdf = os.path.join(root, file)
-
-                    # Extrai o id do lattes (sem extensão)
-                    id_lattes = os.path.splitext(file)[0]
-
-                    # Extrai o nome do departamento (pasta logo abaixo de 'ccen-docentes')
-                    caminho_relativo = os.path.relpath(root, diretorio)
-                    partes = caminho_relativo.split(os.sep)
-                    departamento = partes[0] if partes else "desconhecido"
-
-                    # ⚠️ Verifica se o id_lattes já está no Qdrant
-                    response = qdrant_client.scroll(
-                        collection_name=collection_name,
-                        scroll_filter={"must": [{"key": "id_lattes", "match": {"value": id_lattes}}]},
-                        limit=1
-                    )
-                    if response[0]:  # Já existe vetor com esse id_lattes
-                        print(f"⏭️ Já processado: {id_lattes}, pulando...")
-                        continue
-
-                    print(f"\n📄 Processando: {caminho_pdf}")
-                    print(f"🔎 Departamento: {departamento} | ID Lattes: {id_lattes}")
-
-                    # Lê e divide em nós
-                    documents = PDFReader().load_data(caminho_pdf)
-                    nodes = parser.get_nodes_from_documents(documents)
-
-                    # Extrai o nome do professor da primeira linha
-                    nome_professor = documents[0].text.strip().split("\n")[1]
-
-                    # Converte cada nó em vetor e insere
-                    points = []
-                    for node in nodes:
-                        texto = node.text
-                        vetor = embed_model.get_text_embedding(texto)
-                        ponto = PointStruct(
-                            id=str(uuid.uuid4()),
-                            vector=vetor,
-                            payload={
-                                "id_lattes": id_lattes,
-                                "nome_professor": nome_professor,
-                                "departamento": departamento,
-                                "source": caminho_pdf,
-                                "tipo_de_documento": "curriculo",
-                                "text": texto
-                            }
-                        )
-                        points.append(ponto)
-
-                    if points:
-                        qdrant_client.upsert(collection_name=collection_name, points=points)
-                        print(f"✅ Inseridos {len(points)} vetores de '{file}'")
-                except Exception as e:
-                    print(f"❌ Erro ao processar '{file}': {e}")
-
-    for root, dirs, files in os.walk("articles"):
-        for file in files:
-            if file.lower().endswith(".pdf"):
-                try:
-                    caminho_pdf = os.path.join(root, file)
-
-                    # Extrai o id do lattes (sem extensão)
-                    nome_professor = os.path.splitext(file)[0]
-
-                    # ⚠️ Verifica se o id_lattes já está no Qdrant
-                    response = qdrant_client.scroll(
-                        collection_name=collection_name,
-                        scroll_filter={"must": [{"key": "nome_professor", "match": {"value": nome_professor}}]},
-                        limit=1
-                    )
-                    if response[0]:  # Já existe vetor com esse id_lattes
-                        print(f"⏭️ Já processado: {nome_professor}, pulando...")
-                        continue
-
-                    print(f"\n📄 Processando: {caminho_pdf}")
-
-                    # Lê e divide em nós
-                    documents = PDFReader().load_data(caminho_pdf)
-                    nodes = parser.get_nodes_from_documents(documents)
-
-                    # Converte cada nó em vetor e insere
-                    points = []
-                    for node in nodes:
-                        texto = node.text
-                        vetor = embed_model.get_text_embedding(texto)
-                        ponto = PointStruct(
-                            id=str(uuid.uuid4()),
-                            vector=vetor,
-                            payload={
-                                "nome_professor": nome_professor,
-                                "source": caminho_pdf,
-                                "tipo_de_documento": "artigo",
-                                "text": texto
-                            }
-                        )
-                        points.append(ponto)
-
-                    if points:
-                        qdrant_client.upsert(collection_name=collection_name, points=points)
-                        print(f"✅ Inseridos {len(points)} vetores de '{file}'")
-                except Exception as e:
-                    print(f"❌ Erro ao processar '{file}': {e}")
-
-    print("\n🚀 Finalizado!")
+        ),
+        wait=True
+    )
+
+
+def delete_source_points(qdrant_client, collection_name: str, source: str):
+    """Remove todos os vetores de um arquivo de origem"""
+    qdrant_client.delete(
+        collection_name=collection_name,
+        points_selector=models.FilterSelector(
+            filter=models.Filter(must=[
+                models.FieldCondition(key="source", match=models.MatchValue(value=source))
+            ])
+        ),
+        wait=True
+    )
@@ -0,0 +1,276 @@
+import os
+import json
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from services.embeddings import (
+    create_embed_model,
+    create_parser,
+    ensure_collection,
+    document_metadata,
+    read_pdf,
+    split_documents,
+    embed_texts,
+    make_points,
+    upsert_points,
+    delete_stale_points,
+    delete_source_points,
+)
+from services.ingestion_pipeline import IngestionJob, IngestionPipeline, IngestionReport
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+
+def file_sha256(path: str) -> str:
+    """Hash SHA-256 do conteúdo do arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IndexManifest:
+    """
+    Registro local dos arquivos já indexados.
+
+    Estrutura (JSON): {source: {"size", "mtime", "sha256", "tipo", "points", "indexed_at"}}.
+    É salvo após cada arquivo concluído, então uma execução interrompida
+    retoma do arquivo em que parou.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def save(self):
+        # Escrita atômica: um manifesto corrompido forçaria reindexar tudo
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+# Concorrência padrão de cada estágio do pipeline de ingestão
+DEFAULT_STAGE_WORKERS = {"parse": 2, "split": 2, "embed": 2, "upsert": 1}
+
+
+class DocumentIndexer:
+    """
+    Indexação incremental dos PDFs da base de conhecimento no Qdrant.
+
+    Compara os arquivos em disco com o manifesto: arquivos novos ou alterados
+    são (re)indexados, com os trechos que deixaram de existir removidos depois; arquivos
+    removidos do disco têm seus vetores apagados. Arquivos com mesmo tamanho
+    e data de modificação nem chegam a ser lidos.
+
+    Os arquivos a indexar passam por um pipeline de quatro estágios
+    (parse → split → embed → upsert), cada um com sua concorrência, de modo
+    que a leitura dos PDFs (CPU) sobrepõe a vetorização e a escrita no
+    Qdrant (E/S) de outros arquivos.
+    """
+
+    def __init__(self, qdrant_client, collection_name: str, embed_model: str, sources: list, manifest_path: str,
+                 embed_batch_size: int = 32, stage_workers: dict = None, queue_size: int = 4,
+                 parse_processes: int = 0, embed_cache_path: str = None, upsert_batch_size: int = 64):
+        """
+        Args:
+            qdrant_client (QdrantClient): Cliente do Qdrant
+            collection_name (str): Coleção de destino
+            embed_model (str): Modelo de embeddings do Ollama
+            sources (list[tuple[str, str]]): Pares (diretório, tipo de documento)
+            manifest_path (str): Caminho do manifesto JSON
+            embed_batch_size (int): Textos por requisição de embeddings
+            stage_workers (dict): Workers por estágio (parse, split, embed, upsert)
+            queue_size (int): Capacidade das filas entre estágios
+            parse_processes (int): Processos para ler PDFs (0 = nas threads do estágio parse)
+            embed_cache_path (str): Arquivo SQLite do cache de embeddings (None desativa)
+            upsert_batch_size (int): Pontos por requisição de upsert ao Qdrant
+        """
+        self.qdrant_client = qdrant_client
+        self.collection_name = collection_name
+        self.embed_model_name = embed_model
+        self.embed_batch_size = embed_batch_size
+        self.sources = sources
+        self.manifest = IndexManifest(manifest_path)
+        self.stage_workers = {**DEFAULT_STAGE_WORKERS, **(stage_workers or {})}
+        self.queue_size = queue_size
+        self.parse_processes = parse_processes
+        self.embed_cache_path = embed_cache_path
+        self.upsert_batch_size = upsert_batch_size
+        self.embed_model = None
+        self.parser = None
+        self.parse_pool = None
+
+    def scan(self) -> dict:
+        """Arquivos PDF atualmente em disco: {source: (diretório, tipo, os.stat_result)}"""
+        found = {}
+        for diretorio, tipo in self.sources:
+            for root, dirs, files in os.walk(diretorio):
+                for file in files:
+                    if file.lower().endswith(".pdf"):
+                        caminho_pdf = os.path.join(root, file)
+                        found[caminho_pdf] = (diretorio, tipo, os.stat(caminho_pdf))
+        return found
+
+    def plan(self, full=False) -> dict:
+        """
+        Compara disco e manifesto.
+
+        Returns:
+            dict: {"index": [(source, diretório, tipo, stat, sha256)], "removed": [source], "unchanged": int}
+        """
+        found = self.scan()
+        to_index = []
+        unchanged = 0
+        touched = False
+
+        for source, (diretorio, tipo, stat) in sorted(found.items()):
+            entry = self.manifest.entries.get(source)
+            if not full and entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                unchanged += 1
+                continue
+
+            sha256 = file_sha256(source)
+            if not full and entry and entry["sha256"] == sha256:
+                # Só a data mudou (cópia, checkout...): atualizar o manifesto sem reindexar
+                entry["mtime"] = stat.st_mtime
+                touched = True
+                unchanged += 1
+                continue
+            to_index.append((source, diretorio, tipo, stat, sha256))
+
+        if touched:
+            self.manifest.save()
+
+        removed = sorted(source for source in self.manifest.entries if source not in found)
+        return {"index": to_index, "removed": removed, "unchanged": unchanged}
+
+    def _ensure_models(self):
+        if self.embed_model is None:
+            self.embed_model = create_embed_model(self.embed_model_name, self.embed_batch_size, self.embed_cache_path)
+            self.parser = create_parser(self.embed_model)
+
+    def _parse(self, job: IngestionJob):
+        if self.parse_pool is not None:
+            job.documents = self.parse_pool.submit(read_pdf, job.source).result()
+        else:
+            job.documents = read_pdf(job.source)
+        job.metadata = document_metadata(job.source, job.diretorio, job.tipo, job.documents)
+
+    def _split(self, job: IngestionJob):
+        job.texts = split_documents(self.parser, job.documents)
+        job.documents = None
+
+    def _embed(self, job: IngestionJob):
+        job.vectors = embed_texts(self.embed_model, job.texts)
+
+    def _upsert(self, job: IngestionJob):
+        points = make_points(job.source, job.metadata, job.texts, job.vectors)
+        # Ids determinísticos: reenviar um trecho já gravado apenas o sobrescreve
+        upsert_points(self.qdrant_client, self.collection_name, points, self.upsert_batch_size)
+        # Só depois de gravar a nova versão: remover trechos antigos (versão anterior,
+        # execução interrompida ou pontos com ids aleatórios da ingestão antiga)
+        delete_stale_points(self.qdrant_client, self.collection_name, job.source, [point.id for point in points])
+        job.points = len(points)
+        job.texts = job.vectors = None
+
+    def _complete(self, job: IngestionJob, report: IngestionReport):
+        """Registra o resultado de um arquivo (roda na thread principal)"""
+        if job.error is not None:
+            report.add_failure(job.source, job.error, job.failed_stage)
+            logger.error(f"Erro ao processar '{job.source}' ({job.failed_stage}): {job.error}")
+            return
+
+        self.manifest.entries[job.source] = {
+            "size": job.stat.st_size,
+            "mtime": job.stat.st_mtime,
+            "sha256": job.sha256,
+            "tipo": job.tipo,
+            "points": job.points,
+            "indexed_at": time.time(),
+        }
+        self.manifest.save()
+        report.add_success(job, job.points)
+        logger.info(f"Indexado {job.source}: {job.points} vetores em {time.perf_counter() - job.started_at:.2f}s")
+
+    def run(self, dry_run=False, full=False) -> dict:
+        """
+        Executa uma passada de indexação.
+
+        Args:
+            dry_run (bool): Apenas reporta o que seria feito
+            full (bool): Reindexa todos os arquivos, ignorando o manifesto
+
+        Returns:
+            dict: Resumo da execução (ver IngestionReport.as_dict)
+        """
+        start = time.perf_counter()
+        plan = self.plan(full=full)
+        report = IngestionReport(unchanged=plan["unchanged"])
+        logger.info(f"Indexação: {len(plan['index'])} arquivo(s) a indexar, {len(plan['removed'])} removido(s), "
+                    f"{plan['unchanged']} inalterado(s)")
+
+        if dry_run:
+            for source, *_ in plan["index"]:
+                logger.info(f"[dry-run] indexaria {source}")
+            for source in plan["removed"]:
+                logger.info(f"[dry-run] removeria {source}")
+            return report.as_dict()
+
+        if plan["index"] or plan["removed"]:
+            ensure_collection(self.qdrant_client, self.collection_name)
+
+        for source in plan["removed"]:
+            try:
+                delete_source_points(self.qdrant_client, self.collection_name, source)
+                del self.manifest.entries[source]
+                self.manifest.save()
+                report.removed += 1
+                logger.info(f"Vetores removidos: {source}")
+            except Exception as e:
+                report.add_failure(source, str(e))
+
+        if plan["index"]:
+            self._index_files(plan["index"], report)
+
+        report.elapsed_s = time.perf_counter() - start
+        if self.embed_model is not None:
+            report.embedding_stats = self.embed_model.get_stats()
+        report.log_summary()
+        return report.as_dict()
+
+    def _index_files(self, files: list, report: IngestionReport):
+        self._ensure_models()
+        workers = self.stage_workers
+        if self.parse_processes > 0:
+            # Leitura de PDF é Python puro (presa ao GIL): processos paralelizam de fato, mas
+            # cada um paga a importação do llama-index; compensa em bases grandes com PDFs pesados
+            self.parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+        jobs = [
+            IngestionJob(source, diretorio=diretorio, tipo=tipo, stat=stat, sha256=sha256)
+            for source, diretorio, tipo, stat, sha256 in files
+        ]
+        pipeline = IngestionPipeline([
+            ("parse", self._parse, workers["parse"]),
+            ("split", self._split, workers["split"]),
+            ("embed", self._embed, workers["embed"]),
+            ("upsert", self._upsert, workers["upsert"]),
+        ], queue_size=self.queue_size)
+
+        try:
+            pipeline.run(jobs, lambda job: self._complete(job, report))
+        finally:
+            if self.parse_pool is not None:
+                self.parse_pool.shutdown()
+                self.parse_pool = None
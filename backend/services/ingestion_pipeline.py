@@ -0,0 +1,167 @@
+import time
+import queue
+import threading
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Marcador de fim de fluxo entre os estágios
+_END = object()
+
+
+class IngestionJob:
+    """Um arquivo atravessando o pipeline; cada estágio preenche seus campos."""
+
+    def __init__(self, source: str, **fields):
+        self.source = source
+        self.__dict__.update(fields)
+        self.error = None
+        self.failed_stage = None
+        self.stage_seconds = {}
+        self.started_at = time.perf_counter()
+
+
+class IngestionReport:
+    """Resumo de uma execução de indexação (arquivos, vetores, falhas e tempo por estágio)."""
+
+    def __init__(self, unchanged=0):
+        self.indexed = 0
+        self.removed = 0
+        self.unchanged = unchanged
+        self.points = 0
+        self.failed = []
+        self.stage_seconds = {}
+        self.embedding_stats = None
+        self.elapsed_s = 0.0
+
+    def add_success(self, job: IngestionJob, points: int):
+        self.indexed += 1
+        self.points += points
+        self._add_stage_times(job)
+
+    def add_failure(self, source: str, error: str, stage: str = None):
+        self.failed.append({"source": source, "stage": stage, "error": error})
+
+    def _add_stage_times(self, job: IngestionJob):
+        for stage, seconds in job.stage_seconds.items():
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "indexed": self.indexed,
+            "removed": self.removed,
+            "unchanged": self.unchanged,
+            "points": self.points,
+            "failed": self.failed,
+            "stage_seconds": {stage: round(seconds, 2) for stage, seconds in self.stage_seconds.items()},
+            "embedding": self.embedding_stats,
+            "elapsed_s": round(self.elapsed_s, 2),
+        }
+
+    def log_summary(self):
+        logger.info(f"Indexação concluída em {self.elapsed_s:.2f}s: {self.indexed} indexado(s), "
+                    f"{self.removed} removido(s), {self.unchanged} inalterado(s), "
+                    f"{self.points} vetores, {len(self.failed)} falha(s)")
+        if self.stage_seconds:
+            stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.stage_seconds.items())
+            logger.info(f"Tempo acumulado por estágio: {stages}")
+        if self.embedding_stats:
+            cache = self.embedding_stats.get("cache")
+            cache_text = f", cache {cache['hits']} acerto(s) / {cache['misses']} falta(s)" if cache else ""
+            logger.info(f"Embeddings: {self.embedding_stats['requests']} requisição(ões), "
+                        f"{self.embedding_stats['texts']} texto(s) vetorizados pelo Ollama{cache_text}")
+        for failure in self.failed:
+            logger.error(f"Falha em '{failure['source']}' ({failure['stage'] or 'remoção'}): {failure['error']}")
+
+
+class IngestionPipeline:
+    """
+    Pipeline de estágios com filas limitadas entre eles.
+
+    Cada estágio é uma função que recebe um IngestionJob e preenche seus
+    campos, executada por `workers` threads próprias. Enquanto um arquivo
+    é vetorizado, outros já estão sendo lidos e divididos; as filas
+    limitadas impedem que um estágio rápido acumule arquivos em memória à
+    frente de um lento. Uma exceção marca apenas aquele arquivo como falho:
+    ele pula os estágios seguintes e os demais continuam.
+    """
+
+    def __init__(self, stages: list, queue_size: int = 4):
+        """
+        Args:
+            stages (list[tuple[str, callable, int]]): (nome, função, workers) na ordem de execução
+            queue_size (int): Capacidade de cada fila entre estágios
+
+        Raises:
+            ValueError: Se algum estágio tiver menos de um worker (o pipeline nunca terminaria)
+        """
+        for name, _, workers in stages:
+            if workers < 1:
+                raise ValueError(f"O estágio '{name}' precisa de pelo menos um worker (recebeu {workers})")
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, jobs: list, on_complete):
+        """
+        Processa os jobs e chama `on_complete(job)` (na thread chamadora) para
+        cada um que terminar, com sucesso (`job.error is None`) ou não.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        # A fila de concluídos não é limitada: quem a consome é a thread chamadora
+        done = queue.Queue()
+        threads = []
+
+        for index, (name, fn, workers) in enumerate(self.stages):
+            is_last = index == len(self.stages) - 1
+            output = done if is_last else queues[index + 1]
+            next_workers = 1 if is_last else self.stages[index + 1][2]
+            remaining = [workers]
+            lock = threading.Lock()
+
+            def work(name=name, fn=fn, source=queues[index], output=output,
+                     next_workers=next_workers, remaining=remaining, lock=lock):
+                while True:
+                    job = source.get()
+                    if job is _END:
+                        break
+                    if job.error is None:
+                        start = time.perf_counter()
+                        try:
+                            fn(job)
+                        except Exception as e:
+                            job.error = str(e)
+                            job.failed_stage = name
+                        job.stage_seconds[name] = time.perf_counter() - start
+                    output.put(job)
+                # O último worker do estágio encerra os workers do estágio seguinte
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    for _ in range(next_workers):
+                        output.put(_END)
+
+            for number in range(workers):
+                thread = threading.Thread(target=work, name=f"ingest-{name}-{number}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        def feed():
+            for job in jobs:
+                queues[0].put(job)
+            for _ in range(self.stages[0][2]):
+                queues[0].put(_END)
+
+        feeder = threading.Thread(target=feed, name="ingest-feed", daemon=True)
+        feeder.start()
+
+        while True:
+            job = done.get()
+            if job is _END:
+                break
+            on_complete(job)
+
+        feeder.join()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,61 @@
+from typing import List
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Modelos do Ollama e o equivalente no sentence-transformers (mesmos pesos e dimensão):
+# vetores gerados localmente são compatíveis com os já gravados na coleção
+LOCAL_EQUIVALENTS = {
+    "all-minilm": "sentence-transformers/all-MiniLM-L6-v2",
+    "all-minilm:latest": "sentence-transformers/all-MiniLM-L6-v2",
+    "all-minilm:l6-v2": "sentence-transformers/all-MiniLM-L6-v2",
+    "all-minilm:22m": "sentence-transformers/all-MiniLM-L6-v2",
+    "all-minilm:33m": "sentence-transformers/all-MiniLM-L12-v2",
+    "all-minilm:l12-v2": "sentence-transformers/all-MiniLM-L12-v2",
+}
+
+
+def resolve_local_model(embed_model: str) -> str:
+    """Nome do modelo sentence-transformers correspondente ao modelo do Ollama"""
+    if embed_model in LOCAL_EQUIVALENTS:
+        return LOCAL_EQUIVALENTS[embed_model]
+    if "/" in embed_model:
+        # Já é um nome do Hugging Face (ou um caminho local)
+        return embed_model
+    raise ValueError(
+        f"Modelo de embeddings '{embed_model}' sem equivalente local conhecido. "
+        f"Suportados: {', '.join(sorted(LOCAL_EQUIVALENTS))}"
+    )
+
+
+class LocalQueryEmbeddings:
+    """
+    Embeddings de consulta calculados no próprio processo (sentence-transformers).
+
+    Mesma interface do OllamaEmbeddings usada pelas ferramentas de busca
+    (`embed_query`/`embed_documents`), sem a ida e volta HTTP ao Ollama: o
+    MiniLM de 384 dimensões vetoriza uma consulta em poucos milissegundos
+    em CPU. Os vetores saem normalizados, como os do Ollama.
+    """
+
+    def __init__(self, embed_model: str, device: str = "cpu"):
+        """
+        Args:
+            embed_model (str): Modelo do Ollama (ver LOCAL_EQUIVALENTS) ou nome do Hugging Face
+            device (str): Dispositivo do PyTorch ("cpu" ou "cuda")
+        """
+        # Importação tardia: o torch só é carregado quando o backend local é usado
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = resolve_local_model(embed_model)
+        self.model = SentenceTransformer(self.model_name, device=device)
+        # Aquecimento: a primeira inferência inclui a inicialização do torch
+        self.embed_query("aquecimento")
+        logger.info(f"Embeddings de consulta locais: {self.model_name} ({device})")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.encode(text, normalize_embeddings=True, convert_to_numpy=True).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True).tolist()
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import threading
+from typing import List
+import httpx
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import Field, PrivateAttr
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# O httpx registra cada requisição em INFO: na ingestão seriam milhares de linhas
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def _route_missing(response: httpx.Response) -> bool:
+    """
+    Se o 404 veio de um Ollama sem a rota. Com a rota existente, o 404 traz
+    um JSON com `error` (ex.: modelo não encontrado), que não deve cair
+    para o endpoint antigo.
+    """
+    if response.status_code != 404:
+        return False
+    try:
+        body = response.json()
+    except ValueError:
+        return True
+    return not (isinstance(body, dict) and "error" in body)
+
+
+class OllamaBatchEmbedding(BaseEmbedding):
+    """
+    Embeddings do Ollama em lote, sobre uma conexão HTTP reutilizada.
+
+    Cada chamada a `get_text_embedding_batch` (usada pelo divisor semântico
+    e pela ingestão) envia até `embed_batch_size` textos em uma única
+    requisição a `/api/embed`. Versões antigas do Ollama, sem esse endpoint,
+    caem para `/api/embeddings`, um texto por requisição.
+
+    Com um EmbeddingCache, textos já vetorizados (em execuções anteriores ou
+    pelo divisor semântico) são lidos do cache em vez de ir ao Ollama.
+    """
+
+    base_url: str = Field(default="http://localhost:11434", description="URL do servidor Ollama")
+    timeout: float = Field(default=120.0, description="Timeout de cada requisição (s)")
+
+    _client: httpx.Client = PrivateAttr()
+    _cache: object = PrivateAttr(default=None)
+    _batch_endpoint: bool = PrivateAttr(default=True)
+    _stats_lock: threading.Lock = PrivateAttr()
+    _requests: int = PrivateAttr(default=0)
+    _texts: int = PrivateAttr(default=0)
+
+    def __init__(self, model_name: str, base_url: str = "http://localhost:11434", embed_batch_size: int = 32,
+                 timeout: float = 120.0, cache=None, **kwargs):
+        super().__init__(model_name=model_name, base_url=base_url, embed_batch_size=embed_batch_size,
+                         timeout=timeout, **kwargs)
+        # Conexões keep-alive: evita um handshake TCP por requisição
+        self._client = httpx.Client(base_url=base_url, timeout=timeout)
+        self._stats_lock = threading.Lock()
+        self._cache = cache
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "OllamaBatchEmbedding"
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        if self._batch_endpoint:
+            response = self._client.post("/api/embed", json={"model": self.model_name, "input": texts})
+            if not _route_missing(response):
+                response.raise_for_status()
+                self._count(1, len(texts))
+                return response.json()["embeddings"]
+            logger.warning("Ollama sem /api/embed, usando /api/embeddings (um texto por requisição)")
+            self._batch_endpoint = False
+
+        embeddings = []
+        for text in texts:
+            response = self._client.post("/api/embeddings", json={"model": self.model_name, "prompt": text})
+            response.raise_for_status()
+            embeddings.append(response.json()["embedding"])
+        self._count(len(texts), len(texts))
+        return embeddings
+
+    def _count(self, requests: int, texts: int):
+        with self._stats_lock:
+            self._requests += requests
+            self._texts += texts
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed([query])[0]
+
+    def _embed_cached(self, texts: List[str]) -> List[List[float]]:
+        if self._cache is None:
+            return self._embed(texts)
+
+        vectors = self._cache.get_many(self.model_name, texts)
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # Textos repetidos no mesmo lote vão uma única vez ao Ollama
+            unique_texts = list(dict.fromkeys(texts[index] for index in missing))
+            new_vectors = self._embed(unique_texts)
+            self._cache.put_many(self.model_name, unique_texts, new_vectors)
+            by_text = dict(zip(unique_texts, new_vectors))
+            for index in missing:
+                vectors[index] = by_text[texts[index]]
+        return vectors
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed_cached([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._embed_cached(texts)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return await asyncio.to_thread(self._get_query_embedding, query)
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return await asyncio.to_thread(self._get_text_embedding, text)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self._get_text_embeddings, texts)
+
+    def get_stats(self) -> dict:
+        """Requisições HTTP feitas, textos vetorizados pelo Ollama e uso do cache"""
+        with self._stats_lock:
+            stats = {"requests": self._requests, "texts": self._texts}
+        if self._cache is not None:
+            stats["cache"] = self._cache.get_stats()
+        return stats
+
+    def close(self):
+        self._client.close()
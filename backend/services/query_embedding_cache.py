@@ -0,0 +1,90 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Normaliza a consulta para que variações de espaços e maiúsculas gerem a mesma chave"""
+    return re.sub(r'\s+', ' ', query).strip().lower()
+
+
+class QueryEmbeddingCache:
+    """
+    Cache em memória dos vetores de consulta das ferramentas de busca.
+
+    A chave é (modelo, consulta normalizada): a mesma pergunta feita em
+    outro turno ou por outro visitante reaproveita o vetor sem ir ao Ollama.
+    LRU limitado em número de entradas, com expiração por tempo. Compartilhado
+    entre as threads do agente.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600):
+        """
+        Args:
+            max_entries (int): Número máximo de vetores guardados
+            ttl_seconds (float): Validade de cada vetor, em segundos (0 = sem expiração)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def get(self, model: str, query: str):
+        """
+        Returns:
+            list[float] | None: Vetor da consulta ou None se ausente/expirado
+        """
+        key = (model, normalize_query(query))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                vector, stored_at = entry
+                if not self.ttl_seconds or time.monotonic() - stored_at < self.ttl_seconds:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self.entries[key]
+                self.expired += 1
+            self.misses += 1
+            return None
+
+    def put(self, model: str, query: str, vector: list):
+        key = (model, normalize_query(query))
+        with self.lock:
+            self.entries[key] = (vector, time.monotonic())
+            self.entries.move_to_end(key)
+            # Despejar os menos usados recentemente
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_or_compute(self, model: str, query: str, compute):
+        """Retorna o vetor do cache ou calcula com `compute(query)` e armazena"""
+        vector = self.get(model, query)
+        if vector is None:
+            # Calculado fora do lock: consultas diferentes não esperam umas pelas outras
+            vector = compute(query)
+            self.put(model, query, vector)
+        return vector
+
+    def get_stats(self) -> dict:
+        """Retorna as métricas do cache"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,306 @@
+import json
+import time
+import heapq
+import sqlite3
+import itertools
+import threading
+from abc import ABC, abstractmethod
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+
+class ResponseStore(ABC):
+    """
+    Respostas recentes por sessão, para recuperação após queda de conexão.
+
+    Uma resposta é guardada por (session_id, message_hash) e expira após
+    `ttl_seconds`; `/pending_responses/{session_id}` lista as ainda válidas.
+    """
+
+    def __init__(self, ttl_seconds=300):
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def put(self, session_id: str, message_hash: str, response_data: dict):
+        """Guarda a resposta da sessão (substitui a de mesmo message_hash)"""
+
+    @abstractmethod
+    def get(self, session_id: str, message_hash: str):
+        """
+        Returns:
+            dict | None: Resposta guardada ou None se ausente/expirada
+        """
+
+    @abstractmethod
+    def pending(self, session_id: str) -> list:
+        """
+        Returns:
+            list[dict]: [{"message_hash", "response", "timestamp"}] das respostas válidas da sessão
+        """
+
+    @abstractmethod
+    def cleanup(self):
+        """Remove respostas expiradas"""
+
+    def get_stats(self) -> dict:
+        return {}
+
+
+class MemoryResponseStore(ResponseStore):
+    """
+    Respostas na memória do processo (perdidas em um restart; não compartilhadas entre workers).
+
+    A expiração usa um heap ordenado pelo instante de expiração: cada
+    operação remove apenas as entradas que já venceram, sem percorrer todas
+    as sessões. O total é limitado em bytes (as mais antigas saem primeiro)
+    e cada sessão guarda no máximo `max_entries_per_session` respostas.
+    """
+
+    def __init__(self, ttl_seconds=300, max_bytes=16 * 1024 * 1024, max_entries_per_session=20):
+        """
+        Args:
+            ttl_seconds (float): Validade de cada resposta, em segundos
+            max_bytes (int): Tamanho máximo (JSON) de todas as respostas, em bytes
+            max_entries_per_session (int): Respostas mantidas por sessão (as mais recentes)
+        """
+        super().__init__(ttl_seconds)
+        self.max_bytes = max_bytes
+        self.max_entries_per_session = max_entries_per_session
+        # {session_id: {message_hash: (data, timestamp, bytes, sequência)}}, em ordem de inserção
+        self.entries = {}
+        # Heap de (expira_em, sequência, session_id, message_hash); entradas substituídas
+        # ou despejadas ficam no heap e são ignoradas quando chegam ao topo
+        self.expiry_heap = []
+        self.sequence = itertools.count()
+        self.current_bytes = 0
+        self.lock = threading.Lock()
+
+        # Métricas
+        self.expired = 0
+        self.evicted = 0
+
+    def _remove(self, session_id, message_hash):
+        messages = self.entries[session_id]
+        _, _, size, _ = messages.pop(message_hash)
+        self.current_bytes -= size
+        if not messages:
+            del self.entries[session_id]
+
+    def _pop_oldest(self, now=None) -> bool:
+        """
+        Remove a entrada no topo do heap (a próxima a expirar). Com `now`, só se já expirou.
+
+        Returns:
+            bool: Se havia uma entrada a remover
+        """
+        while self.expiry_heap:
+            expires_at, sequence, session_id, message_hash = self.expiry_heap[0]
+            if now is not None and expires_at > now:
+                return False
+            heapq.heappop(self.expiry_heap)
+            entry = self.entries.get(session_id, {}).get(message_hash)
+            # Entrada substituída depois (outra sequência) ou já removida: item obsoleto do heap
+            if entry is None or entry[3] != sequence:
+                continue
+            self._remove(session_id, message_hash)
+            return True
+        return False
+
+    def _expire(self, now):
+        while self._pop_oldest(now):
+            self.expired += 1
+
+    def put(self, session_id: str, message_hash: str, response_data: dict):
+        now = time.time()
+        size = len(json.dumps(response_data, ensure_ascii=False).encode("utf-8"))
+        if size > self.max_bytes:
+            # Não cabe nem sozinha: guardá-la despejaria todas as outras antes de sair
+            logger.warning(f"Resposta de {size} bytes acima do limite ({self.max_bytes}), não guardada")
+            return
+        with self.lock:
+            self._expire(now)
+            messages = self.entries.setdefault(session_id, {})
+            if message_hash in messages:
+                # Reinserir para ir ao fim da ordem da sessão
+                self._remove(session_id, message_hash)
+                messages = self.entries.setdefault(session_id, {})
+            sequence = next(self.sequence)
+            messages[message_hash] = (response_data, now, size, sequence)
+            self.current_bytes += size
+            heapq.heappush(self.expiry_heap, (now + self.ttl_seconds, sequence, session_id, message_hash))
+
+            # Limite por sessão: descartar as respostas mais antigas da própria sessão
+            while len(messages) > self.max_entries_per_session:
+                self._remove(session_id, next(iter(messages)))
+                self.evicted += 1
+
+            # Limite global em bytes: descartar as mais antigas de qualquer sessão
+            while self.current_bytes > self.max_bytes and self._pop_oldest():
+                self.evicted += 1
+
+    def get(self, session_id: str, message_hash: str):
+        with self.lock:
+            self._expire(time.time())
+            entry = self.entries.get(session_id, {}).get(message_hash)
+            return entry[0] if entry else None
+
+    def pending(self, session_id: str) -> list:
+        with self.lock:
+            self._expire(time.time())
+            # Após a expiração, tudo que resta é válido e já está em ordem de chegada
+            return [
+                {'message_hash': message_hash, 'response': data, 'timestamp': timestamp}
+                for message_hash, (data, timestamp, _, _) in self.entries.get(session_id, {}).items()
+            ]
+
+    def cleanup(self):
+        with self.lock:
+            self._expire(time.time())
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self.entries),
+                "entries": sum(len(messages) for messages in self.entries.values()),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+
+class SqliteResponseStore(ResponseStore):
+    """
+    Respostas em um arquivo SQLite (modo WAL), com índices por sessão e por data.
+
+    Sobrevive a restarts e é compartilhado entre vários workers do uvicorn
+    na mesma máquina: a resposta gerada em um processo pode ser recuperada
+    pelo cliente ao reconectar em outro. Cada processo usa uma conexão
+    própria; o SQLite serializa as escritas entre eles. Como na memória, o
+    total é limitado em bytes (as mais antigas saem primeiro).
+    """
+
+    # Intervalo mínimo entre limpezas (cada uma é um DELETE pelo índice de data)
+    CLEANUP_INTERVAL_SECONDS = 30
+
+    def __init__(self, path: str, ttl_seconds=300, max_bytes=16 * 1024 * 1024, max_entries_per_session=20):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries_per_session = max_entries_per_session
+        self.lock = threading.Lock()
+        self.last_cleanup = 0.0
+        # timeout: espera pelo lock de escrita de outro processo em vez de falhar
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " session_id TEXT NOT NULL,"
+                " message_hash TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " timestamp REAL NOT NULL,"
+                " bytes INTEGER NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (session_id, message_hash)"
+                ")"
+            )
+            # Arquivos criados antes do limite em bytes não têm a coluna
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(responses)")]
+            if "bytes" not in columns:
+                self.conn.execute("ALTER TABLE responses ADD COLUMN bytes INTEGER NOT NULL DEFAULT 0")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS responses_timestamp ON responses (timestamp)")
+            self.conn.commit()
+        logger.info(f"Respostas das sessões em SQLite: {path}")
+
+    def put(self, session_id: str, message_hash: str, response_data: dict):
+        response = json.dumps(response_data, ensure_ascii=False)
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            logger.warning(f"Resposta de {size} bytes acima do limite ({self.max_bytes}), não guardada")
+            return
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (session_id, message_hash, response, timestamp, bytes) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (session_id, message_hash, response, time.time(), size)
+            )
+            # Limite por sessão: manter apenas as respostas mais recentes
+            self.conn.execute(
+                "DELETE FROM responses WHERE session_id = ? AND message_hash NOT IN ("
+                " SELECT message_hash FROM responses WHERE session_id = ? ORDER BY timestamp DESC LIMIT ?)",
+                (session_id, session_id, self.max_entries_per_session)
+            )
+            # Limite global em bytes: descartar as mais antigas de qualquer sessão
+            total_bytes = self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM responses").fetchone()[0]
+            if total_bytes > self.max_bytes:
+                self.conn.execute(
+                    "DELETE FROM responses WHERE rowid IN ("
+                    " SELECT rowid FROM (SELECT rowid, SUM(bytes) OVER (ORDER BY timestamp DESC, rowid DESC) AS newer_bytes"
+                    " FROM responses) WHERE newer_bytes > ?)",
+                    (self.max_bytes,)
+                )
+            self.conn.commit()
+
+    def get(self, session_id: str, message_hash: str):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response FROM responses WHERE session_id = ? AND message_hash = ? AND timestamp > ?",
+                (session_id, message_hash, time.time() - self.ttl_seconds)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def pending(self, session_id: str) -> list:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT message_hash, response, timestamp FROM responses "
+                "WHERE session_id = ? AND timestamp > ? ORDER BY timestamp",
+                (session_id, time.time() - self.ttl_seconds)
+            ).fetchall()
+        return [
+            {'message_hash': message_hash, 'response': json.loads(response), 'timestamp': timestamp}
+            for message_hash, response, timestamp in rows
+        ]
+
+    def cleanup(self):
+        now = time.time()
+        if now - self.last_cleanup < self.CLEANUP_INTERVAL_SECONDS:
+            return
+        self.last_cleanup = now
+        with self.lock:
+            self.conn.execute("DELETE FROM responses WHERE timestamp <= ?", (now - self.ttl_seconds,))
+            self.conn.commit()
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            sessions, entries, total_bytes = self.conn.execute(
+                "SELECT COUNT(DISTINCT session_id), COUNT(*), COALESCE(SUM(bytes), 0) FROM responses WHERE timestamp > ?",
+                (time.time() - self.ttl_seconds,)
+            ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "sessions": sessions,
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def create_response_store(backend: str, path: str = None, ttl_seconds=300, max_bytes=16 * 1024 * 1024,
+                          max_entries_per_session=20) -> ResponseStore:
+    """Cria o armazenamento de respostas: "memory" ou "sqlite" (em `path`)"""
+    if backend == "sqlite":
+        return SqliteResponseStore(path, ttl_seconds=ttl_seconds, max_bytes=max_bytes,
+                                   max_entries_per_session=max_entries_per_session)
+    if backend == "memory":
+        return MemoryResponseStore(ttl_seconds=ttl_seconds, max_bytes=max_bytes,
+                                   max_entries_per_session=max_entries_per_session)
+    raise ValueError(f"Armazenamento de sessões desconhecido: '{backend}' (use 'memory' ou 'sqlite')")
@@ -0,0 +1,163 @@
+import time
+import sqlite3
+from langgraph.checkpoint.sqlite import SqliteSaver
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+
+class PrunedSqliteSaver(SqliteSaver):
+    """
+    Memória das conversas do agente em SQLite (modo WAL).
+
+    As conversas sobrevivem a restarts e são compartilhadas entre os workers
+    do uvicorn na mesma máquina. O SqliteSaver grava um checkpoint completo
+    por passo do agente; aqui só os últimos `keep_checkpoints` de cada
+    sessão são mantidos, então o arquivo cresce com o número de sessões e
+    não com o de passos. Como no BoundedMemorySaver, sessões ociosas por
+    mais de `idle_ttl_seconds` são apagadas, e as menos usadas recentemente
+    saem quando o total passa de `max_sessions` ou `max_bytes`.
+
+    Requer `pip install langgraph-checkpoint-sqlite`.
+    """
+
+    # Intervalo mínimo entre varreduras de sessões a apagar (feitas durante o put)
+    EVICTION_INTERVAL_SECONDS = 30
+
+    def __init__(self, path: str, keep_checkpoints=2, max_sessions=500, max_bytes=64 * 1024 * 1024,
+                 idle_ttl_seconds=1800):
+        """
+        Args:
+            path (str): Arquivo SQLite
+            keep_checkpoints (int): Checkpoints mantidos por sessão (o atual e os anteriores)
+            max_sessions (int): Número máximo de sessões no arquivo
+            max_bytes (int): Tamanho máximo (serializado) de todas as sessões, em bytes
+            idle_ttl_seconds (float): Tempo sem mensagens após o qual a sessão é apagada
+        """
+        # timeout: espera pelo lock de escrita de outro processo em vez de falhar
+        conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        super().__init__(conn)
+        self.path = path
+        self.keep_checkpoints = max(1, keep_checkpoints)
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.last_eviction = 0.0
+
+        # Métricas
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+
+        self.setup()
+        with self.cursor() as cur:
+            # Último uso e tamanho de cada sessão, para apagar sem varrer os checkpoints
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS thread_activity ("
+                " thread_id TEXT PRIMARY KEY,"
+                " last_used REAL NOT NULL,"
+                " bytes INTEGER NOT NULL DEFAULT 0"
+                ")"
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS thread_activity_last_used ON thread_activity (last_used)")
+            # Sessões gravadas antes desta tabela existir passam a contar a partir de agora
+            cur.execute(
+                "INSERT OR IGNORE INTO thread_activity (thread_id, last_used) "
+                "SELECT DISTINCT thread_id, ? FROM checkpoints",
+                (time.time(),)
+            )
+        logger.info(f"Memória das conversas em SQLite: {path}")
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        result = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self.cursor() as cur:
+            # Ids de checkpoint crescem com o tempo: manter apenas os mais recentes
+            kept = (
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT ?"
+            )
+            params = (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_checkpoints)
+            cur.execute(
+                f"DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({kept})",
+                params
+            )
+            cur.execute(
+                f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({kept})",
+                params
+            )
+
+            # Registrar uso e tamanho da sessão (consultas pela chave primária, só desta sessão)
+            size = cur.execute(
+                "SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints WHERE thread_id = ?",
+                (thread_id,)
+            ).fetchone()[0]
+            size += cur.execute(
+                "SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes WHERE thread_id = ?",
+                (thread_id,)
+            ).fetchone()[0]
+            cur.execute(
+                "INSERT OR REPLACE INTO thread_activity (thread_id, last_used, bytes) VALUES (?, ?, ?)",
+                (thread_id, time.time(), size)
+            )
+
+        if time.time() - self.last_eviction >= self.EVICTION_INTERVAL_SECONDS:
+            self.evict_idle()
+        return result
+
+    def delete_thread(self, thread_id):
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (str(thread_id),))
+
+    def evict_idle(self):
+        """Apaga sessões ociosas e, acima dos limites, as menos usadas recentemente"""
+        now = time.time()
+        self.last_eviction = now
+        with self.cursor() as cur:
+            idle = [row[0] for row in cur.execute(
+                "SELECT thread_id FROM thread_activity WHERE last_used < ?",
+                (now - self.idle_ttl_seconds,)
+            )]
+
+            # Da mais para a menos recente: a partir do ponto em que um limite é
+            # ultrapassado, as restantes saem (a mais recente sempre fica)
+            over_capacity = []
+            total_bytes = 0
+            rows = cur.execute(
+                "SELECT thread_id, bytes FROM thread_activity WHERE last_used >= ? ORDER BY last_used DESC",
+                (now - self.idle_ttl_seconds,)
+            ).fetchall()
+            for count, (thread_id, size) in enumerate(rows, start=1):
+                total_bytes += size
+                if count > 1 and (count > self.max_sessions or total_bytes > self.max_bytes):
+                    over_capacity.append(thread_id)
+
+            expired = [(thread_id,) for thread_id in idle + over_capacity]
+            if expired:
+                for table in ("writes", "checkpoints", "thread_activity"):
+                    cur.executemany(f"DELETE FROM {table} WHERE thread_id = ?", expired)
+        self.evicted_idle += len(idle)
+        self.evicted_capacity += len(over_capacity)
+        if expired:
+            logger.info(f"Memória das conversas: {len(idle)} sessões ociosas e {len(over_capacity)} além dos limites apagadas")
+
+    def get_stats(self) -> dict:
+        """Retorna as métricas da memória das conversas"""
+        with self.cursor(transaction=False) as cur:
+            sessions, total_bytes = cur.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM thread_activity"
+            ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "sessions": sessions,
+            "max_sessions": self.max_sessions,
+            "bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "evicted_idle": self.evicted_idle,
+            "evicted_capacity": self.evicted_capacity,
+        }
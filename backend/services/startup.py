@@ -0,0 +1,145 @@
+import time
+import asyncio
+from contextlib import contextmanager
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Estados de inicialização de um serviço
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class ServiceNotReadyError(Exception):
+    """Serviço ainda carregando (ou que falhou ao carregar)."""
+
+    def __init__(self, name, status, retry_after=5):
+        if status == FAILED:
+            message = f"Serviço '{name}' indisponível: falhou na inicialização"
+        else:
+            message = f"Serviço '{name}' ainda está sendo inicializado"
+        super().__init__(message)
+        self.name = name
+        self.status = status
+        self.retry_after = retry_after
+
+
+@contextmanager
+def startup_phase(label: str):
+    """Registra no log o tempo gasto em uma etapa da inicialização"""
+    start = time.perf_counter()
+    logger.info(f"Inicialização: {label}...")
+    try:
+        yield
+    finally:
+        logger.info(f"Inicialização: {label} em {time.perf_counter() - start:.2f}s")
+
+
+class ServiceRegistry:
+    """
+    Inicializa os serviços pesados em paralelo, em segundo plano.
+
+    Cada serviço é criado por uma função síncrona executada em sua própria
+    thread, de modo que o servidor aceita conexões imediatamente e as rotas
+    que não dependem de um serviço ainda em carga continuam funcionando.
+    """
+
+    def __init__(self):
+        self.factories = {}
+        self.services = {}
+        self.states = {}
+        self.ready_events = {}
+        self.startup_task = None
+
+    def register(self, name: str, factory):
+        """
+        Registra um serviço.
+
+        Args:
+            name (str): Nome do serviço (usado em /health e nas mensagens de erro)
+            factory: Função sem argumentos que cria e devolve o serviço
+        """
+        self.factories[name] = factory
+        self.states[name] = {"status": PENDING, "elapsed_s": None, "error": None}
+        self.ready_events[name] = asyncio.Event()
+
+    def start(self):
+        """Agenda a inicialização de todos os serviços (não bloqueia)"""
+        self.startup_task = asyncio.create_task(self._start_all())
+        return self.startup_task
+
+    async def _start_all(self):
+        start = time.perf_counter()
+        await asyncio.gather(*(self._start_service(name) for name in self.factories))
+        ready = sum(1 for state in self.states.values() if state["status"] == READY)
+        logger.info(f"Inicialização concluída em {time.perf_counter() - start:.2f}s "
+                    f"({ready}/{len(self.states)} serviços prontos)")
+
+    async def _start_service(self, name: str):
+        state = self.states[name]
+        state["status"] = LOADING
+        start = time.perf_counter()
+        try:
+            with startup_phase(f"serviço {name}"):
+                self.services[name] = await asyncio.to_thread(self.factories[name])
+            state["status"] = READY
+        except Exception as e:
+            logger.error(f"Falha ao inicializar o serviço {name}: {str(e)}")
+            state["status"] = FAILED
+            state["error"] = str(e)
+        finally:
+            state["elapsed_s"] = round(time.perf_counter() - start, 2)
+            self.ready_events[name].set()
+
+    def is_ready(self, name: str) -> bool:
+        return self.states[name]["status"] == READY
+
+    def get(self, name: str):
+        """
+        Retorna o serviço pronto.
+
+        Raises:
+            ServiceNotReadyError: Se o serviço ainda não terminou de carregar ou falhou
+        """
+        if not self.is_ready(name):
+            raise ServiceNotReadyError(name, self.states[name]["status"])
+        return self.services[name]
+
+    async def wait_until_ready(self, name: str, timeout: float = None):
+        """Aguarda o fim da inicialização do serviço e o retorna"""
+        await asyncio.wait_for(self.ready_events[name].wait(), timeout)
+        return self.get(name)
+
+    @property
+    def all_ready(self) -> bool:
+        return all(state["status"] == READY for state in self.states.values())
+
+    def get_status(self) -> dict:
+        """Estado de inicialização de cada serviço"""
+        return {name: dict(state) for name, state in self.states.items()}
+
+    async def shutdown(self):
+        """
+        Interrompe a espera pela inicialização (as threads em andamento terminam
+        sozinhas) e encerra os serviços prontos que têm `close()`.
+        """
+        if self.startup_task is not None and not self.startup_task.done():
+            self.startup_task.cancel()
+            try:
+                await self.startup_task
+            except asyncio.CancelledError:
+                pass
+
+        for name, service in self.services.items():
+            close = getattr(service, "close", None)
+            if close is None:
+                continue
+            try:
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Falha ao encerrar o serviço {name}: {str(e)}")
@@ -0,0 +1,324 @@
+import asyncio
+import numpy as np
+from services.transcription_service import SAMPLE_RATE, TranscriptionQueueFullError
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Duração de cada quadro analisado pelo VAD (10, 20 ou 30 ms para o webrtcvad)
+FRAME_MS = 30
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+
+
+class EnergyVAD:
+    """
+    Detector de voz por energia com piso de ruído adaptativo.
+
+    Usado quando o pacote `webrtcvad` não está instalado. Um quadro é
+    considerado fala quando sua energia RMS supera o piso de ruído
+    (estimado nos quadros de silêncio) multiplicado por `ratio`.
+    """
+
+    def __init__(self, min_threshold=0.008, ratio=3.0):
+        self.min_threshold = min_threshold
+        self.ratio = ratio
+        self.noise_floor = min_threshold / ratio
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        rms = float(np.sqrt(np.mean(frame * frame)))
+        speech = rms > max(self.min_threshold, self.noise_floor * self.ratio)
+        if not speech:
+            # Atualizar o piso de ruído apenas com quadros de silêncio
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        return speech
+
+
+class WebRTCVAD:
+    """Detector de voz do WebRTC (pacote opcional `webrtcvad`)."""
+
+    def __init__(self, aggressiveness=2):
+        import webrtcvad
+        self.vad = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        pcm16 = (np.clip(frame, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+        return self.vad.is_speech(pcm16, SAMPLE_RATE)
+
+
+def create_vad(aggressiveness=2):
+    """Usa o VAD do WebRTC se disponível, senão o detector por energia"""
+    try:
+        return WebRTCVAD(aggressiveness)
+    except ImportError:
+        logger.info("webrtcvad não instalado, usando VAD por energia")
+        return EnergyVAD()
+
+
+class VoiceActivitySegmenter:
+    """
+    Divide um fluxo de amostras em segmentos de fala.
+
+    Um segmento começa no primeiro quadro com voz (incluindo `speech_pad_ms`
+    de áudio anterior) e termina após `min_silence_ms` de silêncio, ou ao
+    atingir `max_segment_s` (limite da janela do Whisper).
+    """
+
+    def __init__(self, vad, min_silence_ms=600, speech_pad_ms=300, min_speech_ms=250, max_segment_s=30.0):
+        self.vad = vad
+        self.min_silence_frames = max(1, min_silence_ms // FRAME_MS)
+        self.pad_frames = speech_pad_ms // FRAME_MS
+        self.min_speech_frames = max(1, min_speech_ms // FRAME_MS)
+        self.max_segment_frames = int(max_segment_s * 1000 / FRAME_MS)
+
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.pre_roll = []
+        self.segment = []
+        self.speech_frames = 0
+        self.silence_frames = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return bool(self.segment)
+
+    def current_segment(self):
+        """Áudio do segmento em andamento (para transcrições parciais)"""
+        return np.concatenate(self.segment) if self.segment else None
+
+    def _close_segment(self, segments: list):
+        # Descartar o silêncio final, mantendo um pouco de margem
+        keep = len(self.segment) - max(0, self.silence_frames - self.pad_frames)
+        if self.speech_frames >= self.min_speech_frames:
+            segments.append(np.concatenate(self.segment[:keep]))
+        self.segment = []
+        self.speech_frames = 0
+        self.silence_frames = 0
+
+    def feed(self, samples: np.ndarray) -> list:
+        """
+        Processa novas amostras.
+
+        Args:
+            samples (np.ndarray): Amostras float32 mono 16 kHz
+
+        Returns:
+            list[np.ndarray]: Segmentos de fala concluídos, em ordem
+        """
+        self.pending = np.concatenate([self.pending, samples])
+        segments = []
+
+        frame_count = len(self.pending) // FRAME_SAMPLES
+        for index in range(frame_count):
+            frame = self.pending[index * FRAME_SAMPLES:(index + 1) * FRAME_SAMPLES]
+            speech = self.vad.is_speech(frame)
+
+            if not self.segment:
+                if speech:
+                    self.segment = self.pre_roll + [frame]
+                    self.pre_roll = []
+                    self.speech_frames = 1
+                else:
+                    self.pre_roll.append(frame)
+                    if len(self.pre_roll) > self.pad_frames:
+                        self.pre_roll.pop(0)
+                continue
+
+            self.segment.append(frame)
+            if speech:
+                self.speech_frames += 1
+                self.silence_frames = 0
+            else:
+                self.silence_frames += 1
+
+            if self.silence_frames >= self.min_silence_frames or len(self.segment) >= self.max_segment_frames:
+                self._close_segment(segments)
+
+        self.pending = self.pending[frame_count * FRAME_SAMPLES:]
+        return segments
+
+    def flush(self) -> list:
+        """Encerra o fluxo, devolvendo o segmento em andamento (se houver fala)"""
+        segments = []
+        if self.segment:
+            self._close_segment(segments)
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.pre_roll = []
+        return segments
+
+
+class StreamingTranscriptionSession:
+    """
+    Sessão de transcrição incremental de uma conexão WebSocket.
+
+    Recebe o áudio em pedaços à medida que é gravado, segmenta por detecção
+    de voz e transcreve cada segmento concluído (mensagem "final") enquanto
+    o usuário continua falando. Durante um segmento longo, envia também
+    transcrições parciais quando o pool do Whisper está ocioso.
+
+    Formatos de entrada:
+        webm:  contêiner do MediaRecorder (decodificado por um FFmpeg contínuo)
+        pcm16: PCM 16 bits little-endian, mono, 16 kHz
+    """
+
+    def __init__(self, transcription_service, send, input_format="webm", vad_aggressiveness=2,
+                 min_silence_ms=600, partial_interval_s=1.0):
+        """
+        Args:
+            transcription_service (TranscriptionService): Serviço que executa o Whisper
+            send: Corrotina que envia um dict JSON ao cliente
+            input_format (str): "webm" ou "pcm16"
+            vad_aggressiveness (int): Agressividade do VAD do WebRTC (0 a 3)
+            min_silence_ms (int): Silêncio que encerra um segmento
+            partial_interval_s (float): Intervalo mínimo de fala nova entre parciais
+        """
+        if input_format not in ("webm", "pcm16"):
+            raise ValueError(f"Formato de entrada não suportado: {input_format}")
+
+        self.transcription_service = transcription_service
+        self.send = send
+        self.input_format = input_format
+        self.segmenter = VoiceActivitySegmenter(create_vad(vad_aggressiveness), min_silence_ms=min_silence_ms)
+        self.partial_interval_samples = int(partial_interval_s * SAMPLE_RATE)
+
+        self.process = None
+        self.reader_task = None
+        self.final_queue = asyncio.Queue()
+        self.final_worker = None
+        self.partial_task = None
+        self.last_partial_size = 0
+        self.segment_index = 0
+        self.final_texts = []
+
+    async def start(self):
+        """Inicia o decodificador (se necessário) e o worker de transcrições finais"""
+        self.final_worker = asyncio.create_task(self._transcribe_finals())
+        if self.input_format == "webm":
+            self.process = await asyncio.create_subprocess_exec(
+                "ffmpeg",
+                "-hide_banner",
+                "-loglevel", "error",
+                "-i", "pipe:0",
+                "-f", "f32le",
+                "-acodec", "pcm_f32le",
+                "-ac", "1",
+                "-ar", str(SAMPLE_RATE),
+                "pipe:1",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            self.reader_task = asyncio.create_task(self._read_decoded())
+
+    async def feed(self, data: bytes):
+        """Recebe um pedaço do áudio gravado"""
+        if self.process is not None:
+            self.process.stdin.write(data)
+            await self.process.stdin.drain()
+        else:
+            samples = np.frombuffer(data[:len(data) - len(data) % 2], dtype=np.int16).astype(np.float32) / 32768.0
+            self._process_samples(samples)
+
+    async def _read_decoded(self):
+        remainder = b""
+        while True:
+            chunk = await self.process.stdout.read(FRAME_SAMPLES * 4 * 8)
+            if not chunk:
+                break
+            chunk = remainder + chunk
+            usable = len(chunk) - len(chunk) % 4
+            remainder = chunk[usable:]
+            self._process_samples(np.frombuffer(chunk[:usable], dtype=np.float32))
+
+    def _process_samples(self, samples: np.ndarray):
+        for segment in self.segmenter.feed(samples):
+            self._enqueue_final(segment)
+        self._maybe_schedule_partial()
+
+    def _enqueue_final(self, segment: np.ndarray):
+        self.final_queue.put_nowait((self.segment_index, segment))
+        self.segment_index += 1
+        self.last_partial_size = 0
+
+    def _maybe_schedule_partial(self):
+        segment = self.segmenter.current_segment()
+        if segment is None or len(segment) - self.last_partial_size < self.partial_interval_samples:
+            return
+        # Durante uma pausa o texto não muda: esperar mais fala ou o fim do segmento
+        if self.segmenter.silence_frames > 0:
+            return
+        # Parciais só quando nada mais importante está na fila
+        if self.partial_task is not None and not self.partial_task.done():
+            return
+        if not self.final_queue.empty() or self.transcription_service.queue_depth > 0:
+            return
+        self.last_partial_size = len(segment)
+        self.partial_task = asyncio.create_task(self._transcribe_partial(self.segment_index, segment))
+
+    async def _transcribe_partial(self, index: int, segment: np.ndarray):
+        try:
+            text = await self.transcription_service.transcribe_samples(segment)
+        except TranscriptionQueueFullError:
+            return
+        except Exception as e:
+            logger.warning(f"Falha na transcrição parcial: {str(e)}")
+            return
+        # Ignorar parciais de segmentos que já foram concluídos
+        if index == self.segment_index:
+            await self.send({"type": "partial", "segment": index, "text": text.strip()})
+
+    async def _transcribe_finals(self):
+        while True:
+            item = await self.final_queue.get()
+            if item is None:
+                break
+            index, segment = item
+            while True:
+                try:
+                    text = await self.transcription_service.transcribe_samples(segment)
+                    break
+                except TranscriptionQueueFullError as e:
+                    # Segmentos finais não podem ser perdidos: aguardar uma vaga na fila
+                    await asyncio.sleep(min(e.retry_after, 2))
+                except Exception as e:
+                    # Falha só deste segmento: avisar o cliente e seguir com os próximos
+                    logger.error(f"Falha na transcrição final do segmento {index}: {str(e)}")
+                    text = None
+                    break
+            if text is None:
+                await self.send({"type": "error", "segment": index, "detail": "Falha na transcrição do segmento"})
+                continue
+            text = text.strip()
+            if text:
+                self.final_texts.append(text)
+            await self.send({"type": "final", "segment": index, "text": text})
+
+    async def finish(self) -> str:
+        """
+        Encerra o fluxo: processa o áudio restante e aguarda as transcrições pendentes.
+
+        Returns:
+            str: Texto completo transcrito na sessão
+        """
+        if self.process is not None:
+            self.process.stdin.close()
+            await self.reader_task
+            await self.process.wait()
+            self.process = None
+
+        for segment in self.segmenter.flush():
+            self._enqueue_final(segment)
+        self.final_queue.put_nowait(None)
+        await self.final_worker
+
+        full_text = " ".join(self.final_texts)
+        await self.send({"type": "done", "text": full_text})
+        return full_text
+
+    async def close(self):
+        """Libera os recursos da sessão (conexão encerrada, com ou sem finish)"""
+        for task in (self.reader_task, self.final_worker, self.partial_task):
+            if task is not None and not task.done():
+                task.cancel()
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
@@ -1,52 +1,87 @@
-import os
-import tempfile
-import whisper
-import subprocess
+import time
+import asyncio
+import threading
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from services.whisper_backends import SAMPLE_RATE, WINDOW_SAMPLES, create_whisper_backend
 from utils.logger import setup_logger
 
 # Configurar logger
 logger = setup_logger(__name__)
 
-# Diretório de cache fixo para os modelos Whisper
-WHISPER_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "whisper_cache")
+# Áudios de até 30 s (uma janela do Whisper) podem ser decodificados em lote
+BATCHABLE_SAMPLES = WINDOW_SAMPLES
+
+class TranscriptionQueueFullError(Exception):
+    """Fila de transcrição cheia: o cliente deve tentar novamente mais tarde."""
+
+    def __init__(self, queue_depth, retry_after):
+        super().__init__(f"Fila de transcrição cheia ({queue_depth} aguardando)")
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+
 
 class TranscriptionService:
-    def __init__(self, model_name="base"):
+    def __init__(self, model_name="base", backend="openai-whisper", device=None, compute_type="int8", workers=1, max_queue=4, batch_window_ms=0, max_batch_size=1):
         """
         Inicializa o serviço de transcrição com o modelo Whisper especificado.
         
         Args:
             model_name (str): Nome do modelo Whisper a ser usado (tiny, base, small, medium, large)
+            backend (str): Motor de inferência (openai-whisper ou faster-whisper)
+            device (str): cpu, cuda ou None/"auto" para detectar
+            compute_type (str): Quantização do faster-whisper (int8, int8_float16, float16, float32)
+            workers (int): Número de threads dedicadas à inferência do Whisper (só faster-whisper
+                aceita mais de uma; o openai-whisper usa sempre 1)
+            max_queue (int): Máximo de transcrições aguardando um worker livre
+            batch_window_ms (int): Janela para agrupar requisições simultâneas em lote (0 desativa)
+            max_batch_size (int): Máximo de áudios decodificados juntos em um lote
         """
-        logger.info(f"Inicializando serviço de transcrição com modelo: {model_name}")
-        
-        # Criar diretório de cache se não existir
-        os.makedirs(WHISPER_CACHE_DIR, exist_ok=True)
-        logger.info(f"Diretório de cache do Whisper: {WHISPER_CACHE_DIR}")
-        
-        # Definir a variável de ambiente para o cache do Whisper
-        os.environ["WHISPER_CACHE_DIR"] = WHISPER_CACHE_DIR
-        
-        # Verificar se o modelo já existe no cache
-        model_files = [
-            f"{model_name}.pt",
-            f"{model_name}.en.pt"
-        ]
-        
-        cached_model_exists = any(
-            os.path.exists(os.path.join(WHISPER_CACHE_DIR, model_file))
-            for model_file in model_files
-        )
-        
-        if cached_model_exists:
-            logger.info(f"Modelo {model_name} encontrado no cache, carregando...")
-        else:
-            logger.info(f"Modelo {model_name} não encontrado no cache, será baixado...")
-        
-        # Carregar o modelo (usará o cache se disponível)
-        self.model = whisper.load_model(model_name, download_root=WHISPER_CACHE_DIR)
+        logger.info(f"Inicializando serviço de transcrição com modelo: {model_name} ({backend})")
+
+        self.max_queue = max_queue
+        self.stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_inference = 0.0
+        self.batches = 0
+        self.batched_requests = 0
+
+        # Micro-lotes: requisições que chegam dentro da janela são decodificadas juntas
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.batch_queue = None
+        self.batch_slots = None
+        self.batcher_task = None
+        # Lotes em execução (referências fortes: sem elas a tarefa pode ser coletada no meio)
+        self.batch_tasks = set()
         
+        # Carregar o modelo no motor configurado
+        self.backend = create_whisper_backend(backend, model_name, device=device, compute_type=compute_type, workers=workers)
+        self.backend_name = backend
+        if workers > 1 and not self.backend.thread_safe:
+            # Execuções simultâneas sobre o mesmo modelo corrompem umas às outras
+            logger.warning(f"Backend {backend} não aceita transcrições simultâneas, usando 1 worker (pedidos: {workers})")
+            workers = 1
+
+        # Pool dedicado à inferência: o event loop continua livre durante a transcrição
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="whisper")
+        if not self.backend.supports_batching and self.batch_window > 0:
+            logger.info(f"Backend {backend} não decodifica em lote, micro-lotes desativados")
+            self.batch_window = 0
+
+        # A admissão limita as transcrições simultâneas a workers + max_queue: com um
+        # limite menor que o lote, os lotes nunca enchem e o excesso recebe 503 antes
+        if self.batch_window > 0 and self.workers + self.max_queue < self.max_batch_size:
+            logger.warning(f"Fila de transcrição ({self.max_queue}) menor que o lote ({self.max_batch_size}), "
+                           f"ampliada para {self.max_batch_size - self.workers}")
+            self.max_queue = self.max_batch_size - self.workers
+
         logger.info(f"Modelo {model_name} carregado com sucesso!")
         
         # Aquecer o modelo na inicialização
@@ -60,15 +95,14 @@ class TranscriptionService:
             logger.info("Aquecendo modelo Whisper...")
             
             # Criar um áudio sintético de silêncio (16kHz, 1 segundo, mono)
-            sample_rate = 16000
             duration = 1.0  # 1 segundo
-            samples = int(sample_rate * duration)
+            samples = int(SAMPLE_RATE * duration)
             
             # Gerar áudio de silêncio com um pouco de ruído baixo para simular áudio real
             audio_data = np.random.normal(0, 0.001, samples).astype(np.float32)
             
             # Transcrever o áudio sintético para aquecer o modelo
-            result = self.model.transcribe(audio_data)
+            self.backend.transcribe(audio_data)
             
             logger.info("Modelo Whisper aquecido com sucesso")
             
@@ -77,6 +111,250 @@ class TranscriptionService:
             # Não falhar a inicialização se o aquecimento falhar
             pass
 
+    async def _decode_audio(self, content: bytes) -> np.ndarray:
+        """
+        Decodifica o áudio enviado em PCM float32 mono 16 kHz usando o FFmpeg por pipes.
+
+        Args:
+            content (bytes): Conteúdo do arquivo de áudio (webm, wav, mp3, ...)
+
+        Returns:
+            np.ndarray: Amostras float32 no formato esperado pelo Whisper
+        """
+        ffmpeg_cmd = [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel", "error",
+            "-i", "pipe:0",
+            "-f", "f32le",
+            "-acodec", "pcm_f32le",
+            "-ac", "1",
+            "-ar", str(SAMPLE_RATE),
+            "pipe:1"
+        ]
+        logger.info(f"Comando FFmpeg: {' '.join(ffmpeg_cmd)}")
+
+        # Subprocesso assíncrono: a conversão não bloqueia o event loop
+        process = await asyncio.create_subprocess_exec(
+            *ffmpeg_cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate(input=content)
+
+        if process.returncode != 0:
+            error_output = stderr.decode(errors="replace")
+            logger.error(f"Erro na conversão do áudio: {error_output}")
+            raise Exception(f"Erro na conversão do áudio: {error_output}")
+
+        audio = np.frombuffer(stdout, dtype=np.float32)
+        if audio.size == 0:
+            raise Exception("Nenhuma amostra de áudio decodificada")
+
+        logger.info(f"Áudio decodificado: {audio.size / SAMPLE_RATE:.2f}s ({audio.size} amostras)")
+        return audio
+
+    @property
+    def queue_depth(self) -> int:
+        """Transcrições aguardando um worker livre"""
+        return self.in_flight - self.running
+
+    def _admit(self):
+        """
+        Reserva uma vaga na fila de transcrição.
+
+        Raises:
+            TranscriptionQueueFullError: Se já houver `max_queue` transcrições aguardando
+        """
+        with self.stats_lock:
+            if self.in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                queue_depth = self.queue_depth
+            else:
+                queue_depth = None
+                self.in_flight += 1
+
+        if queue_depth is not None:
+            # Estimativa de espera: tempo médio de inferência por posição na fila
+            avg_inference = self.total_inference / self.completed if self.completed else 10.0
+            retry_after = max(1, int(avg_inference * (queue_depth + 1) / self.workers))
+            logger.warning(f"Fila de transcrição cheia ({queue_depth} aguardando), rejeitando requisição")
+            raise TranscriptionQueueFullError(queue_depth, retry_after)
+
+    def _record(self, wait_time: float, inference_time: float, requests=1):
+        with self.stats_lock:
+            self.completed += requests
+            self.total_wait += wait_time * requests
+            self.max_wait = max(self.max_wait, wait_time)
+            self.total_inference += inference_time * requests
+
+    def _transcribe_batch(self, audios: list) -> list:
+        """
+        Decodifica vários áudios de até 30 s em uma única passada do modelo.
+        Deve rodar no pool do Whisper.
+        """
+        return [{"text": text} for text in self.backend.transcribe_batch(audios)]
+
+    async def _run_batcher(self):
+        """Agrupa as requisições da fila em lotes e os envia ao pool"""
+        while True:
+            # Só montar um lote quando houver worker livre: enquanto todos estão
+            # ocupados, as requisições se acumulam e formam lotes maiores
+            await self.batch_slots.acquire()
+            batch = [await self.batch_queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.batch_window
+            try:
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    try:
+                        if remaining > 0:
+                            batch.append(await asyncio.wait_for(self.batch_queue.get(), remaining))
+                        else:
+                            batch.append(self.batch_queue.get_nowait())
+                    except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                        break
+            except asyncio.CancelledError:
+                # Encerramento durante a montagem: o lote não chega a ser executado
+                self._fail_batch(batch, RuntimeError("Serviço de transcrição encerrado"))
+                raise
+            task = asyncio.create_task(self._execute_batch(batch))
+            self.batch_tasks.add(task)
+            task.add_done_callback(self.batch_tasks.discard)
+
+    @staticmethod
+    def _fail_batch(batch: list, error: BaseException):
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _execute_batch(self, batch: list):
+        audios = [audio for audio, _, _ in batch]
+
+        def job():
+            started_at = time.perf_counter()
+            with self.stats_lock:
+                self.running += len(batch)
+            try:
+                return started_at, self._transcribe_batch(audios)
+            finally:
+                with self.stats_lock:
+                    self.running -= len(batch)
+
+        loop = asyncio.get_running_loop()
+        try:
+            started_at, results = await loop.run_in_executor(self.executor, job)
+        except Exception as e:
+            self._fail_batch(batch, e)
+            return
+        except asyncio.CancelledError:
+            self._fail_batch(batch, RuntimeError("Serviço de transcrição encerrado"))
+            raise
+        finally:
+            self.batch_slots.release()
+
+        inference_time = time.perf_counter() - started_at
+        with self.stats_lock:
+            self.batches += 1
+            self.batched_requests += len(batch)
+        for (_, enqueued_at, future), result in zip(batch, results):
+            self._record(started_at - enqueued_at, inference_time)
+            if not future.done():
+                future.set_result(result)
+        logger.info(f"Whisper: lote de {len(batch)} áudio(s) decodificado em {inference_time:.2f}s")
+
+    async def _run_inference(self, audio: np.ndarray) -> dict:
+        """
+        Executa o Whisper no pool dedicado, respeitando o limite da fila.
+        Áudios curtos entram em micro-lotes quando a janela de lote está ativa.
+
+        Raises:
+            TranscriptionQueueFullError: Se já houver `max_queue` transcrições aguardando
+        """
+        self._admit()
+        enqueued_at = time.perf_counter()
+
+        try:
+            if self.batch_window > 0 and self.max_batch_size > 1 and len(audio) <= BATCHABLE_SAMPLES:
+                if self.batcher_task is None:
+                    self.batch_queue = asyncio.Queue()
+                    self.batch_slots = asyncio.Semaphore(self.workers)
+                    self.batcher_task = asyncio.create_task(self._run_batcher())
+                future = asyncio.get_running_loop().create_future()
+                self.batch_queue.put_nowait((audio, enqueued_at, future))
+                return await future
+
+            def job():
+                started_at = time.perf_counter()
+                with self.stats_lock:
+                    self.running += 1
+                try:
+                    return started_at, {"text": self.backend.transcribe(audio)}
+                finally:
+                    with self.stats_lock:
+                        self.running -= 1
+
+            loop = asyncio.get_running_loop()
+            started_at, result = await loop.run_in_executor(self.executor, job)
+        finally:
+            with self.stats_lock:
+                self.in_flight -= 1
+
+        wait_time = started_at - enqueued_at
+        inference_time = time.perf_counter() - started_at
+        self._record(wait_time, inference_time)
+
+        logger.info(f"Whisper: espera na fila {wait_time * 1000:.0f}ms, inferência {inference_time:.2f}s")
+        return result
+
+    async def close(self):
+        """Interrompe o agrupador e os lotes em andamento e libera o pool do Whisper"""
+        tasks = list(self.batch_tasks)
+        if self.batcher_task is not None:
+            tasks.append(self.batcher_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Requisições ainda na fila de lotes não serão atendidas
+        while self.batch_queue is not None and not self.batch_queue.empty():
+            self._fail_batch([self.batch_queue.get_nowait()], RuntimeError("Serviço de transcrição encerrado"))
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> dict:
+        """Retorna as métricas da fila de transcrição"""
+        with self.stats_lock:
+            return {
+                "backend": self.backend_name,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self.queue_depth,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait / self.completed * 1000, 1) if self.completed else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 1),
+                "avg_inference_ms": round(self.total_inference / self.completed * 1000, 1) if self.completed else 0.0,
+                "batches": self.batches,
+                "avg_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+            }
+
+    async def transcribe_samples(self, audio: np.ndarray) -> str:
+        """
+        Transcreve amostras já decodificadas (float32 mono 16 kHz).
+
+        Args:
+            audio (np.ndarray): Amostras de áudio
+
+        Returns:
+            str: Texto transcrito
+
+        Raises:
+            TranscriptionQueueFullError: Se a fila de transcrição estiver cheia
+        """
+        result = await self._run_inference(audio)
+        return result["text"]
+
     async def transcribe_audio(self, audio_file):
         """
         Transcreve um arquivo de áudio usando o modelo Whisper.
@@ -88,68 +366,20 @@ class TranscriptionService:
             str: Texto transcrito do áudio
         """
         try:
-            # Criar arquivo temporário para salvar o áudio original
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as temp_file:
-                temp_path = temp_file.name
-                content = await audio_file.read()
-                temp_file.write(content)
-            
-            logger.info(f"Arquivo de áudio original salvo temporariamente em: {temp_path}")
+            content = await audio_file.read()
             logger.info(f"Tamanho do arquivo: {len(content)} bytes")
+
+            # Decodificar direto para memória (sem arquivos temporários nem nova decodificação no Whisper)
+            audio = await self._decode_audio(content)
+
+            # Transcrever as amostras decodificadas no pool do Whisper
+            transcribed_text = await self.transcribe_samples(audio)
+
+            logger.info("Transcrição concluída com sucesso")
+            return transcribed_text
             
-            # Criar arquivo temporário para o áudio convertido
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as converted_file:
-                converted_path = converted_file.name
-            
-            # Converter o áudio para WAV usando FFmpeg com configurações mais simples
-            try:
-                logger.info(f"Convertendo áudio para WAV: {converted_path}")
-                ffmpeg_cmd = [
-                    "ffmpeg",
-                    "-i", temp_path,
-                    "-acodec", "pcm_s16le",
-                    "-ar", "16000",
-                    "-ac", "1",
-                    "-f", "wav",
-                    "-y",
-                    converted_path
-                ]
-                logger.info(f"Comando FFmpeg: {' '.join(ffmpeg_cmd)}")
-                
-                result = subprocess.run(
-                    ffmpeg_cmd,
-                    check=True,
-                    capture_output=True,
-                    text=True
-                )
-                
-                logger.info("FFmpeg stdout: " + result.stdout)
-                if result.stderr:
-                    logger.info("FFmpeg stderr: " + result.stderr)
-                
-                # Verificar se o arquivo convertido foi criado e tem tamanho
-                if os.path.exists(converted_path):
-                    file_size = os.path.getsize(converted_path)
-                    logger.info(f"Arquivo WAV criado com sucesso. Tamanho: {file_size} bytes")
-                else:
-                    raise Exception("Arquivo WAV não foi criado")
-                
-                # Transcrever o áudio convertido
-                result = self.model.transcribe(converted_path)
-                transcribed_text = result["text"]
-                
-                # Limpar arquivos temporários
-                os.unlink(temp_path)
-                os.unlink(converted_path)
-                
-                logger.info("Transcrição concluída com sucesso")
-                return transcribed_text
-                
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Erro na conversão do áudio: {e.stderr}")
-                logger.error(f"Comando que falhou: {' '.join(e.cmd)}")
-                raise Exception(f"Erro na conversão do áudio: {e.stderr}")
-            
+        except TranscriptionQueueFullError:
+            raise
         except Exception as e:
             logger.error(f"Erro durante a transcrição: {str(e)}")
             raise Exception(f"Erro durante a transcrição: {str(e)}")
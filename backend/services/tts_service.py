@@ -0,0 +1,290 @@
+import asyncio
+import base64
+import hashlib
+import io
+import math
+import os
+import struct
+import time
+import wave
+from gtts import gTTS
+from services.audio_cache import AudioCache
+from utils.logger import setup_logger
+from utils.singleflight import SingleFlight
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+
+class TTSBackend:
+    """
+    Interface dos motores de síntese de voz.
+
+    Cada motor converte texto em bytes de áudio de forma síncrona; o
+    TTSService se encarrega de rodar a síntese fora do event loop.
+    """
+
+    name = "base"
+    audio_format = "mp3"
+    media_type = "audio/mpeg"
+
+    def __init__(self, language="pt-br"):
+        self.language = language
+
+    def synthesize(self, text: str) -> bytes:
+        """
+        Sintetiza o texto.
+
+        Args:
+            text (str): Texto já limpo para fala
+
+        Returns:
+            bytes: Áudio no formato `audio_format`
+        """
+        raise NotImplementedError
+
+
+class GTTSBackend(TTSBackend):
+    """Google Text-to-Speech (online, MP3)."""
+
+    name = "gtts"
+    audio_format = "mp3"
+    media_type = "audio/mpeg"
+
+    def synthesize(self, text: str) -> bytes:
+        # Criar objeto gTTS para o idioma configurado
+        tts_obj = gTTS(text=text, lang=self.language, slow=False)
+
+        # Escrever o MP3 direto em memória (sem arquivo temporário)
+        buffer = io.BytesIO()
+        tts_obj.write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class PiperBackend(TTSBackend):
+    """
+    Piper (offline, WAV): síntese neural local em CPU via ONNX.
+
+    Requer o pacote `piper-tts` e um modelo de voz pt-BR, por exemplo
+    `pt_BR-faber-medium.onnx` (com o respectivo `.onnx.json` ao lado).
+    """
+
+    name = "piper"
+    audio_format = "wav"
+    media_type = "audio/wav"
+
+    def __init__(self, language="pt-br", model_path=None, length_scale=None):
+        super().__init__(language)
+        try:
+            from piper import PiperVoice
+        except ImportError as e:
+            raise ImportError("O motor 'piper' requer o pacote piper-tts (pip install piper-tts)") from e
+
+        if not model_path or not os.path.exists(model_path):
+            raise FileNotFoundError(f"Modelo de voz do Piper não encontrado: {model_path}")
+
+        logger.info(f"Carregando voz do Piper: {model_path}")
+        self.voice = PiperVoice.load(model_path)
+        self.length_scale = length_scale
+
+    def synthesize(self, text: str) -> bytes:
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            # A API mudou entre versões do piper-tts
+            if hasattr(self.voice, "synthesize_wav"):
+                self.voice.synthesize_wav(text, wav_file)
+            elif self.length_scale is not None:
+                self.voice.synthesize(text, wav_file, length_scale=self.length_scale)
+            else:
+                self.voice.synthesize(text, wav_file)
+        return buffer.getvalue()
+
+
+class StubBackend(TTSBackend):
+    """
+    Motor determinístico para testes (offline, WAV).
+
+    Gera um tom cuja frequência depende do hash do texto e cuja duração é
+    proporcional ao número de caracteres. Não depende de rede nem de modelos.
+    """
+
+    name = "stub"
+    audio_format = "wav"
+    media_type = "audio/wav"
+
+    SAMPLE_RATE = 16000
+    SECONDS_PER_CHAR = 0.06
+
+    def __init__(self, language="pt-br", latency=0.0):
+        super().__init__(language)
+        # Atraso artificial para simular o tempo de síntese
+        self.latency = latency
+
+    def synthesize(self, text: str) -> bytes:
+        if self.latency:
+            time.sleep(self.latency)
+
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        frequency = 220 + digest[0] * 2
+        samples = max(1, int(len(text) * self.SECONDS_PER_CHAR * self.SAMPLE_RATE))
+        frames = b"".join(
+            struct.pack("<h", int(8000 * math.sin(2 * math.pi * frequency * i / self.SAMPLE_RATE)))
+            for i in range(samples)
+        )
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.SAMPLE_RATE)
+            wav_file.writeframes(frames)
+        return buffer.getvalue()
+
+
+TTS_BACKENDS = {
+    GTTSBackend.name: GTTSBackend,
+    PiperBackend.name: PiperBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+class TTSService:
+    def __init__(self, engine="gtts", language="pt-br", timeout=30.0, cache=None, **backend_options):
+        """
+        Inicializa o serviço de síntese de voz com o motor especificado.
+
+        Args:
+            engine (str): Nome do motor (gtts, piper, stub)
+            language (str): Idioma da síntese
+            timeout (float): Tempo máximo de uma síntese, em segundos
+            cache (AudioCache): Cache de áudio compartilhado entre sessões (opcional)
+            **backend_options: Opções específicas do motor (ex.: model_path do Piper)
+        """
+        if engine not in TTS_BACKENDS:
+            raise ValueError(f"Motor de TTS desconhecido: {engine}. Opções: {', '.join(TTS_BACKENDS)}")
+
+        logger.info(f"Inicializando serviço de TTS com motor: {engine} ({language})")
+        self.backend = TTS_BACKENDS[engine](language=language, **backend_options)
+        self.engine = engine
+        self.language = language
+        self.timeout = timeout
+        self.cache = cache
+        # Sínteses em andamento por chave de áudio: o mesmo texto pedido por várias
+        # sessões ao mesmo tempo é sintetizado uma única vez
+        self.flights = SingleFlight()
+
+        # Métricas de latência da síntese
+        self.synthesis_count = 0
+        self.failure_count = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def audio_format(self) -> str:
+        return self.backend.audio_format
+
+    @property
+    def media_type(self) -> str:
+        return self.backend.media_type
+
+    def cache_key(self, text: str) -> str:
+        """Chave do áudio deste texto no cache (texto normalizado + idioma + motor)"""
+        return AudioCache.make_key(text, self.language, self.engine)
+
+    async def synthesize(self, text: str) -> bytes:
+        """
+        Sintetiza o texto em uma thread, respeitando o tempo máximo configurado.
+        Textos já sintetizados (por qualquer sessão) são servidos do cache, e
+        pedidos simultâneos do mesmo texto aguardam a mesma síntese.
+
+        Args:
+            text (str): Texto já limpo para fala
+
+        Returns:
+            bytes: Áudio no formato do motor configurado
+        """
+        key = self.cache_key(text)
+        if self.cache is not None:
+            # Em thread: com AUDIO_CACHE_DIR a consulta pode ler do disco
+            cached_audio = await asyncio.to_thread(self.cache.get, key)
+            if cached_audio is not None:
+                logger.info(f"Áudio recuperado do cache ({self.engine}): {len(cached_audio)} bytes")
+                return cached_audio
+
+        return await self.flights.do(key, lambda: self._synthesize_uncached(text, key))
+
+    async def _synthesize_uncached(self, text: str, key: str) -> bytes:
+        start = time.perf_counter()
+        try:
+            audio_bytes = await asyncio.wait_for(
+                asyncio.to_thread(self.backend.synthesize, text),
+                timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.failure_count += 1
+            logger.error(f"Síntese ({self.engine}) excedeu o limite de {self.timeout:.0f}s")
+            raise Exception(f"Síntese de voz excedeu o limite de {self.timeout:.0f}s")
+        except Exception as e:
+            self.failure_count += 1
+            logger.error(f"Erro na síntese de voz ({self.engine}): {str(e)}")
+            raise
+
+        latency = time.perf_counter() - start
+        self.synthesis_count += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        logger.info(f"Áudio sintetizado ({self.engine}) em {latency * 1000:.0f}ms: "
+                    f"{len(text)} caracteres, {len(audio_bytes)} bytes")
+
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put, key, audio_bytes)
+        return audio_bytes
+
+    async def synthesize_for_response(self, text: str, keep_seconds: float) -> dict:
+        """
+        Sintetiza o texto (ou reaproveita o cache) e prepara a referência ao áudio para o cliente.
+
+        O áudio fica fixado no cache por `keep_seconds` (validade da resposta
+        recuperável), para que a URL não expire antes dela. Se não couber,
+        a URL é um data URL com o próprio áudio, em vez de um id que poderia
+        responder 404.
+
+        Args:
+            text (str): Texto já limpo para fala
+            keep_seconds (float): Tempo mínimo em que a URL deve continuar válida
+
+        Returns:
+            dict: {"audio_id", "audio_url", "audio_format"}
+        """
+        audio_bytes = await self.synthesize(text)
+        audio_id = self.cache_key(text)
+        kept = self.cache is not None and await asyncio.to_thread(self.cache.pin, audio_id, audio_bytes, keep_seconds)
+        if kept:
+            audio_url = f"/audio/{audio_id}"
+        else:
+            logger.warning(f"Áudio de {len(audio_bytes)} bytes não coube no cache, enviado na própria resposta")
+            audio_url = f"data:{self.media_type};base64,{base64.b64encode(audio_bytes).decode('ascii')}"
+        return {"audio_id": audio_id, "audio_url": audio_url, "audio_format": self.audio_format}
+
+    def get_audio(self, audio_id: str):
+        """
+        Recupera um áudio sintetizado pelo id.
+
+        Returns:
+            bytes | None: Áudio armazenado ou None se não existir (ou já tiver sido despejado)
+        """
+        if self.cache is None:
+            return None
+        return self.cache.get(audio_id, record_stats=False)
+
+    def get_stats(self) -> dict:
+        """Retorna as métricas de latência da síntese"""
+        return {
+            "engine": self.engine,
+            "syntheses": self.synthesis_count,
+            "failures": self.failure_count,
+            "avg_latency_ms": round(self.total_latency / self.synthesis_count * 1000, 1) if self.synthesis_count else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 1),
+            "coalesced": self.flights.coalesced,
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+        }
@@ -0,0 +1,191 @@
+import os
+import numpy as np
+from utils.logger import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Diretório de cache fixo para os modelos Whisper
+WHISPER_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "whisper_cache")
+
+# Taxa de amostragem esperada pelo Whisper
+SAMPLE_RATE = 16000
+
+# Janela de decodificação do Whisper (30 s)
+WINDOW_SAMPLES = 30 * SAMPLE_RATE
+
+# Limiares padrão do model.transcribe para repetir a decodificação com temperatura maior
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+class WhisperBackend:
+    """
+    Interface dos motores de reconhecimento de fala.
+
+    Os métodos são síncronos e pesados: o TranscriptionService os executa
+    no pool dedicado do Whisper.
+    """
+
+    name = "base"
+    # Se True, transcribe_batch decodifica vários áudios em uma única passada
+    supports_batching = False
+    # Se True, o mesmo modelo aceita transcrições simultâneas (mais de um worker)
+    thread_safe = False
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        """
+        Transcreve amostras float32 mono 16 kHz.
+
+        Returns:
+            str: Texto transcrito
+        """
+        raise NotImplementedError
+
+    def transcribe_batch(self, audios: list) -> list:
+        """Transcreve vários áudios de até 30 s (padrão: um por vez)"""
+        return [self.transcribe(audio) for audio in audios]
+
+
+class OpenAIWhisperBackend(WhisperBackend):
+    """
+    Whisper de referência (PyTorch), com decodificação em lote.
+
+    Não é thread-safe: a decodificação instala hooks de kv-cache nos módulos
+    do modelo compartilhado, e execuções simultâneas corrompem umas às
+    outras. Use um único worker (a concorrência vem dos micro-lotes).
+    """
+
+    name = "openai-whisper"
+    supports_batching = True
+
+    def __init__(self, model_name="base", device=None, **options):
+        import torch
+        import whisper
+        self.torch = torch
+        self.whisper = whisper
+
+        # Criar diretório de cache se não existir
+        os.makedirs(WHISPER_CACHE_DIR, exist_ok=True)
+        logger.info(f"Diretório de cache do Whisper: {WHISPER_CACHE_DIR}")
+
+        # Definir a variável de ambiente para o cache do Whisper
+        os.environ["WHISPER_CACHE_DIR"] = WHISPER_CACHE_DIR
+
+        # Verificar se o modelo já existe no cache
+        model_files = [
+            f"{model_name}.pt",
+            f"{model_name}.en.pt"
+        ]
+
+        cached_model_exists = any(
+            os.path.exists(os.path.join(WHISPER_CACHE_DIR, model_file))
+            for model_file in model_files
+        )
+
+        if cached_model_exists:
+            logger.info(f"Modelo {model_name} encontrado no cache, carregando...")
+        else:
+            logger.info(f"Modelo {model_name} não encontrado no cache, será baixado...")
+
+        # Carregar o modelo (usará o cache se disponível)
+        self.model = whisper.load_model(model_name, device=device, download_root=WHISPER_CACHE_DIR)
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        return self.model.transcribe(audio)["text"]
+
+    def transcribe_batch(self, audios: list) -> list:
+        """
+        Decodifica em lote áudios de até 30 s (os maiores vão para transcribe,
+        que percorre as janelas). O lote roda com temperatura 0 e detecção de
+        idioma por áudio, como a primeira tentativa do model.transcribe; os
+        áudios em que o transcribe tentaria de novo com temperatura maior são
+        refeitos individualmente por ele, e os silenciosos viram texto vazio.
+        """
+        if len(audios) == 1 or any(len(audio) > WINDOW_SAMPLES for audio in audios):
+            return [self.transcribe(audio) for audio in audios]
+
+        # Espectrogramas log-mel com padding para a janela de 30 s, empilhados em lote
+        n_mels = self.model.dims.n_mels
+        mels = self.torch.stack([
+            self.whisper.log_mel_spectrogram(self.whisper.pad_or_trim(audio), n_mels)
+            for audio in audios
+        ]).to(self.model.device)
+
+        options = self.whisper.DecodingOptions(temperature=0.0, fp16=self.model.device.type == "cuda",
+                                               without_timestamps=True)
+        results = self.whisper.decode(self.model, mels, options)
+
+        texts = []
+        for audio, result in zip(audios, results):
+            low_confidence = result.avg_logprob < LOGPROB_THRESHOLD
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and low_confidence:
+                # O transcribe descarta o segmento como silêncio
+                texts.append("")
+            elif low_confidence or result.compression_ratio > COMPRESSION_RATIO_THRESHOLD:
+                texts.append(self.transcribe(audio))
+            else:
+                texts.append(result.text)
+        return texts
+
+
+class FasterWhisperBackend(WhisperBackend):
+    """
+    Whisper sobre CTranslate2 (pacote `faster-whisper`), com quantização.
+
+    Em CPU, `compute_type="int8"` reduz memória e tempo de inferência em
+    relação ao modelo PyTorch fp32. Aceita transcrições simultâneas: o
+    CTranslate2 executa até `num_workers` delas em paralelo.
+    """
+
+    name = "faster-whisper"
+    thread_safe = True
+
+    def __init__(self, model_name="base", device=None, compute_type="int8", cpu_threads=0, beam_size=5, num_workers=1,
+                 **options):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError("O backend 'faster-whisper' requer o pacote faster-whisper") from e
+
+        os.makedirs(WHISPER_CACHE_DIR, exist_ok=True)
+        logger.info(f"Carregando {model_name} no CTranslate2 ({device or 'auto'}, {compute_type})...")
+        self.model = WhisperModel(
+            model_name,
+            device=device or "auto",
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            num_workers=num_workers,
+            download_root=WHISPER_CACHE_DIR
+        )
+        self.beam_size = beam_size
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        segments, _ = self.model.transcribe(audio, beam_size=self.beam_size)
+        # Os segmentos são gerados sob demanda: a decodificação acontece aqui
+        return "".join(segment.text for segment in segments)
+
+
+WHISPER_BACKENDS = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+
+def create_whisper_backend(backend="openai-whisper", model_name="base", device=None, compute_type="int8", workers=1):
+    """
+    Cria o motor de reconhecimento configurado.
+
+    Args:
+        backend (str): openai-whisper ou faster-whisper
+        model_name (str): Nome do modelo (tiny, base, small, medium, large...)
+        device (str): cpu, cuda ou None/"auto" para detectar
+        compute_type (str): Tipo de computação do CTranslate2 (int8, int8_float16, float16, float32)
+        workers (int): Transcrições simultâneas (só no faster-whisper; os demais usam 1)
+    """
+    if backend not in WHISPER_BACKENDS:
+        raise ValueError(f"Backend do Whisper desconhecido: {backend}. Opções: {', '.join(WHISPER_BACKENDS)}")
+    if device == "auto":
+        device = None
+    return WHISPER_BACKENDS[backend](model_name=model_name, device=device, compute_type=compute_type, num_workers=workers)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do backend importam a partir da raiz do backend (ex.: `from utils.logger import ...`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,60 @@
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import MemorySaver
+
+from services.conversation_memory import BoundedMemorySaver
+
+
+def _put(saver, thread_id, step, payload="x"):
+    """Grava um checkpoint com uma nova versão do canal `messages`"""
+    checkpoint = empty_checkpoint()
+    version = str(step)
+    checkpoint["channel_values"] = {"messages": [payload]}
+    checkpoint["channel_versions"] = {"messages": version}
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    return saver.put(config, checkpoint, {}, {"messages": version})
+
+
+def test_memory_saver_internal_layout():
+    # O BoundedMemorySaver mede e apaga diretamente storage, blobs e writes:
+    # se a estrutura interna do MemorySaver mudar, este teste deve falhar
+    saver = MemorySaver()
+    config = _put(saver, "t", 1)
+    checkpoint_id = config["configurable"]["checkpoint_id"]
+    saver.put_writes(config, [("messages", "y")], "task")
+
+    checkpoint, metadata, parent = saver.storage["t"][""][checkpoint_id]
+    assert isinstance(checkpoint[1], bytes) and isinstance(metadata[1], bytes)
+    assert parent is None
+
+    assert list(saver.blobs) == [("t", "", "messages", "1")]
+    assert isinstance(saver.blobs[("t", "", "messages", "1")][1], bytes)
+
+    assert list(saver.writes) == [("t", "", checkpoint_id)]
+    (task_id, channel, value, task_path), = saver.writes[("t", "", checkpoint_id)].values()
+    assert (task_id, channel, task_path) == ("task", "messages", "")
+    assert isinstance(value[1], bytes)
+
+
+def test_bounded_saver_keeps_last_checkpoints():
+    saver = BoundedMemorySaver(keep_checkpoints=2)
+    for step in range(1, 6):
+        config = _put(saver, "t", step)
+        saver.put_writes(config, [("messages", "y")], "task")
+
+    assert len(saver.storage["t"][""]) == 2
+    assert set(saver.blobs) == {("t", "", "messages", "4"), ("t", "", "messages", "5")}
+    assert len(saver.writes) == 2
+    assert saver.pruned_checkpoints == 3
+    assert saver.total_bytes == saver.session_bytes["t"] > 0
+
+
+def test_bounded_saver_evicts_least_recently_used():
+    saver = BoundedMemorySaver(max_sessions=2)
+    for thread_id in ("a", "b", "c"):
+        _put(saver, thread_id, 1)
+
+    assert "a" not in saver.storage
+    assert saver.get_stats()["sessions"] == 2
+    assert saver.evicted_capacity == 1
+    assert not [key for key in saver.blobs if key[0] == "a"]
+    assert saver.total_bytes == sum(saver.session_bytes.values())
@@ -0,0 +1,29 @@
+import pytest
+
+from services.ingestion_pipeline import IngestionJob, IngestionPipeline
+
+
+def test_runs_jobs_through_all_stages():
+    def read(job):
+        job.text = job.source.upper()
+
+    def split(job):
+        if job.source == "bad":
+            raise RuntimeError("falhou")
+        job.chunks = list(job.text)
+
+    completed = []
+    pipeline = IngestionPipeline([("read", read, 2), ("split", split, 3)], queue_size=1)
+    pipeline.run([IngestionJob(source) for source in ("ab", "bad", "cde")], completed.append)
+
+    by_source = {job.source: job for job in completed}
+    assert set(by_source) == {"ab", "bad", "cde"}
+    assert by_source["cde"].chunks == ["C", "D", "E"]
+    assert by_source["bad"].failed_stage == "split"
+    assert set(by_source["ab"].stage_seconds) == {"read", "split"}
+
+
+@pytest.mark.parametrize("workers", [0, -1])
+def test_rejects_stage_without_workers(workers):
+    with pytest.raises(ValueError, match="split"):
+        IngestionPipeline([("read", lambda job: None, 1), ("split", lambda job: None, workers)])
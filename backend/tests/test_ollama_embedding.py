@@ -0,0 +1,40 @@
+import httpx
+import pytest
+
+from services.ollama_embedding import OllamaBatchEmbedding
+
+
+def _embedding(handler):
+    embedding = OllamaBatchEmbedding(model_name="nomic-embed-text")
+    embedding._client = httpx.Client(base_url="http://ollama", transport=httpx.MockTransport(handler))
+    return embedding
+
+
+def test_falls_back_when_embed_route_is_missing():
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        if request.url.path == "/api/embed":
+            # Ollama antigo: o roteador responde 404 em texto puro
+            return httpx.Response(404, text="404 page not found")
+        return httpx.Response(200, json={"embedding": [1.0, 2.0]})
+
+    embedding = _embedding(handler)
+    assert embedding.get_text_embedding_batch(["a", "b"]) == [[1.0, 2.0], [1.0, 2.0]]
+    assert paths == ["/api/embed", "/api/embeddings", "/api/embeddings"]
+    assert embedding.get_stats() == {"requests": 2, "texts": 2}
+
+
+def test_model_not_found_is_raised():
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        return httpx.Response(404, json={"error": 'model "nomic-embed-text" not found, try pulling it first'})
+
+    embedding = _embedding(handler)
+    with pytest.raises(httpx.HTTPStatusError):
+        embedding.get_text_embedding("a")
+    assert paths == ["/api/embed"]
+    assert embedding._batch_endpoint
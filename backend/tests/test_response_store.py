@@ -0,0 +1,93 @@
+import types
+
+import pytest
+
+from services import response_store
+from services.response_store import MemoryResponseStore, ResponseStore, create_response_store
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Relógio controlado pelo teste no lugar de time.time() do módulo"""
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(response_store, "time", types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def _response(text):
+    return {"response": text}
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        ResponseStore()
+
+
+def test_memory_entries_expire_in_order(clock):
+    store = MemoryResponseStore(ttl_seconds=10)
+    store.put("s", "a", _response("A"))
+    clock.now += 5
+    store.put("s", "b", _response("B"))
+
+    clock.now += 6
+    assert store.get("s", "a") is None
+    assert store.get("s", "b") == _response("B")
+    assert [entry["message_hash"] for entry in store.pending("s")] == ["b"]
+
+    clock.now += 5
+    store.cleanup()
+    assert store.get_stats()["entries"] == 0
+    assert store.get_stats()["bytes"] == 0
+    assert store.expired == 2
+
+
+def test_memory_replaced_entry_keeps_new_expiry(clock):
+    store = MemoryResponseStore(ttl_seconds=10)
+    store.put("s", "a", _response("old"))
+    clock.now += 8
+    store.put("s", "a", _response("new"))
+
+    # O item do heap da primeira versão vence aqui e deve ser ignorado
+    clock.now += 5
+    assert store.get("s", "a") == _response("new")
+    assert store.expired == 0
+
+
+def test_memory_per_session_cap_keeps_most_recent(clock):
+    store = MemoryResponseStore(max_entries_per_session=2)
+    for message_hash in ("a", "b", "c"):
+        store.put("s", message_hash, _response(message_hash))
+        clock.now += 1
+    store.put("other", "a", _response("x"))
+
+    assert [entry["message_hash"] for entry in store.pending("s")] == ["b", "c"]
+    assert store.get("other", "a") == _response("x")
+    assert store.evicted == 1
+
+
+def test_memory_byte_cap_evicts_oldest_across_sessions(clock):
+    size = len('{"response": "xxxxxxxxxx"}')
+    store = MemoryResponseStore(max_bytes=2 * size)
+    for session_id in ("s1", "s2", "s3"):
+        store.put(session_id, "a", _response("x" * 10))
+        clock.now += 1
+
+    assert store.get("s1", "a") is None
+    assert store.get("s2", "a") and store.get("s3", "a")
+    assert store.get_stats()["bytes"] == 2 * size
+
+
+def test_memory_oversized_response_is_rejected(clock):
+    store = MemoryResponseStore(max_bytes=100)
+    store.put("s", "small", _response("x"))
+    store.put("s", "big", _response("x" * 200))
+
+    # A resposta grande não entra nem despeja as outras
+    assert store.get("s", "big") is None
+    assert store.get("s", "small") == _response("x")
+    assert store.evicted == 0
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_response_store("redis")
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        assert results == ["ok"] * 5
+        assert len(calls) == 1
+        assert flight.get_stats() == {"in_flight": 0, "executions": 1, "coalesced": 4}
+
+        # Depois de concluída, a chave é liberada
+        assert await flight.do("k", work) == "ok"
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
+
+
+def test_exception_is_shared_and_key_released():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("falhou")
+
+        results = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+        assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+        assert not flight.in_flight("k")
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_execution():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "ok"
+
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert await leader == "ok"
+
+    asyncio.run(scenario())
+
+
+def test_waiter_retries_when_leader_is_cancelled():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "ok"
+
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        # Quem esperava executa de novo em vez de receber o cancelamento alheio
+        assert await waiter == "ok"
+        assert len(calls) == 2
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(scenario())
@@ -0,0 +1,98 @@
+import sqlite3
+import types
+
+import pytest
+
+from services import response_store
+from services.response_store import SqliteResponseStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Relógio controlado pelo teste no lugar de time.time() do módulo"""
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(response_store, "time", types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def _response(text):
+    return {"response": text}
+
+
+def test_responses_are_shared_between_connections(tmp_path, clock):
+    path = str(tmp_path / "sessions.sqlite3")
+    writer = SqliteResponseStore(path, ttl_seconds=10)
+    reader = SqliteResponseStore(path, ttl_seconds=10)
+    writer.put("s", "a", _response("A"))
+
+    assert reader.get("s", "a") == _response("A")
+    clock.now += 11
+    assert reader.get("s", "a") is None
+    assert reader.pending("s") == []
+
+
+def test_per_session_and_byte_caps(tmp_path, clock):
+    size = len('{"response": "xxxxxxxxxx"}')
+    store = SqliteResponseStore(str(tmp_path / "sessions.sqlite3"), max_bytes=3 * size, max_entries_per_session=2)
+    for message_hash in ("a", "b", "c"):
+        store.put("s", message_hash, _response("x" * 10))
+        clock.now += 1
+    assert [entry["message_hash"] for entry in store.pending("s")] == ["b", "c"]
+
+    store.put("t", "a", _response("x" * 10))
+    clock.now += 1
+    store.put("u", "a", _response("x" * 10))
+    # Quatro respostas não cabem em três: a mais antiga ("s", "b") sai
+    assert store.get("s", "b") is None
+    assert store.get_stats()["bytes"] == 3 * size
+
+
+def test_oversized_response_is_rejected(tmp_path, clock):
+    store = SqliteResponseStore(str(tmp_path / "sessions.sqlite3"), max_bytes=100)
+    store.put("s", "small", _response("x"))
+    store.put("s", "big", _response("x" * 200))
+
+    assert store.get("s", "big") is None
+    assert store.get("s", "small") == _response("x")
+
+
+def test_adds_bytes_column_to_existing_file(tmp_path, clock):
+    path = str(tmp_path / "sessions.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE responses (session_id TEXT NOT NULL, message_hash TEXT NOT NULL, response TEXT NOT NULL,"
+        " timestamp REAL NOT NULL, PRIMARY KEY (session_id, message_hash))"
+    )
+    conn.execute("INSERT INTO responses VALUES ('s', 'a', '{\"response\": \"A\"}', ?)", (clock.now,))
+    conn.commit()
+    conn.close()
+
+    store = SqliteResponseStore(path)
+    assert store.get("s", "a") == _response("A")
+    store.put("s", "b", _response("B"))
+    assert store.get_stats()["entries"] == 2
+
+
+def test_conversation_store_evicts_least_recently_used(tmp_path):
+    pytest.importorskip("langgraph.checkpoint.sqlite")
+    from langgraph.checkpoint.base import empty_checkpoint
+    from services.sqlite_memory import PrunedSqliteSaver
+
+    saver = PrunedSqliteSaver(str(tmp_path / "memory.sqlite3"), keep_checkpoints=1, max_sessions=2)
+    for thread_id in ("a", "b", "c"):
+        for step in (1, 2):
+            checkpoint = empty_checkpoint()
+            checkpoint["channel_values"] = {"messages": [f"{thread_id}{step}"]}
+            checkpoint["channel_versions"] = {"messages": str(step)}
+            saver.put({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}, checkpoint, {},
+                      {"messages": str(step)})
+    saver.evict_idle()
+
+    with saver.cursor(transaction=False) as cur:
+        threads = {row[0]: row[1] for row in cur.execute(
+            "SELECT thread_id, COUNT(*) FROM checkpoints GROUP BY thread_id"
+        )}
+    assert threads == {"b": 1, "c": 1}
+    stats = saver.get_stats()
+    assert stats["sessions"] == 2 and stats["bytes"] > 0
+    assert stats["evicted_capacity"] == 1
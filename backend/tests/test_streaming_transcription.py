@@ -0,0 +1,101 @@
+import asyncio
+
+import numpy as np
+
+from services.streaming_transcription import (
+    FRAME_SAMPLES, EnergyVAD, StreamingTranscriptionSession, VoiceActivitySegmenter
+)
+from services.transcription_service import SAMPLE_RATE, TranscriptionQueueFullError
+
+
+def _tone(seconds):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def _speech_with_pauses(bursts):
+    """Trechos de fala de 0,6 s separados por 1 s de silêncio"""
+    return np.concatenate([_silence(0.5)] + [part for _ in range(bursts) for part in (_tone(0.6), _silence(1.0))])
+
+
+def test_segments_split_on_silence():
+    segmenter = VoiceActivitySegmenter(EnergyVAD(), min_silence_ms=600, speech_pad_ms=300)
+    audio = _speech_with_pauses(2)
+
+    # Pedaços que não coincidem com os quadros do VAD
+    segments = []
+    for start in range(0, len(audio), 1000):
+        segments += segmenter.feed(audio[start:start + 1000])
+    segments += segmenter.flush()
+
+    assert len(segments) == 2
+    for segment in segments:
+        # Fala (0,6 s) + margem anterior e posterior, sem o silêncio inteiro
+        assert 0.6 * SAMPLE_RATE <= len(segment) <= 1.3 * SAMPLE_RATE
+
+
+def test_short_noise_is_ignored():
+    segmenter = VoiceActivitySegmenter(EnergyVAD(), min_speech_ms=250)
+    audio = np.concatenate([_silence(0.5), _tone(0.06), _silence(1.0)])
+    assert segmenter.feed(audio) + segmenter.flush() == []
+
+
+def test_long_speech_is_cut_at_max_segment():
+    segmenter = VoiceActivitySegmenter(EnergyVAD(), max_segment_s=1.0)
+    segments = segmenter.feed(_tone(2.5)) + segmenter.flush()
+    assert len(segments) == 3
+    assert len(segments[0]) == (1000 // 30) * FRAME_SAMPLES
+
+
+class FakeTranscriptionService:
+    """Responde a cada segmento com o próximo item de `results` (exceções são lançadas)"""
+
+    queue_depth = 0
+
+    def __init__(self, results):
+        self.results = list(results)
+
+    async def transcribe_samples(self, samples):
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _run_session(results, bursts):
+    service = FakeTranscriptionService(results)
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def scenario():
+        session = StreamingTranscriptionSession(service, send, input_format="pcm16", partial_interval_s=60)
+        await session.start()
+        pcm16 = (_speech_with_pauses(bursts) * 32767).astype(np.int16).tobytes()
+        for start in range(0, len(pcm16), 4096):
+            await session.feed(pcm16[start:start + 4096])
+        text = await session.finish()
+        await session.close()
+        return text
+
+    return asyncio.run(scenario()), messages
+
+
+def test_final_worker_continues_after_failed_segment():
+    text, messages = _run_session([RuntimeError("whisper falhou"), " segundo "], bursts=2)
+
+    assert messages[0] == {"type": "error", "segment": 0, "detail": "Falha na transcrição do segmento"}
+    assert messages[1] == {"type": "final", "segment": 1, "text": "segundo"}
+    assert messages[2] == {"type": "done", "text": "segundo"}
+    assert text == "segundo"
+
+
+def test_final_segment_waits_for_queue_slot():
+    text, messages = _run_session([TranscriptionQueueFullError(4, retry_after=0), "olá"], bursts=1)
+    assert [message["type"] for message in messages] == ["final", "done"]
+    assert text == "olá"
@@ -0,0 +1,51 @@
+from utils.text_stream import SentenceSplitter, ThinkTagFilter
+
+
+def _filter(chunks):
+    think_filter = ThinkTagFilter()
+    return "".join(think_filter.feed(chunk) for chunk in chunks) + think_filter.flush()
+
+
+def test_think_block_is_removed():
+    assert _filter(["<think>raciocínio</think>\n\nResposta final."]) == "Resposta final."
+
+
+def test_tags_split_between_tokens():
+    chunks = ["<th", "ink>pensando", " mais</thi", "nk>", "Olá", " <", "b>mundo"]
+    assert _filter(chunks) == "Olá <b>mundo"
+
+
+def test_tags_are_case_insensitive():
+    assert _filter(["<THINK>x</Think>Texto"]) == "Texto"
+
+
+def test_text_is_released_as_soon_as_possible():
+    think_filter = ThinkTagFilter()
+    assert think_filter.feed("Olá <t") == "Olá "
+    assert think_filter.feed("exto") == "<texto"
+
+
+def test_stream_ending_inside_think_is_dropped():
+    assert _filter(["Antes <think>sem fim"]) == "Antes "
+
+
+def test_short_sentences_are_joined():
+    splitter = SentenceSplitter(min_chars=20)
+    sentences = splitter.feed("Oi. Tudo bem? Esta frase é longa o bastante. Fim")
+    assert sentences == ["Oi. Tudo bem? Esta frase é longa o bastante."]
+    assert splitter.flush() == ["Fim"]
+
+
+def test_abbreviations_and_numbers_do_not_split():
+    splitter = SentenceSplitter(min_chars=1)
+    sentences = splitter.feed("O Prof. Silva leciona Cálculo 1.5 vezes por semana. ")
+    assert sentences == ["O Prof. Silva leciona Cálculo 1.5 vezes por semana."]
+
+
+def test_sentence_split_across_chunks():
+    splitter = SentenceSplitter(min_chars=1)
+    assert splitter.feed("Primeira frase") == []
+    assert splitter.feed(".") == []
+    assert splitter.feed(" Segunda\nTerceira") == ["Primeira frase.", "Segunda"]
+    assert splitter.flush() == ["Terceira"]
+    assert splitter.flush() == []
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+import server  # noqa: E402
+
+FIRST = "A primeira frase da resposta tem tamanho suficiente. "
+SECOND = "A segunda frase também passa do mínimo de caracteres. "
+
+
+class FakeChat:
+    def __init__(self, tokens, error=None):
+        self.tokens = tokens
+        self.error = error
+
+    async def stream_response(self, message, session_id):
+        for token in self.tokens:
+            await asyncio.sleep(0)
+            yield token
+        if self.error:
+            raise self.error
+
+
+class FakeTTS:
+    """Sintetiza na hora, exceto as frases em `slow`, que ficam pendentes até serem canceladas"""
+
+    def __init__(self, slow=()):
+        self.slow = slow
+        self.started = 0
+        self.cancelled = 0
+
+    async def synthesize_for_response(self, text, keep_seconds):
+        self.started += 1
+        try:
+            if any(sentence.strip() in text for sentence in self.slow):
+                await asyncio.sleep(60)
+            return {"audio_id": str(self.started), "audio_url": f"/audio/{self.started}", "audio_format": "mp3"}
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+def _run_stream(monkeypatch, chat, tts, session_id):
+    fakes = {"chat": chat, "tts": tts}
+    monkeypatch.setattr(server, "require_service", lambda name: fakes[name])
+
+    async def scenario():
+        response = await server.chat_with_tts_stream(server.ChatRequest(message="Quem é o coordenador?",
+                                                                        session_id=session_id))
+        events = []
+        async for event in response.body_iterator:
+            name, data = event.strip().split("\n")
+            events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+        # Deixar as tarefas canceladas terminarem antes de inspecionar o TTS falso
+        await asyncio.sleep(0.01)
+        return events
+
+    return asyncio.run(scenario())
+
+
+def test_audio_chunks_follow_sentence_order(monkeypatch):
+    tts = FakeTTS()
+    events = _run_stream(monkeypatch, FakeChat([FIRST, SECOND]), tts, "tts-ok")
+
+    audio = [data for name, data in events if name == "audio"]
+    assert [chunk["index"] for chunk in audio] == [0, 1]
+    assert [chunk["text"] for chunk in audio] == [FIRST.strip(), SECOND.strip()]
+    assert events[-1][0] == "done" and events[-1][1]["audio_chunks"] == 2
+
+
+def test_failed_stream_cancels_pending_synthesis(monkeypatch):
+    # A primeira síntese fica pendente (já retirada da fila pelo emissor) quando o LLM falha
+    tts = FakeTTS(slow=[FIRST, SECOND])
+    events = _run_stream(monkeypatch, FakeChat([FIRST, SECOND], error=RuntimeError("LLM caiu")), tts, "tts-error")
+
+    assert events[-1] == ("error", {"detail": "LLM caiu"})
+    # Sínteses que nem começaram são canceladas antes de rodar; as iniciadas, no meio
+    assert tts.started >= 1
+    assert tts.cancelled == tts.started
+    assert not server.background_tasks
@@ -0,0 +1,67 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Deduplicação de chamadas idênticas em andamento (asyncio).
+
+    A primeira chamada com uma chave executa a corrotina; chamadas com a
+    mesma chave enquanto ela não termina aguardam o mesmo resultado (ou a
+    mesma exceção) em vez de repetir o trabalho. Depois de concluída, a
+    chave é liberada: chamadas seguintes executam de novo (o reaproveitamento
+    a partir daí é papel dos caches).
+    """
+
+    def __init__(self):
+        self.flights = {}
+
+        # Métricas
+        self.executions = 0
+        self.coalesced = 0
+
+    def in_flight(self, key) -> bool:
+        return key in self.flights
+
+    async def do(self, key, factory):
+        """
+        Executa `factory()` (função que cria a corrotina) uma única vez por chave em andamento.
+
+        Returns:
+            O resultado da corrotina, compartilhado por todas as chamadas simultâneas
+        """
+        while key in self.flights:
+            future = self.flights[key]
+            self.coalesced += 1
+            try:
+                # shield: cancelar quem espera não cancela a execução compartilhada
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # A execução original foi cancelada: esta chamada tenta de novo
+
+        future = asyncio.get_running_loop().create_future()
+        # Marca a exceção como consumida mesmo sem ninguém esperando (evita aviso no log)
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self.flights[key] = future
+        self.executions += 1
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self.flights[key]
+
+    def get_stats(self) -> dict:
+        return {
+            "in_flight": len(self.flights),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
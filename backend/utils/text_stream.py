@@ -0,0 +1,151 @@
+class ThinkTagFilter:
+    """
+    Remove trechos <think>...</think> de um fluxo de texto de forma incremental.
+
+    Máquina de estados alimentada token a token: o texto fora das tags é
+    devolvido assim que não puder mais fazer parte de uma tag, e o texto
+    dentro delas é descartado. Tags partidas entre tokens ficam retidas no
+    buffer até que o próximo token decida se são tags ou texto comum.
+    """
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self.inside_think = False
+        self.buffer = ""
+        self.started = False
+
+    @staticmethod
+    def _partial_tag_length(text: str, tag: str) -> int:
+        """Tamanho do maior sufixo de `text` que é prefixo de `tag`."""
+        lowered = text.lower()
+        for size in range(min(len(tag) - 1, len(text)), 0, -1):
+            if lowered.endswith(tag[:size]):
+                return size
+        return 0
+
+    def _emit(self, text: str) -> str:
+        # Descartar espaços iniciais (normalmente a quebra de linha após </think>)
+        if not self.started:
+            text = text.lstrip()
+            if text:
+                self.started = True
+        return text
+
+    def feed(self, chunk: str) -> str:
+        """
+        Processa um novo trecho do fluxo.
+
+        Args:
+            chunk (str): Trecho recebido do modelo
+
+        Returns:
+            str: Texto visível que já pode ser repassado ao cliente
+        """
+        self.buffer += chunk
+        output = []
+
+        while self.buffer:
+            tag = self.CLOSE_TAG if self.inside_think else self.OPEN_TAG
+            index = self.buffer.lower().find(tag)
+
+            if index >= 0:
+                if not self.inside_think:
+                    output.append(self._emit(self.buffer[:index]))
+                self.buffer = self.buffer[index + len(tag):]
+                self.inside_think = not self.inside_think
+                continue
+
+            # Reter um possível início de tag no fim do buffer
+            keep = self._partial_tag_length(self.buffer, tag)
+            ready = self.buffer[:len(self.buffer) - keep]
+            if not self.inside_think:
+                output.append(self._emit(ready))
+            self.buffer = self.buffer[len(self.buffer) - keep:]
+            break
+
+        return "".join(output)
+
+    def flush(self) -> str:
+        """
+        Finaliza o fluxo, devolvendo o texto ainda retido no buffer.
+
+        Returns:
+            str: Texto visível restante (vazio se o fluxo terminou dentro de <think>)
+        """
+        remaining = "" if self.inside_think else self._emit(self.buffer)
+        self.buffer = ""
+        return remaining
+
+
+class SentenceSplitter:
+    """
+    Agrupa um fluxo de texto em frases completas para síntese de voz incremental.
+
+    Uma frase termina em '.', '!', '?', '…', ':' ou ';' seguidos de espaço, ou
+    em uma quebra de linha. Frases menores que `min_chars` são unidas à
+    seguinte para evitar sínteses muito curtas (e pausas artificiais).
+    """
+
+    SENTENCE_ENDINGS = ".!?…:;"
+    # Abreviações comuns que não encerram frases
+    ABBREVIATIONS = ("dr.", "dra.", "prof.", "profa.", "sr.", "sra.", "etc.", "ex.", "p.ex.", "pág.", "n.º", "nº.")
+
+    def __init__(self, min_chars=40):
+        self.min_chars = min_chars
+        self.buffer = ""
+        self.pending = ""
+
+    def _is_boundary(self, text: str, index: int) -> bool:
+        char = text[index]
+        if char == "\n":
+            return True
+        if char not in self.SENTENCE_ENDINGS:
+            return False
+        # Precisa de um espaço depois para ter certeza de que a frase acabou
+        if index + 1 >= len(text) or not text[index + 1].isspace():
+            return False
+        last_word = text[:index + 1].rsplit(None, 1)[-1].lower()
+        return last_word not in self.ABBREVIATIONS
+
+    def _collect(self, sentence: str, sentences: list):
+        sentence = sentence.strip()
+        if not sentence:
+            return
+        self.pending = f"{self.pending} {sentence}".strip()
+        if len(self.pending) >= self.min_chars:
+            sentences.append(self.pending)
+            self.pending = ""
+
+    def feed(self, chunk: str) -> list:
+        """
+        Processa um novo trecho do fluxo.
+
+        Args:
+            chunk (str): Trecho de texto visível da resposta
+
+        Returns:
+            list[str]: Frases completas prontas para síntese, em ordem
+        """
+        self.buffer += chunk
+        sentences = []
+        start = 0
+        for index in range(len(self.buffer)):
+            if self._is_boundary(self.buffer, index):
+                self._collect(self.buffer[start:index + 1], sentences)
+                start = index + 1
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> list:
+        """
+        Finaliza o fluxo, devolvendo o texto restante como última frase.
+
+        Returns:
+            list[str]: Frases restantes (no máximo uma)
+        """
+        remaining = f"{self.pending} {self.buffer.strip()}".strip()
+        self.buffer = ""
+        self.pending = ""
+        return [remaining] if remaining else []
@@ -290,7 +290,7 @@ interface ChatBubbleProps {
   message: ChatMessage;
   isUser: boolean;
   playingMessageId?: string | null;
-  onToggleAudio?: (messageId: string, audioBase64: string, audioFormat?: string) => void;
+  onToggleAudio?: (messageId: string, audioUrl: string, audioFormat?: string) => void;
 }
 
 function ChatBubble({ message, isUser, playingMessageId, onToggleAudio }: ChatBubbleProps) {
@@ -728,8 +728,8 @@ export default function ModernChatInterface({ onResetChat, resetTrigger }: Moder
     };
   }, []);
 
-  // Função para reproduzir áudio a partir de Base64
-  const playAudio = (audioBase64: string, format: string = 'mp3', messageId?: string) => {
+  // Função para reproduzir áudio a partir da URL servida pelo backend (/audio/{id})
+  const playAudio = (audioUrl: string, format: string = 'mp3', messageId?: string) => {
     try {
       // Se o mesmo áudio está tocando, pausar
       if (currentAudio && playingMessageId === messageId) {
@@ -748,18 +748,7 @@ export default function ModernChatInterface({ onResetChat, resetTrigger }: Moder
         setPlayingMessageId(null)
       }
 
-      // Decodificar Base64 para bytes
-      const audioBytes = atob(audioBase64)
-      const audioArray = new Uint8Array(audioBytes.length)
-      for (let i = 0; i < audioBytes.length; i++) {
-        audioArray[i] = audioBytes.charCodeAt(i)
-      }
-      
-      // Criar blob de áudio
-      const audioBlob = new Blob([audioArray], { type: `audio/${format}` })
-      const audioUrl = URL.createObjectURL(audioBlob)
-      
-      // Criar e reproduzir elemento audio
+      // Criar e reproduzir elemento audio (o navegador baixa o áudio por streaming)
       const audio = new Audio(audioUrl)
       setCurrentAudio(audio)
       if (messageId) {
@@ -768,9 +757,8 @@ export default function ModernChatInterface({ onResetChat, resetTrigger }: Moder
       
       audio.play()
       
-      // Limpar URL quando terminar ou parar
+      // Limpar estado quando terminar ou parar
       const cleanup = () => {
-        URL.revokeObjectURL(audioUrl)
         setCurrentAudio(null)
         setPlayingMessageId(null)
       }
@@ -954,8 +942,8 @@ export default function ModernChatInterface({ onResetChat, resetTrigger }: Moder
     setInputValue(action.text);
   }, []);
 
-  const handleToggleAudio = useCallback((messageId: string, audioBase64: string, audioFormat?: string) => {
-    playAudio(audioBase64, audioFormat, messageId);
+  const handleToggleAudio = useCallback((messageId: string, audioUrl: string, audioFormat?: string) => {
+    playAudio(audioUrl, audioFormat, messageId);
   }, [currentAudio, playingMessageId]);
 
   useEffect(() => {
@@ -1,4 +1,4 @@
-import { API_ENDPOINTS } from '@/config/api'
+import { API_BASE_URL, API_ENDPOINTS } from '@/config/api'
 import { v4 as uuidv4 } from 'uuid'
 
 // Função para gerar hash MD5 usando Web Crypto API
@@ -30,10 +30,15 @@ interface ChatMessage {
   text: string
   sender: 'user' | 'assistant'
   timestamp: Date
-  audio?: string // Base64 audio data
+  audio?: string // URL do áudio servido pelo backend (/audio/{id})
   audioFormat?: string // 'mp3' | 'wav'
 }
 
+// Converte a URL relativa do áudio retornada pelo backend em URL absoluta
+// Áudios que não couberam no cache do servidor chegam como data URL
+const resolveAudioUrl = (audioUrl: string): string =>
+  audioUrl.startsWith('data:') ? audioUrl : `${API_BASE_URL}${audioUrl}`
+
 // Função para gerar um session_id único
 const generateSessionId = () => {
   return uuidv4()
@@ -160,13 +165,13 @@ export const api = {
             const data = pendingMatch.response
             
             // Formatear resposta igual ao processo normal
-            if (useTTS && data.text && data.audio) {
+            if (useTTS && data.text && data.audio_url) {
               return {
                 id: sessionId,
                 text: data.text,
                 sender: 'assistant',
                 timestamp: new Date(),
-                audio: data.audio,
+                audio: resolveAudioUrl(data.audio_url),
                 audioFormat: data.audio_format || 'mp3'
               }
             } else {
@@ -205,13 +210,13 @@ export const api = {
         const data = await response.json()
         
         // Se for TTS, a resposta tem formato diferente
-        if (useTTS && data.text && data.audio) {
+        if (useTTS && data.text && data.audio_url) {
           return {
             id: sessionId,
             text: data.text,
             sender: 'assistant',
             timestamp: new Date(),
-            audio: data.audio,
+            audio: resolveAudioUrl(data.audio_url),
             audioFormat: data.audio_format || 'mp3'
           }
         } else {